@@ -0,0 +1,144 @@
+"""Partition interactions by month on interaction_date
+
+Creates the schema on an empty database, or converts an existing
+(create_all-built) interactions table into a RANGE-partitioned one,
+copying its rows into monthly partitions. Ids keep their sequence.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_hcps_if_missing(inspector):
+    if inspector.has_table("hcps"):
+        return
+    op.create_table(
+        "hcps",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255)),
+        sa.Column("specialty", sa.String(255), nullable=True),
+        sa.Column("contact_info", sa.String(255), nullable=True),
+    )
+    op.create_index("ix_hcps_id", "hcps", ["id"])
+    op.create_index("ix_hcps_name", "hcps", ["name"], unique=True)
+
+
+def _create_partitioned_interactions():
+    op.execute("CREATE SEQUENCE IF NOT EXISTS interactions_id_seq")
+    op.execute("""
+        CREATE TABLE interactions (
+            id INTEGER NOT NULL DEFAULT nextval('interactions_id_seq'),
+            hcp_id INTEGER REFERENCES hcps (id),
+            interaction_type VARCHAR(100),
+            interaction_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            interaction_time VARCHAR(50),
+            attendees TEXT,
+            topics_discussed TEXT,
+            materials_shared TEXT,
+            samples_distributed TEXT,
+            hcp_sentiment VARCHAR(50),
+            outcomes TEXT,
+            follow_up_actions TEXT,
+            summary VARCHAR,
+            raw_text_input VARCHAR,
+            PRIMARY KEY (id, interaction_date)
+        ) PARTITION BY RANGE (interaction_date)
+    """)
+    op.create_index("ix_interactions_id", "interactions", ["id"])
+    op.create_index("ix_interactions_hcp_id_interaction_date", "interactions", ["hcp_id", "interaction_date"])
+    op.execute("CREATE TABLE interactions_default PARTITION OF interactions DEFAULT")
+
+
+def _create_month_partitions(first, last):
+    month = first
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS interactions_{month.year:04d}_{month.month:02d} "
+            f"PARTITION OF interactions FOR VALUES FROM ('{month.isoformat()}') "
+            f"TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # Partitioning is PostgreSQL-only; other dialects keep the create_all schema
+        return
+
+    inspector = sa.inspect(bind)
+    _create_hcps_if_missing(inspector)
+
+    this_month = date.today().replace(day=1)
+    if not inspector.has_table("interactions"):
+        _create_partitioned_interactions()
+        _create_month_partitions(this_month, _add_months(this_month, MONTHS_AHEAD))
+        op.execute("ALTER SEQUENCE interactions_id_seq OWNED BY interactions.id")
+        return
+
+    already_partitioned = bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON p.partrelid = c.oid "
+        "WHERE c.relname = 'interactions'"
+    )).scalar()
+    if already_partitioned:
+        return
+
+    # Detach the sequence so dropping the old table does not take it along
+    op.execute("ALTER SEQUENCE IF EXISTS interactions_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE interactions RENAME TO interactions_unpartitioned")
+    op.execute("ALTER INDEX IF EXISTS ix_interactions_id RENAME TO ix_interactions_unpartitioned_id")
+    op.execute("ALTER INDEX IF EXISTS interactions_pkey RENAME TO interactions_unpartitioned_pkey")
+    op.execute("UPDATE interactions_unpartitioned SET interaction_date = now() WHERE interaction_date IS NULL")
+
+    _create_partitioned_interactions()
+    oldest = bind.execute(sa.text("SELECT min(interaction_date) FROM interactions_unpartitioned")).scalar()
+    first = date(oldest.year, oldest.month, 1) if isinstance(oldest, datetime) else this_month
+    _create_month_partitions(min(first, this_month), _add_months(this_month, MONTHS_AHEAD))
+
+    op.execute("""
+        INSERT INTO interactions (
+            id, hcp_id, interaction_type, interaction_date, interaction_time, attendees,
+            topics_discussed, materials_shared, samples_distributed, hcp_sentiment,
+            outcomes, follow_up_actions, summary, raw_text_input
+        )
+        SELECT
+            id, hcp_id, interaction_type, interaction_date, interaction_time, attendees,
+            topics_discussed, materials_shared, samples_distributed, hcp_sentiment,
+            outcomes, follow_up_actions, summary, raw_text_input
+        FROM interactions_unpartitioned
+    """)
+    op.execute("DROP TABLE interactions_unpartitioned")
+    op.execute("ALTER SEQUENCE interactions_id_seq OWNED BY interactions.id")
+    op.execute("SELECT setval('interactions_id_seq', COALESCE((SELECT max(id) FROM interactions), 0) + 1, false)")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    op.execute("ALTER SEQUENCE interactions_id_seq OWNED BY NONE")
+    op.execute("CREATE TABLE interactions_unpartitioned (LIKE interactions INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO interactions_unpartitioned SELECT * FROM interactions")
+    op.execute("DROP TABLE interactions")
+    op.execute("ALTER TABLE interactions_unpartitioned RENAME TO interactions")
+    op.execute("ALTER TABLE interactions ADD PRIMARY KEY (id)")
+    op.execute("ALTER TABLE interactions ADD FOREIGN KEY (hcp_id) REFERENCES hcps (id)")
+    op.create_index("ix_interactions_id", "interactions", ["id"])
+    op.execute("ALTER SEQUENCE interactions_id_seq OWNED BY interactions.id")
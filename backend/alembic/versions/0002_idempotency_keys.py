@@ -0,0 +1,40 @@
+"""Idempotency keys and interaction fingerprints
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("idempotency_keys"):
+        op.create_table(
+            "idempotency_keys",
+            sa.Column("scope", sa.String(50), primary_key=True),
+            sa.Column("key", sa.String(255), primary_key=True),
+            sa.Column("request_hash", sa.String(64), nullable=False),
+            sa.Column("status_code", sa.Integer(), nullable=True),
+            sa.Column("response_body", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime()),
+        )
+    if not inspector.has_table("interaction_fingerprints"):
+        op.create_table(
+            "interaction_fingerprints",
+            sa.Column("fingerprint", sa.String(64), primary_key=True),
+            sa.Column("interaction_id", sa.Integer(), nullable=False),
+        )
+        op.create_index("ix_interaction_fingerprints_interaction_id", "interaction_fingerprints", ["interaction_id"])
+
+
+def downgrade():
+    op.drop_index("ix_interaction_fingerprints_interaction_id", table_name="interaction_fingerprints")
+    op.drop_table("interaction_fingerprints")
+    op.drop_table("idempotency_keys")
@@ -0,0 +1,49 @@
+"""Add a timezone-aware occurred_at timestamp to interactions
+
+Backfills occurred_at from interaction_date plus the free-form interaction_time
+("HH:MM"; anything unparseable keeps the time stored on interaction_date), read in
+INTERACTION_TIMEZONE, then indexes it for range queries.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # Same as 0001: the interactions schema is PostgreSQL-only
+        return
+
+    op.add_column("interactions", sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=True))
+    bind.execute(sa.text(r"""
+        UPDATE interactions SET occurred_at = (
+            date_trunc('day', interaction_date) + CASE
+                WHEN interaction_time ~ '^\s*([01]?[0-9]|2[0-3]):[0-5][0-9]'
+                THEN substring(interaction_time from '(?:[01]?[0-9]|2[0-3]):[0-5][0-9]')::time
+                ELSE interaction_date::time
+            END
+        ) AT TIME ZONE :tz
+    """), {"tz": settings.INTERACTION_TIMEZONE})
+    op.alter_column("interactions", "occurred_at", nullable=False)
+    op.create_index("ix_interactions_occurred_at", "interactions", ["occurred_at"])
+    op.create_index("ix_interactions_hcp_id_occurred_at", "interactions", ["hcp_id", "occurred_at"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    op.drop_index("ix_interactions_hcp_id_occurred_at", table_name="interactions")
+    op.drop_index("ix_interactions_occurred_at", table_name="interactions")
+    op.drop_column("interactions", "occurred_at")
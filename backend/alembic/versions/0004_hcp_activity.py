@@ -0,0 +1,43 @@
+"""Per-HCP interaction rollup table
+
+The table starts empty; backfill it with `python -m app.jobs.hcp_activity rebuild`.
+Until then lookups fall back to scanning interactions.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # JSONB counters; like the interactions schema this is PostgreSQL-only
+        return
+    op.create_table(
+        "hcp_activity",
+        sa.Column("hcp_id", sa.Integer(), sa.ForeignKey("hcps.id"), primary_key=True),
+        sa.Column("interaction_count", sa.Integer(), nullable=False),
+        sa.Column("sentiment_counts", postgresql.JSONB(), nullable=False),
+        sa.Column("type_counts", postgresql.JSONB(), nullable=False),
+        sa.Column("last_interaction_id", sa.Integer(), nullable=True),
+        sa.Column("last_interaction_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_follow_up_actions", sa.Text(), nullable=True),
+        sa.Column("last_follow_up_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    op.drop_table("hcp_activity")
@@ -0,0 +1,52 @@
+"""Weekly interaction stats for the analytics API
+
+Both tables start empty; backfill with `python -m app.jobs.interaction_stats rebuild`.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # Filled from the PostgreSQL-only interactions schema
+        return
+    op.create_table(
+        "interaction_weekly_stats",
+        sa.Column("week_start", sa.Date(), primary_key=True),
+        sa.Column("specialty", sa.String(255), primary_key=True),
+        sa.Column("interaction_type", sa.String(100), primary_key=True),
+        sa.Column("hcp_sentiment", sa.String(50), primary_key=True),
+        sa.Column("interaction_count", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "hcp_weekly_stats",
+        sa.Column("hcp_id", sa.Integer(), primary_key=True),
+        sa.Column("week_start", sa.Date(), primary_key=True),
+        sa.Column("interaction_type", sa.String(100), primary_key=True),
+        sa.Column("hcp_sentiment", sa.String(50), primary_key=True),
+        sa.Column("interaction_count", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "interaction_stats_queue",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("week_start", sa.Date(), nullable=False),
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    op.drop_table("interaction_stats_queue")
+    op.drop_table("hcp_weekly_stats")
+    op.drop_table("interaction_weekly_stats")
@@ -0,0 +1,68 @@
+"""Move long interaction text to the interaction_text side table
+
+topics_discussed, outcomes, follow_up_actions, summary and raw_text_input move off the
+partitioned interactions table into interaction_text (one row per interaction that has
+any of them), stored with a low toast_tuple_target so values get compressed.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+TEXT_COLUMNS = ("topics_discussed", "outcomes", "follow_up_actions", "summary", "raw_text_input")
+
+USE_LZ4_COMPRESSION = """
+DO $$
+BEGIN
+    IF 'lz4' = ANY (SELECT unnest(enumvals) FROM pg_settings WHERE name = 'default_toast_compression') THEN
+        ALTER TABLE interaction_text
+            ALTER COLUMN topics_discussed SET COMPRESSION lz4,
+            ALTER COLUMN outcomes SET COMPRESSION lz4,
+            ALTER COLUMN follow_up_actions SET COMPRESSION lz4,
+            ALTER COLUMN summary SET COMPRESSION lz4,
+            ALTER COLUMN raw_text_input SET COMPRESSION lz4;
+    END IF;
+END $$
+"""
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # Same as 0001: the interactions schema is PostgreSQL-only
+        return
+    op.create_table(
+        "interaction_text",
+        sa.Column("interaction_id", sa.Integer(), primary_key=True),
+        *[sa.Column(column, sa.Text(), nullable=True) for column in TEXT_COLUMNS],
+        postgresql_with={"toast_tuple_target": 256},
+    )
+    op.execute(USE_LZ4_COMPRESSION)
+    columns = ", ".join(TEXT_COLUMNS)
+    op.execute(f"""
+        INSERT INTO interaction_text (interaction_id, {columns})
+        SELECT id, {columns} FROM interactions
+        WHERE {" OR ".join(f"{column} IS NOT NULL" for column in TEXT_COLUMNS)}
+    """)
+    for column in TEXT_COLUMNS:
+        op.drop_column("interactions", column)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    for column in TEXT_COLUMNS:
+        op.add_column("interactions", sa.Column(column, sa.Text(), nullable=True))
+    op.execute(f"""
+        UPDATE interactions i SET {", ".join(f"{column} = t.{column}" for column in TEXT_COLUMNS)}
+        FROM interaction_text t WHERE t.interaction_id = i.id
+    """)
+    op.drop_table("interaction_text")
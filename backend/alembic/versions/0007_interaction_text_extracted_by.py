@@ -0,0 +1,33 @@
+"""Record which extractor produced a chat interaction's fields
+
+interaction_text.extracted_by is "llm", "local" (the trained local extractor),
+"heuristic" (regex fallback while the LLM circuit is open) or "edit" (raw text replaced
+by a later chat edit). NULL rows predate the column. The local extractor only trains
+on "llm" and NULL rows so it never learns from its own output.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # Same as 0001: the interactions schema is PostgreSQL-only
+        return
+    op.add_column("interaction_text", sa.Column("extracted_by", sa.String(16), nullable=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    op.drop_column("interaction_text", "extracted_by")
@@ -0,0 +1,41 @@
+"""Per-HCP features for next-step suggestions
+
+First interaction time, the latest sentiments in order, and counts of the materials and
+samples already given. The table starts empty; backfill it with
+`python -m app.jobs.hcp_activity rebuild`, which rebuilds both per-HCP rollups.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # JSONB like hcp_activity; PostgreSQL-only
+        return
+    op.create_table(
+        "hcp_features",
+        sa.Column("hcp_id", sa.Integer(), sa.ForeignKey("hcps.id"), primary_key=True),
+        sa.Column("first_interaction_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("recent_sentiments", postgresql.JSONB(), nullable=False),
+        sa.Column("materials_given", postgresql.JSONB(), nullable=False),
+        sa.Column("samples_given", postgresql.JSONB(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    op.drop_table("hcp_features")
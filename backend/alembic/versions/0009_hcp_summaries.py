@@ -0,0 +1,43 @@
+"""Rolling per-HCP interaction-history summaries
+
+New interactions are appended as one-line digests; `python -m app.jobs.hcp_summaries
+compact` folds older digests into the summary. The table starts empty; backfill it with
+`python -m app.jobs.hcp_summaries rebuild`.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # JSONB like hcp_activity; PostgreSQL-only
+        return
+    op.create_table(
+        "hcp_summaries",
+        sa.Column("hcp_id", sa.Integer(), sa.ForeignKey("hcps.id"), primary_key=True),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("summarized_count", sa.Integer(), nullable=False),
+        sa.Column("pending_digests", postgresql.JSONB(), nullable=False),
+        sa.Column("raw_chars", sa.BigInteger(), nullable=False),
+        sa.Column("stale_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("compacted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    op.drop_table("hcp_summaries")
@@ -1,4 +1,20 @@
-from app.core.database import get_db
+import time
+from fastapi import Request, Response
+from app.core.database import get_db, get_read_db, get_write_db, READ_YOUR_WRITES_COOKIE
 
 def get_db_session():
-    yield from get_db()
\ No newline at end of file
+    yield from get_db()
+
+def get_write_db_session(response: Response):
+    yield from get_write_db(response)
+
+def client_is_sticky(request: Request) -> bool:
+    """Whether the client wrote recently and must read from the primary."""
+    try:
+        sticky_until = float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+    except ValueError:
+        sticky_until = 0
+    return sticky_until > time.time()
+
+def get_read_db_session(request: Request):
+    yield from get_read_db(use_primary=client_is_sticky(request))
\ No newline at end of file
@@ -0,0 +1,17 @@
+from typing import Iterable, List, Optional
+from fastapi import HTTPException
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], always: Iterable[str] = ("id",)) -> List[str]:
+    """Parses a ``fields=a,b,c`` sparse fieldset; no value means every allowed field.
+
+    Fields in ``always`` are included whether requested or not. Unknown names are a 400.
+    """
+    allowed = list(allowed)
+    if not fields:
+        return allowed
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    selected = [field for field in always if field not in requested] + requested
+    return list(dict.fromkeys(selected))
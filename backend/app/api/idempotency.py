@@ -0,0 +1,39 @@
+import hashlib
+import json
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from app.crud import idempotency as crud_idempotency
+
+def payload_hash(payload) -> str:
+    """Stable hash of a JSON-serializable payload; whitespace and case in strings are normalized."""
+    def normalize(value):
+        if isinstance(value, str):
+            return " ".join(value.lower().split())
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [normalize(v) for v in value]
+        return value
+    encoded = json.dumps(normalize(payload), sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+def claim_or_replay(db: Session, scope: str, key: str, request_hash: str) -> Optional[JSONResponse]:
+    """Claims ``key`` for this request, or returns the stored response for a repeat.
+
+    Raises 422 when the key was used with a different payload and 409 while the
+    original request is still being processed.
+    """
+    existing = crud_idempotency.reserve_key(db, scope, key, request_hash)
+    if existing is None:
+        return None
+    if existing.request_hash != request_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request payload")
+    if existing.status_code is None:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still being processed")
+    return JSONResponse(
+        status_code=existing.status_code,
+        content=json.loads(existing.response_body),
+        headers={"Idempotent-Replayed": "true"},
+    )
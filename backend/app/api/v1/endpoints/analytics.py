@@ -0,0 +1,42 @@
+from typing import List, Literal, Optional
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.crud import analytics as crud_analytics
+from app.schemas.analytics import WeeklyTrend
+from app.api.deps import get_read_db_session
+
+router = APIRouter()
+
+@router.get("/weekly", response_model=List[WeeklyTrend])
+def read_weekly_trends(
+    group_by: Literal["hcp", "specialty", "interaction_type"] = "specialty",
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    hcp_id: Optional[int] = None,
+    specialty: Optional[str] = None,
+    interaction_type: Optional[str] = None,
+    db: Session = Depends(get_read_db_session),
+):
+    """Weekly interaction counts and sentiment per HCP, specialty or interaction type.
+
+    Served from interaction_weekly_stats, so results lag writes until the next
+    `python -m app.jobs.interaction_stats refresh`. Weeks start on Monday; ``from`` is
+    inclusive and ``to`` exclusive, both compared with the week's start date.
+    """
+    rows = crud_analytics.get_weekly_trends(
+        db, group_by, start=date_from, end=date_to,
+        hcp_id=hcp_id, specialty=specialty, interaction_type=interaction_type,
+    )
+    trends = []
+    for row in rows:
+        counts = {sentiment: getattr(row, sentiment) for sentiment in crud_analytics.SENTIMENTS}
+        counts["Other"] = row.interaction_count - sum(counts.values())
+        trends.append(WeeklyTrend(
+            week_start=row.week_start,
+            group=row.group,
+            interaction_count=row.interaction_count,
+            sentiment_counts=counts,
+            sentiment_score=round((counts["Positive"] - counts["Negative"]) / row.interaction_count, 3) if row.interaction_count else None,
+        ))
+    return trends
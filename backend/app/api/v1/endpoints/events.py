@@ -0,0 +1,60 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.api.fields import parse_fields
+from app.core.config import settings
+from app.core.events import TOPICS, Subscription, event_broker
+
+router = APIRouter()
+
+async def next_event(subscription: Subscription) -> Optional[dict]:
+    """The next queued event, or None once EVENTS_KEEPALIVE_SECONDS pass without one."""
+    try:
+        return await asyncio.wait_for(subscription.queue.get(), settings.EVENTS_KEEPALIVE_SECONDS)
+    except asyncio.TimeoutError:
+        return None
+
+@router.get("/stream")
+async def stream_events(topics: Optional[str] = Query(None, description="Comma-separated: hcps, interactions (default: all)")):
+    """Server-sent events, one JSON object ``{"id", "type", "topic", "data"}`` per message.
+
+    ``data`` is the created or updated row. A ``resync`` event means events were lost
+    (the client fell behind, or Redis reconnected) and lists should be reloaded; do the
+    same after reconnecting, since events are not replayed.
+    """
+    subscription = event_broker.subscribe(parse_fields(topics, TOPICS, always=()))
+
+    async def body():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                item = await next_event(subscription)
+                if item is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"id: {item.get('id', '')}\ndata: {json.dumps(item)}\n\n"
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.websocket("/ws")
+async def websocket_events(websocket: WebSocket, topics: Optional[str] = None):
+    """The same events as /stream over a WebSocket; idle connections get ``{"type": "keepalive"}``."""
+    try:
+        selected = parse_fields(topics, TOPICS, always=())
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    await websocket.accept()
+    subscription = event_broker.subscribe(selected)
+    try:
+        while True:
+            item = await next_event(subscription)
+            await websocket.send_json(item or {"type": "keepalive"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_broker.unsubscribe(subscription)
@@ -1,27 +1,118 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, Dict, List, Literal, Optional
+from datetime import datetime
+import asyncio
+import tempfile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.crud import hcp as crud_hcp
-from app.schemas.hcp import HCP, HPCCreate
-from app.api.deps import get_db_session
+from app.crud import hcp as crud_hcp, hcp_activity as crud_hcp_activity, interaction as crud_interaction
+from app.core.config import settings
+from app.schemas.hcp import HCP, HCPActivity, HCPFields, HCPNextSteps, HPCCreate
+from app.schemas.interaction import InteractionFields
+from app.api.deps import get_read_db_session, get_write_db_session
+from app.api.fields import parse_fields
+from app.services import hcp_import
+from app.services.agent_loader import load_agent
+from app.services.next_steps import next_step_engine
+
+# Uploads larger than this are spooled to a temporary file instead of memory
+BULK_SPOOL_MAX_BYTES = 8 * 1024 * 1024
 
 router = APIRouter()
 
 @router.post("/", response_model=HCP)
-def create_hcp(hcp: HPCCreate, db: Session = Depends(get_db_session)):
-    db_hcp = crud_hcp.get_hcp_by_name(db, name=hcp.name)
-    if db_hcp:
+def create_hcp(hcp: HPCCreate, db: Session = Depends(get_write_db_session)):
+    db_hcp = crud_hcp.create_hcp(db=db, hcp=hcp)
+    if db_hcp is None:
         raise HTTPException(status_code=400, detail="HCP with this name already registered")
-    return crud_hcp.create_hcp(db=db, hcp=hcp)
+    return db_hcp
+
+@router.post("/bulk", response_model=Dict[str, Any])
+async def bulk_upsert_hcps(
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    db: Session = Depends(get_write_db_session),
+):
+    """Creates or updates HCPs by name from a CSV (with header) or NDJSON request body.
 
-@router.get("/", response_model=List[HCP])
-def read_hcps(skip: int = 0, limit: int = 100, db: Session = Depends(get_db_session)):
-    hcps = crud_hcp.get_hcps(db, skip=skip, limit=limit)
-    return hcps
+    Returns created/updated/duplicate/error counts and the outcome of every input row.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_MAX_BYTES) as upload:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > BULK_SPOOL_MAX_BYTES:
+                # Past the limit the file rolls over to disk; disk writes go off the event loop
+                await run_in_threadpool(upload.write, chunk)
+            else:
+                upload.write(chunk)
+        upload.seek(0)
+        return await run_in_threadpool(hcp_import.import_hcps, db, upload, format)
+
+@router.get("/", response_model=List[HCPFields], response_model_exclude_unset=True)
+def read_hcps(
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    db: Session = Depends(get_read_db_session),
+):
+    selected = parse_fields(fields, crud_hcp.HCP_FIELDS)
+    return crud_hcp.get_hcp_fields(db, selected, skip=skip, limit=limit)
 
 @router.get("/{hcp_id}", response_model=HCP)
-def read_hcp(hcp_id: int, db: Session = Depends(get_db_session)):
+def read_hcp(hcp_id: int, db: Session = Depends(get_read_db_session)):
     db_hcp = crud_hcp.get_hcp(db, hcp_id=hcp_id)
     if db_hcp is None:
         raise HTTPException(status_code=404, detail="HCP not found")
-    return db_hcp
\ No newline at end of file
+    return db_hcp
+
+@router.get("/{hcp_id}/interactions", response_model=List[InteractionFields], response_model_exclude_unset=True)
+def read_hcp_interactions(
+    hcp_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    db: Session = Depends(get_read_db_session),
+):
+    """Interaction history of one HCP, newest first, optionally limited to [from, to) and to ``fields``."""
+    selected = parse_fields(fields, crud_interaction.INTERACTION_FIELDS)
+    if crud_hcp.get_hcp(db, hcp_id=hcp_id) is None:
+        raise HTTPException(status_code=404, detail="HCP not found")
+    return crud_interaction.get_interaction_fields(db, selected, skip=skip, limit=limit, start=date_from, end=date_to, hcp_id=hcp_id)
+
+@router.get("/{hcp_id}/activity", response_model=HCPActivity)
+def read_hcp_activity(hcp_id: int, db: Session = Depends(get_read_db_session)):
+    """Interaction counts and latest interaction/follow-up for one HCP, from the hcp_activity rollup."""
+    activity = crud_hcp_activity.get_activity(db, hcp_id)
+    if activity is not None:
+        return activity
+    if crud_hcp.get_hcp(db, hcp_id=hcp_id) is None:
+        raise HTTPException(status_code=404, detail="HCP not found")
+    return HCPActivity(hcp_id=hcp_id)
+
+@router.get("/{hcp_id}/next-steps", response_model=HCPNextSteps)
+async def read_hcp_next_steps(
+    hcp_id: int,
+    limit: int = Query(settings.NEXT_STEPS_MAX_SUGGESTIONS, ge=1, le=10),
+    phrase: bool = Query(False, description="Have the LLM reword the suggestions"),
+    db: Session = Depends(get_read_db_session),
+):
+    """Ranked next steps for one HCP, computed from its precomputed activity features.
+
+    With ``phrase`` only the chosen suggestions are sent to the LLM for rewording; if it
+    is unavailable the local wording is returned (``phrased_by`` says which).
+    """
+    def suggest():
+        db_hcp = crud_hcp.get_hcp(db, hcp_id=hcp_id)
+        return None if db_hcp is None else next_step_engine.suggest(db, db_hcp, limit)
+
+    result = await run_in_threadpool(suggest)
+    if result is None:
+        raise HTTPException(status_code=404, detail="HCP not found")
+    if phrase:
+        agent = await load_agent()
+        deadline = asyncio.get_running_loop().time() + settings.NEXT_STEPS_PHRASING_TIMEOUT_SECONDS
+        result = await next_step_engine.phrase(result, agent.llm, deadline=deadline)
+    return result
@@ -1,53 +1,239 @@
 # backend/app/api/v1/endpoints/interactions.py
-from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from typing import List, Dict, Any, Literal, Optional
+from datetime import datetime
+from functools import partial
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.crud import interaction as crud_interaction, hcp as crud_hcp
-from app.schemas.interaction import Interaction, InteractionCreate, InteractionUpdate, InteractionCreateFromChat # Import InteractionUpdate
-from app.api.deps import get_db_session
-from app.services.ai_agent import process_chat_input
+from app.crud import interaction as crud_interaction, hcp as crud_hcp, idempotency as crud_idempotency
+from app.schemas.interaction import Interaction, InteractionCreate, InteractionUpdate, InteractionCreateFromChat, InteractionFields, AgentMessage # Import InteractionUpdate
+from app.api.deps import client_is_sticky, get_read_db_session, get_write_db_session
+from app.api.fields import parse_fields
+from app.api.idempotency import claim_or_replay, payload_hash
+from app.core.admission import chat_admission, Overloaded
+from app.core.coalescing import chat_coalescer
+from app.core.config import settings
+from app.core.database import SessionLocal, mark_client_sticky, new_write_session
+from app.services.agent_loader import load_agent
+from app.services import export as export_service
+from app.services.write_behind import interaction_write_buffer
 import asyncio
 
 router = APIRouter()
 
+# Idempotency-Key namespaces, one per endpoint
+CREATE_SCOPE = "interactions.create"
+CHAT_SCOPE = "interactions.chat"
+
+def _start_create(db: Session, interaction: InteractionCreate, idempotency_key: Optional[str]):
+    """Idempotency claim and HCP check; returns a stored response to replay, or None to go ahead."""
+    if idempotency_key:
+        # Hash only what the client sent; server-filled defaults (e.g. now()) differ per retry
+        request_hash = payload_hash(interaction.model_dump(mode="json", exclude_unset=True))
+        replay = claim_or_replay(db, CREATE_SCOPE, idempotency_key, request_hash)
+        if replay is not None:
+            return replay
+    try:
+        db_hcp = crud_hcp.get_hcp(db, interaction.hcp_id)
+        if not db_hcp:
+            raise HTTPException(status_code=404, detail="HCP not found")
+    except Exception:
+        if idempotency_key:
+            crud_idempotency.release_key(db, CREATE_SCOPE, idempotency_key)
+        raise
+    return None
+
+def _create_now(db: Session, interaction: InteractionCreate, idempotency_key: Optional[str]):
+    replay = _start_create(db, interaction, idempotency_key)
+    if replay is not None:
+        return replay
+    try:
+        db_interaction = crud_interaction.create_interaction(db=db, interaction=interaction)
+    except Exception:
+        if idempotency_key:
+            crud_idempotency.release_key(db, CREATE_SCOPE, idempotency_key)
+        raise
+    if idempotency_key:
+        body = Interaction.model_validate(db_interaction).model_dump(mode="json")
+        crud_idempotency.complete_key(db, CREATE_SCOPE, idempotency_key, 200, body)
+    return db_interaction
+
+async def _create_write_behind(db: Session, response: Response, interaction: InteractionCreate, idempotency_key: Optional[str]):
+    replay = await run_in_threadpool(_start_create, db, interaction, idempotency_key)
+    if replay is not None:
+        return replay
+    # Hand the connection back to the pool while waiting for the group commit
+    await run_in_threadpool(db.rollback)
+    try:
+        future = interaction_write_buffer.submit(interaction, (CREATE_SCOPE, idempotency_key) if idempotency_key else None)
+        body = await asyncio.wrap_future(future)
+    except Exception as e:
+        if idempotency_key:
+            await run_in_threadpool(crud_idempotency.release_key, db, CREATE_SCOPE, idempotency_key)
+        if isinstance(e, Overloaded):
+            raise HTTPException(status_code=503, detail=f"Interaction writes are backed up ({e.reason}). Please retry shortly.",
+                                headers={"Retry-After": str(e.retry_after)})
+        raise
+    mark_client_sticky(response)
+    return body
+
 @router.post("/", response_model=Interaction)
-def create_interaction(interaction: InteractionCreate, db: Session = Depends(get_db_session)):
-    db_hcp = crud_hcp.get_hcp(db, interaction.hcp_id)
-    if not db_hcp:
-        raise HTTPException(status_code=404, detail="HCP not found")
-    return crud_interaction.create_interaction(db=db, interaction=interaction)
+async def create_interaction(
+    interaction: InteractionCreate,
+    response: Response,
+    db: Session = Depends(get_write_db_session),
+    idempotency_key: Optional[str] = Header(None),
+):
+    """Logs one interaction. With WRITE_BEHIND_ENABLED the insert joins the next group commit
+    and the response is sent once that has committed."""
+    if interaction_write_buffer.running:
+        return await _create_write_behind(db, response, interaction, idempotency_key)
+    return await run_in_threadpool(_create_now, db, interaction, idempotency_key)
 
 @router.put("/{interaction_id}", response_model=Interaction) # New PUT endpoint
 def update_interaction(
     interaction_id: int,
     interaction_in: InteractionUpdate,
-    db: Session = Depends(get_db_session)
+    db: Session = Depends(get_write_db_session)
 ):
     db_interaction = crud_interaction.update_interaction(db, interaction_id, interaction_in)
     if not db_interaction:
         raise HTTPException(status_code=404, detail="Interaction not found")
     return db_interaction
 
+def _claim_chat_key(idempotency_key: str, request_hash: str):
+    with SessionLocal() as db:
+        return claim_or_replay(db, CHAT_SCOPE, idempotency_key, request_hash)
+
+def _finish_chat_key(idempotency_key: str, result: Optional[dict]):
+    with SessionLocal() as db:
+        # Only successes are replayed; a timed-out or failed attempt can simply be retried
+        if result is not None and result.get("status") == "success":
+            crud_idempotency.complete_key(db, CHAT_SCOPE, idempotency_key, 200, result)
+        else:
+            crud_idempotency.release_key(db, CHAT_SCOPE, idempotency_key)
+
+async def _run_chat_pipeline(chat_input: InteractionCreateFromChat, deadline: float, idempotency_key: Optional[str], request_hash: str):
+    """Runs the agent once; returns (result, whether it committed a write).
+
+    Coalesced callers share the return value, not a Response, so each one sets its
+    own read-your-writes cookie from the flag.
+    """
+    if idempotency_key:
+        replay = await run_in_threadpool(_claim_chat_key, idempotency_key, request_hash)
+        if replay is not None:
+            return replay, False
+    # Collects the read-your-writes cookie that the agent's commits set
+    writes = Response()
+    try:
+        async with chat_admission.admit(deadline):
+            agent = await load_agent()
+            result = await agent.process_chat_input(
+                chat_input.raw_text_input,
+                session_factory=partial(new_write_session, writes),
+                deadline=deadline,
+            )
+    except BaseException:
+        if idempotency_key:
+            await run_in_threadpool(_finish_chat_key, idempotency_key, None)
+        raise
+    if idempotency_key:
+        await run_in_threadpool(_finish_chat_key, idempotency_key, result)
+    return result, "set-cookie" in writes.headers
+
 @router.post("/chat", response_model=Dict[str, Any])
 async def create_interaction_from_chat(
     chat_input: InteractionCreateFromChat,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db_session)
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
 ):
+    # One budget for queueing and processing; the DB session is opened by the
+    # pipeline only after the LLM calls, so a queued or slow request holds none.
+    deadline = asyncio.get_running_loop().time() + settings.CHAT_TIMEOUT_SECONDS
+    # Concurrent requests with the same key and payload, or with no key but the same
+    # normalized payload, share a single pipeline run. The payload is part of a keyed
+    # coalescing key too, so a reused key with another payload still gets its 422.
+    request_hash = payload_hash(chat_input.model_dump())
+    coalescing_key = f"key:{idempotency_key}:{request_hash}" if idempotency_key else f"payload:{request_hash}"
     try:
-        response = await process_chat_input(db, chat_input.raw_text_input)
-        return response
+        result, wrote = await chat_coalescer.run(
+            coalescing_key,
+            partial(_run_chat_pipeline, chat_input, deadline, idempotency_key, request_hash),
+        )
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Chat service is busy ({e.reason}). Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI agent error: {str(e)}")
+    if wrote:
+        mark_client_sticky(response)
+    return result
+
+@router.post("/agent", response_model=Dict[str, Any])
+async def run_interaction_agent(message: AgentMessage, response: Response):
+    """Runs the tool-calling agent on a free-form message (log, edit, look up an HCP's
+    history or next steps), under AGENT_MAX_STEPS and AGENT_TIMEOUT_SECONDS; the result
+    includes the run's usage."""
+    # Event-loop time is time.monotonic(), which the agent's deadline uses too
+    deadline = asyncio.get_running_loop().time() + settings.AGENT_TIMEOUT_SECONDS
+    try:
+        async with chat_admission.admit(deadline):
+            agent = await load_agent()
+            return await run_in_threadpool(
+                agent.run_agent, message.message, partial(new_write_session, response), deadline,
+            )
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Chat service is busy ({e.reason}). Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
 
+@router.get("/", response_model=List[InteractionFields], response_model_exclude_unset=True)
+def read_interactions(
+    skip: int = 0,
+    limit: int = 100,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,hcp_id,occurred_at,hcp_sentiment"),
+    db: Session = Depends(get_read_db_session),
+):
+    """Newest first by occurred_at; ``from`` is inclusive, ``to`` exclusive. Naive values use INTERACTION_TIMEZONE.
 
-@router.get("/", response_model=List[Interaction])
-def read_interactions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db_session)):
-    interactions = db.query(Interaction).offset(skip).limit(limit).all()
-    return interactions
+    Only the requested ``fields`` are selected; interaction_text is joined only when a text field is among them.
+    """
+    selected = parse_fields(fields, crud_interaction.INTERACTION_FIELDS)
+    return crud_interaction.get_interaction_fields(db, selected, skip=skip, limit=limit, start=date_from, end=date_to)
+
+@router.get("/export")
+def export_interactions(
+    request: Request,
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    hcp_id: Optional[int] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+):
+    """Streams every matching interaction from a server-side cursor."""
+    if format == "parquet" and not export_service.parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow to be installed")
+    rows = export_service.EXPORTERS[format](hcp_id=hcp_id, start=date_from, end=date_to,
+                                            use_primary=client_is_sticky(request))
+    return StreamingResponse(
+        rows,
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="interactions.{format}"'},
+    )
 
 @router.get("/{interaction_id}", response_model=Interaction)
-def read_interaction(interaction_id: int, db: Session = Depends(get_db_session)):
+def read_interaction(interaction_id: int, db: Session = Depends(get_read_db_session)):
     db_interaction = crud_interaction.get_interaction(db, interaction_id=interaction_id)
     if db_interaction is None:
         raise HTTPException(status_code=404, detail="Interaction not found")
@@ -0,0 +1,23 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from app.core.profiling import profiling_control, token_matches
+from app.schemas.profiling import ProfilingState, ProfilingUpdate
+
+router = APIRouter()
+
+def require_profiling_token(x_profiling_token: Optional[str] = Header(None)):
+    if not token_matches(x_profiling_token):
+        raise HTTPException(status_code=403, detail="A valid X-Profiling-Token header is required")
+
+@router.get("/", response_model=ProfilingState, dependencies=[Depends(require_profiling_token)])
+def read_profiling():
+    return profiling_control.state()
+
+@router.put("/", response_model=ProfilingState, dependencies=[Depends(require_profiling_token)])
+def update_profiling(update: ProfilingUpdate):
+    """Changes which requests are profiled in this process; takes effect on the next request.
+
+    A single request can also be profiled by sending the admin token in an X-Profile header.
+    """
+    profiling_control.update(**update.model_dump(exclude_unset=True))
+    return profiling_control.state()
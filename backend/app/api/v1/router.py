@@ -1,7 +1,10 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import hcps, interactions
+from app.api.v1.endpoints import analytics, events, hcps, interactions, profiling
 
 api_router = APIRouter()
 api_router.include_router(hcps.router, prefix="/hcps", tags=["hcps"])
-api_router.include_router(interactions.router, prefix="/interactions", tags=["interactions"])
\ No newline at end of file
+api_router.include_router(interactions.router, prefix="/interactions", tags=["interactions"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(profiling.router, prefix="/profiling", tags=["profiling"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
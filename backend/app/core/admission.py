@@ -0,0 +1,83 @@
+# backend/app/core/admission.py
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.core.config import settings
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounds concurrent work and sheds load once a short wait queue is full.
+
+    Up to ``max_in_flight`` requests run at once; up to ``max_queue`` more wait at most
+    ``queue_timeout`` seconds (or until their deadline, if sooner) for a slot. Anything
+    beyond that is rejected immediately so callers can answer 503 without holding resources.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float, retry_after: int):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted_total = 0
+        self.shed_queue_full_total = 0
+        self.shed_queue_timeout_total = 0
+
+    @asynccontextmanager
+    async def admit(self, deadline: float):
+        """Holds a slot for the body of the ``async with``; ``deadline`` is an event-loop time."""
+        if self._slots.locked():
+            if self.waiting >= self.max_queue:
+                self.shed_queue_full_total += 1
+                raise Overloaded("queue full", self.retry_after)
+            self.waiting += 1
+            try:
+                budget = min(self.queue_timeout, deadline - asyncio.get_running_loop().time())
+                await asyncio.wait_for(self._slots.acquire(), timeout=max(budget, 0))
+            except asyncio.TimeoutError:
+                self.shed_queue_timeout_total += 1
+                raise Overloaded("queue timeout", self.retry_after)
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+
+        self.in_flight += 1
+        self.admitted_total += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def metrics(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "admitted_total": self.admitted_total,
+            "shed_queue_full_total": self.shed_queue_full_total,
+            "shed_queue_timeout_total": self.shed_queue_timeout_total,
+        }
+
+
+chat_admission = AdmissionController(
+    max_in_flight=settings.CHAT_MAX_IN_FLIGHT,
+    max_queue=settings.CHAT_MAX_QUEUE,
+    queue_timeout=settings.CHAT_QUEUE_TIMEOUT_SECONDS,
+    retry_after=settings.CHAT_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,40 @@
+# backend/app/core/coalescing.py
+
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+
+class InFlightCoalescer:
+    """Lets concurrent callers with the same key share one execution.
+
+    The first caller for a key starts the work; anyone arriving while it runs awaits
+    the same result (or exception). A caller that is cancelled does not cancel the
+    shared work for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.executions_total = 0
+        self.coalesced_total = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable]):
+        shared = self._in_flight.get(key)
+        if shared is not None:
+            self.coalesced_total += 1
+            return await asyncio.shield(shared)
+
+        self.executions_total += 1
+        shared = asyncio.ensure_future(factory())
+        self._in_flight[key] = shared
+        shared.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(shared)
+
+    def metrics(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "executions_total": self.executions_total,
+            "coalesced_total": self.coalesced_total,
+        }
+
+
+chat_coalescer = InFlightCoalescer()
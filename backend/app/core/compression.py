@@ -0,0 +1,185 @@
+# backend/app/core/compression.py
+#
+# Negotiated gzip/brotli response compression. Brotli is offered only when the optional
+# `brotli` package is installed; clients that accept neither get the body unchanged.
+
+import importlib.util
+import zlib
+from typing import Dict, Iterable, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+# Already compressed, or streamed events that must not sit in a compressor's buffer
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "application/vnd.apache.parquet",
+    "application/gzip",
+    "application/zip",
+    "image/",
+    "audio/",
+    "video/",
+)
+
+# Compressing bodies at least this large is moved off the event loop
+THREAD_MINIMUM_BYTES = 128 * 1024
+
+
+def brotli_available() -> bool:
+    return importlib.util.find_spec("brotli") is not None
+
+
+class GzipEncoder:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliEncoder:
+    encoding = "br"
+
+    def __init__(self, quality: int):
+        import brotli
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class CompressionStats:
+    def __init__(self):
+        self.compressed_total: Dict[str, int] = {}
+        self.bytes_in_total = 0
+        self.bytes_out_total = 0
+
+    def metrics(self) -> dict:
+        return {
+            "encodings": ["br", "gzip"] if brotli_available() else ["gzip"],
+            "compressed_total": dict(self.compressed_total),
+            "bytes_in_total": self.bytes_in_total,
+            "bytes_out_total": self.bytes_out_total,
+        }
+
+
+# Shared by every CompressionMiddleware instance so /metrics can report it
+compression_stats = CompressionStats()
+
+
+def negotiate(accept_encoding: str, supported: Iterable[str]) -> Optional[str]:
+    """Picks the supported encoding with the highest q-value in ``accept_encoding``.
+
+    Ties go to the order of ``supported``; ``*`` matches any encoding not listed explicitly.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses of at least ``minimum_size`` bytes.
+
+    Streaming responses are compressed chunk by chunk with a flush after each chunk, so
+    rows reach the client as they are produced. Responses that already carry a
+    Content-Encoding, partial content and excluded media types pass through unchanged.
+    """
+
+    def __init__(self, app, minimum_size: int, gzip_level: int, brotli_quality: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ("br", "gzip") if brotli_available() else ("gzip",)
+
+    def _encoder(self, encoding: str):
+        if encoding == "br":
+            return BrotliEncoder(self.brotli_quality)
+        return GzipEncoder(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        start_message = None
+        passthrough = False
+        encoder = None
+
+        async def compress(body: bytes, final: bool) -> bytes:
+            compression_stats.bytes_in_total += len(body)
+            if len(body) >= THREAD_MINIMUM_BYTES:
+                output = await run_in_threadpool(encoder.compress, body, final)
+            else:
+                output = encoder.compress(body, final)
+            compression_stats.bytes_out_total += len(output)
+            return output
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough, encoder
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                media_type = headers.get("content-type", "").lower()
+                passthrough = (
+                    "content-encoding" in headers
+                    or message["status"] in (204, 206, 304)
+                    or media_type.startswith(EXCLUDED_CONTENT_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether to compress
+                    start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is None:
+                # Later chunks of a response that is being compressed
+                message["body"] = await compress(body, not more_body)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is None or (len(body) < self.minimum_size and not more_body):
+                passthrough = True
+            else:
+                encoder = self._encoder(encoding)
+                compression_stats.compressed_total[encoding] = compression_stats.compressed_total.get(encoding, 0) + 1
+                message["body"] = await compress(body, not more_body)
+                headers["Content-Encoding"] = encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(message["body"]))
+            await send(start_message)
+            start_message = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
@@ -7,6 +7,132 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     GROQ_API_KEY: str
 
+    # Comma-separated read-replica URLs; reads fall back to DATABASE_URL when empty
+    DATABASE_REPLICA_URLS: str = ""
+    # How long a client keeps reading from the primary after one of its writes commits
+    READ_YOUR_WRITES_SECONDS: int = 5
+
+    # Monthly interaction partitions kept ahead of today, and the age at which they are archived
+    INTERACTION_PARTITION_MONTHS_AHEAD: int = 3
+    INTERACTION_ARCHIVE_AFTER_MONTHS: int = 24
+    INTERACTION_ARCHIVE_DIR: str = "archive/interactions"
+    # Timezone of the local interaction_date/interaction_time fields; occurred_at is derived from them
+    INTERACTION_TIMEZONE: str = "UTC"
+
+    # Admission control for /interactions/chat: concurrent pipelines, queued requests,
+    # how long a request may wait for a slot, and the overall per-request budget
+    CHAT_MAX_IN_FLIGHT: int = 8
+    CHAT_MAX_QUEUE: int = 16
+    CHAT_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    CHAT_TIMEOUT_SECONDS: float = 30.0
+    CHAT_RETRY_AFTER_SECONDS: int = 5
+
+    # LLM resilience: hedge a call once it is slower than this latency quantile, retry
+    # failures with jittered backoff, and trip the breaker when the error rate spikes
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_QUANTILE: float = 0.95
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = 5.0
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.25
+    LLM_BREAKER_WINDOW: int = 20
+    LLM_BREAKER_MIN_CALLS: int = 10
+    LLM_BREAKER_ERROR_RATE: float = 0.5
+    LLM_BREAKER_COOLDOWN_SECONDS: float = 30.0
+
+    # Import the LLM agent in the background at startup instead of on the first chat request
+    AGENT_WARMUP_ON_STARTUP: bool = True
+
+    # Local extractor trained from past chat interactions (python -m app.jobs.train_extractor).
+    # Chats it handles with at least this confidence skip the LLM extraction call; an empty
+    # version loads the newest model under the directory
+    LOCAL_EXTRACTOR_ENABLED: bool = True
+    LOCAL_EXTRACTOR_DIR: str = "models/extractor"
+    LOCAL_EXTRACTOR_VERSION: str = ""
+    LOCAL_EXTRACTOR_MIN_CONFIDENCE: float = 0.9
+
+    # Approximate token budget for the messages sent on each agent (LangGraph) turn
+    AGENT_HISTORY_TOKEN_BUDGET: int = 2000
+    # Limits for one agent run: model turns, and the time budget shared by all of its LLM and tool calls
+    AGENT_MAX_STEPS: int = 5
+    AGENT_TIMEOUT_SECONDS: float = 30.0
+
+    # Next-step suggestions (GET /hcps/{id}/next-steps, suggest_next_steps agent tool): contact
+    # cadence assumed until an HCP has history, suggestions returned, HCPs cached per process,
+    # and the time allowed for the optional LLM rewording
+    NEXT_STEPS_DEFAULT_CADENCE_DAYS: int = 30
+    NEXT_STEPS_MAX_SUGGESTIONS: int = 3
+    NEXT_STEPS_CACHE_SIZE: int = 1000
+    NEXT_STEPS_PHRASING_TIMEOUT_SECONDS: float = 10.0
+
+    # Rolling per-HCP history summaries behind the agent's fetch_interaction_history tool:
+    # digests kept verbatim after compaction, pending digests that make an HCP due for
+    # `python -m app.jobs.hcp_summaries compact`, digests merged per LLM call, and sizes
+    # (characters) of the summary, of each digest field and of the context block
+    HCP_SUMMARY_KEEP_RECENT: int = 5
+    HCP_SUMMARY_COMPACT_AFTER: int = 10
+    HCP_SUMMARY_CHUNK_SIZE: int = 20
+    HCP_SUMMARY_MAX_CHARS: int = 1200
+    HCP_SUMMARY_FIELD_CHARS: int = 80
+    HCP_SUMMARY_CONTEXT_CHARS: int = 2400
+    HCP_SUMMARY_LLM_TIMEOUT_SECONDS: float = 30.0
+
+    # How long a stored Idempotency-Key response is replayed before the key can be reused
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    # A claim still pending after this long belongs to a request that died (crash, kill,
+    # lost write-behind queue); a retry with the same key takes it over instead of getting
+    # 409. Keep it above CHAT_TIMEOUT_SECONDS plus a write-behind flush.
+    IDEMPOTENCY_CLAIM_LEASE_SECONDS: float = 120.0
+
+    # Rows per INSERT ... ON CONFLICT statement (and per transaction) in POST /hcps/bulk
+    HCP_BULK_CHUNK_SIZE: int = 1000
+
+    # Rows fetched per round-trip when streaming interaction exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Compress responses of at least this many bytes with gzip or, when the brotli package
+    # is installed, brotli; levels favour CPU over ratio since every body is compressed live
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024
+    RESPONSE_GZIP_LEVEL: int = 6
+    RESPONSE_BROTLI_QUALITY: int = 5
+
+    # Request profiling (pyinstrument flamegraphs plus SQL timings), sampled across requests,
+    # optionally only under the comma-separated path prefixes. Changeable at runtime through
+    # /profiling; both that endpoint and the per-request X-Profile header need the admin
+    # token and are disabled while it is empty
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.01
+    PROFILING_PATHS: str = ""
+    PROFILING_INTERVAL_SECONDS: float = 0.001
+    PROFILING_OUTPUT_DIR: str = "profiles"
+    PROFILING_MAX_PROFILES: int = 200
+    PROFILING_ADMIN_TOKEN: str = ""
+
+    # Live change events (/events). "memory" fans out to the clients of this process only;
+    # "redis" publishes through a Redis channel so every worker sees every write. A client
+    # that falls this many events behind is sent a resync event instead
+    EVENTS_BACKEND: str = "memory"
+    EVENTS_REDIS_URL: str = "redis://localhost:6379/0"
+    EVENTS_REDIS_CHANNEL: str = "hcp_crm:events"
+    EVENTS_SUBSCRIBER_QUEUE_SIZE: int = 256
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+
+    # Write-behind for POST /interactions/: creates queue in memory and are inserted in group
+    # commits of up to WRITE_BEHIND_MAX_BATCH rows, at most WRITE_BEHIND_FLUSH_INTERVAL_MS
+    # after the first one queued. Callers still get their id only after the commit. Durability
+    # "commit" waits for the WAL flush as today; "async" sets synchronous_commit=off, so a
+    # database crash can lose the last moments of acknowledged writes (see services/write_behind.py)
+    WRITE_BEHIND_ENABLED: bool = False
+    WRITE_BEHIND_MAX_BATCH: int = 200
+    WRITE_BEHIND_FLUSH_INTERVAL_MS: float = 10.0
+    WRITE_BEHIND_MAX_PENDING: int = 5000
+    WRITE_BEHIND_DURABILITY: str = "commit"
+    WRITE_BEHIND_RETRY_AFTER_SECONDS: int = 1
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+    @property
+    def replica_urls(self) -> list[str]:
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
 settings = Settings()
\ No newline at end of file
@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+import itertools
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
 
@@ -16,6 +18,35 @@ except Exception as e:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replicas are tried round-robin; with none configured every read goes to the primary
+replica_engines = [create_engine(url) for url in settings.replica_urls]
+print(f"DEBUG: database.py - Configured {len(replica_engines)} read replica(s).")
+_read_engines = itertools.cycle(replica_engines or [engine])
+
+# Cookie marking a client that has just written and must read from the primary until it expires
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+
+def next_read_engine():
+    return next(_read_engines)
+
+
+def mark_client_sticky(response):
+    """Pins the writing client to the primary so its next reads see the commit."""
+    response.set_cookie(
+        READ_YOUR_WRITES_COOKIE,
+        str(time.time() + settings.READ_YOUR_WRITES_SECONDS),
+        max_age=settings.READ_YOUR_WRITES_SECONDS,
+        httponly=True,
+    )
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _mark_client_sticky(session):
+    response = session.info.get("response")
+    if response is not None:
+        mark_client_sticky(response)
+
 Base = declarative_base()
 
 
@@ -24,4 +55,28 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def new_write_session(response=None):
+    """Primary session; commits mark the client (via ``response``) for read-your-writes."""
+    db = SessionLocal()
+    db.info["response"] = response
+    return db
+
+
+def get_write_db(response=None):
+    db = new_write_session(response)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(use_primary: bool = False):
+    """Session on the next read replica, or on the primary when ``use_primary`` is set."""
+    db = SessionLocal(bind=engine if use_primary else next_read_engine())
+    try:
+        yield db
+    finally:
+        db.close()
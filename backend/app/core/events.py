@@ -0,0 +1,191 @@
+# backend/app/core/events.py
+#
+# Change events for live clients (/events). CRUD functions queue an event on their session
+# with queue_event(); it is published only after that session commits and dropped if it
+# rolls back, so clients never see a write that did not happen. Publishing goes through
+# event_broker, which fans out to the subscribers of this process or, with
+# EVENTS_BACKEND=redis, through a Redis channel that every worker listens on.
+
+import asyncio
+import importlib.util
+import itertools
+import json
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+TOPICS = ("hcps", "interactions")
+RESYNC = {"type": "resync", "topic": None, "data": None}
+_PENDING_KEY = "pending_events"
+
+
+def redis_available() -> bool:
+    return importlib.util.find_spec("redis") is not None
+
+
+def queue_event(db: Session, event_type: str, data: dict):
+    """Publishes ``{"type": event_type, "data": data}`` once ``db`` commits.
+
+    The topic comes from the type ("hcp.created" -> "hcps"). ``data`` must already be
+    JSON-ready: the session's objects are expired by the time the event goes out.
+    """
+    topic = event_type.split(".", 1)[0] + "s"
+    db.info.setdefault(_PENDING_KEY, []).append({"type": event_type, "topic": topic, "data": data})
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    for pending in session.info.pop(_PENDING_KEY, ()):
+        event_broker.publish(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+class Subscription:
+    """One connected client: the topics it wants and a bounded queue of events for it."""
+
+    def __init__(self, topics: Set[str], queue_size: int):
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def put(self, item: dict) -> bool:
+        """Queues ``item``; a full queue is replaced by a single resync event. False on overflow."""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            return False
+
+
+class EventBroker:
+    """Fans events out to subscriptions on the event loop; publish() is safe from any thread.
+
+    A client that cannot keep up (a full queue) loses its backlog and gets one resync
+    event, telling it to reload instead of patching; bulk imports end up this way too.
+    """
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscriptions: Set[Subscription] = set()
+        self._sequence = itertools.count(1)
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+        self._publishing: Set[asyncio.Task] = set()
+        self.published_total = 0
+        self.delivered_total = 0
+        self.resync_total = 0
+        self.malformed_total = 0
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self._redis is not None else "memory"
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        if settings.EVENTS_BACKEND != "redis":
+            return
+        if not redis_available():
+            print("WARNING: events.py - EVENTS_BACKEND=redis but the redis package is not installed; events stay in this process.")
+            return
+        import redis.asyncio as redis
+        self._redis = redis.from_url(settings.EVENTS_REDIS_URL)
+        self._listener = asyncio.create_task(self._listen())
+        print(f"DEBUG: events.py - Publishing events through Redis channel '{settings.EVENTS_REDIS_CHANNEL}'.")
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        self.loop = None
+
+    async def _listen(self):
+        from redis.exceptions import RedisError
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(settings.EVENTS_REDIS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        try:
+                            item = json.loads(message["data"])
+                        except (ValueError, TypeError) as e:
+                            item = e
+                        if not isinstance(item, dict) or "topic" not in item:
+                            # One bad payload must not end the listener for everyone
+                            self.malformed_total += 1
+                            print(f"WARNING: events.py - Skipping malformed event on '{settings.EVENTS_REDIS_CHANNEL}': {str(message['data'])[:200]}")
+                            continue
+                        self._fan_out(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                reason = "Redis subscription lost" if isinstance(e, RedisError) else f"Event listener failed ({type(e).__name__})"
+                print(f"ERROR: events.py - {reason} ({e}); clients will resync.")
+                # Whatever was published meanwhile is gone, so every client has to reload
+                for subscription in list(self._subscriptions):
+                    subscription.put(RESYNC)
+                await asyncio.sleep(1.0)
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        subscription = Subscription(set(topics), settings.EVENTS_SUBSCRIBER_QUEUE_SIZE)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+
+    def publish(self, item: dict):
+        # Nothing can be subscribed before start(), e.g. in jobs and scripts
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.published_total += 1
+        self.loop.call_soon_threadsafe(self._dispatch, item)
+
+    def _dispatch(self, item: dict):
+        if self._redis is None:
+            self._fan_out(item)
+            return
+        task = self.loop.create_task(self._redis.publish(settings.EVENTS_REDIS_CHANNEL, json.dumps(item)))
+        self._publishing.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Task):
+        self._publishing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"ERROR: events.py - Could not publish event to Redis: {task.exception()}")
+
+    def _fan_out(self, item: dict):
+        item = {"id": next(self._sequence), **item}
+        for subscription in list(self._subscriptions):
+            if item["topic"] not in subscription.topics:
+                continue
+            if subscription.put(item):
+                self.delivered_total += 1
+            else:
+                self.resync_total += 1
+
+    def metrics(self) -> dict:
+        return {
+            "backend": self.backend,
+            "subscribers": len(self._subscriptions),
+            "published_total": self.published_total,
+            "malformed_total": self.malformed_total,
+            "delivered_total": self.delivered_total,
+            "resync_total": self.resync_total,
+        }
+
+
+event_broker = EventBroker()
@@ -0,0 +1,188 @@
+# backend/app/core/partitions.py
+#
+# Monthly range partitions of the `interactions` table (PostgreSQL only).
+# Every helper is a no-op on other dialects. Note that the composite (id, interaction_date)
+# primary key means the interactions table can no longer be created on SQLite.
+
+import gzip
+import os
+import re
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+
+PARENT_TABLE = "interactions"
+TEXT_TABLE = "interaction_text"
+DEFAULT_PARTITION = "interactions_default"
+_PARTITION_NAME = re.compile(r"^interactions_(\d{4})_(\d{2})$")
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_{month.year:04d}_{month.month:02d}"
+
+
+def _is_postgres(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+        "WHERE parent.relname = :parent ORDER BY child.relname"
+    ), {"parent": PARENT_TABLE})
+    return [row[0] for row in rows]
+
+
+def is_partitioned(conn: Connection) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON p.partrelid = c.oid "
+        "WHERE c.relname = :parent"
+    ), {"parent": PARENT_TABLE}).scalar() is not None
+
+
+def _month_bounds(month: date) -> str:
+    return f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+
+
+def create_month_partition(conn: Connection, month: date):
+    """Creates the partition for ``month`` unless it exists.
+
+    PostgreSQL refuses the new partition while the default partition holds rows in its
+    range (e.g. an interaction dated further ahead than INTERACTION_PARTITION_MONTHS_AHEAD
+    when it was logged). Those rows are moved into it in the same transaction: detach the
+    default partition, create the month, move the rows, re-attach the default.
+    """
+    name = partition_name(month)
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return name
+    in_range = "interaction_date >= :start AND interaction_date < :end"
+    params = {"start": month, "end": add_months(month, 1)}
+    stray = conn.execute(text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range} LIMIT 1"), params).scalar()
+    if stray is None:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} FOR VALUES {_month_bounds(month)}"))
+        return name
+
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} FOR VALUES {_month_bounds(month)}"))
+    moved = conn.execute(text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}"), params).rowcount
+    conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), params)
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    print(f"DEBUG: partitions.py - Moved {moved} row(s) from {DEFAULT_PARTITION} into the new partition {name}.")
+    return name
+
+
+def ensure_interaction_partitions(bind: Engine, start: Optional[date] = None, months_ahead: Optional[int] = None):
+    """Creates monthly partitions from ``start`` (default: this month) through ``months_ahead`` months out.
+
+    Rows whose date falls outside every monthly partition land in the default partition.
+    """
+    if not _is_postgres(bind):
+        return []
+    months_ahead = settings.INTERACTION_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    first = month_start(start or datetime.now())
+    last = add_months(month_start(datetime.now()), months_ahead)
+
+    created = []
+    with bind.begin() as conn:
+        if not is_partitioned(conn):
+            print(f"WARNING: partitions.py - '{PARENT_TABLE}' is not partitioned; run 'alembic upgrade head'.")
+            return []
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+        month = first
+        while month <= last:
+            created.append(create_month_partition(conn, month))
+            month = add_months(month, 1)
+    return created
+
+
+def _partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def cold_partitions(conn: Connection, older_than_months: int) -> List[str]:
+    cutoff = add_months(month_start(datetime.now()), -older_than_months)
+    return [name for name in list_partitions(conn) if (_partition_month(name) or cutoff) < cutoff]
+
+
+def detached_partitions(conn: Connection) -> List[str]:
+    """Monthly tables no longer attached to interactions: an archive run stopped after detaching them."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_class c "
+        "WHERE c.relkind = 'r' AND c.relname ~ '^interactions_[0-9]{4}_[0-9]{2}$' AND pg_table_is_visible(c.oid) "
+        "AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid) ORDER BY c.relname"
+    ))
+    return [row[0] for row in rows]
+
+
+def _copy_to_gzip(bind: Engine, query: str, path: str):
+    raw = bind.raw_connection()
+    try:
+        with open(path, "wb") as archive_file:
+            with gzip.GzipFile(fileobj=archive_file, mode="wb") as compressed:
+                cursor = raw.cursor()
+                cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", compressed)
+                cursor.close()
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
+    finally:
+        raw.close()
+
+
+def archive_cold_partitions(bind: Engine, older_than_months: Optional[int] = None, archive_dir: Optional[str] = None):
+    """Moves partitions older than ``older_than_months`` to gzip-compressed CSV files.
+
+    Each partition is detached, copied out with COPY (its interaction_text rows to a
+    second file), fsynced, and only then dropped. If the copy fails the partition is
+    attached again; a table left detached by a crash is picked up by the next run.
+    """
+    if not _is_postgres(bind):
+        return []
+    older_than_months = settings.INTERACTION_ARCHIVE_AFTER_MONTHS if older_than_months is None else older_than_months
+    archive_dir = archive_dir or settings.INTERACTION_ARCHIVE_DIR
+    os.makedirs(archive_dir, exist_ok=True)
+
+    with bind.connect() as conn:
+        leftovers = detached_partitions(conn)
+        names = leftovers + cold_partitions(conn, older_than_months)
+
+    archived = []
+    for name in names:
+        path = os.path.join(archive_dir, f"{name}.csv.gz")
+        text_path = os.path.join(archive_dir, f"{name}_text.csv.gz")
+        if name not in leftovers:
+            with bind.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+
+        try:
+            _copy_to_gzip(bind, f"SELECT * FROM {name}", path)
+            _copy_to_gzip(bind, f"SELECT t.* FROM {TEXT_TABLE} t JOIN {name} p ON p.id = t.interaction_id", text_path)
+        except Exception as e:
+            print(f"ERROR: partitions.py - Archiving {name} failed ({e}); attaching it again.")
+            with bind.begin() as conn:
+                conn.execute(text(
+                    f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES {_month_bounds(_partition_month(name))}"
+                ))
+            raise
+
+        with bind.begin() as conn:
+            conn.execute(text(f"DELETE FROM {TEXT_TABLE} t USING {name} p WHERE t.interaction_id = p.id"))
+            conn.execute(text(f"DROP TABLE {name}"))
+        print(f"DEBUG: partitions.py - Archived {name} to {path}")
+        archived.append(path)
+    return archived
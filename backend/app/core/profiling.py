@@ -0,0 +1,239 @@
+# backend/app/core/profiling.py
+#
+# Opt-in request profiling. A sampled fraction of requests (optionally only under some
+# path prefixes), or any request carrying a valid X-Profile header, runs under the
+# pyinstrument sampling profiler and has every SQL statement timed. Each profiled
+# request writes a speedscope flamegraph and a JSON summary to PROFILING_OUTPUT_DIR.
+# The switches live in memory so they can be changed through /profiling without a
+# redeploy; with several workers each process keeps its own.
+
+import contextvars
+import hmac
+import importlib.util
+import json
+import os
+import random
+import re
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+PROFILE_HEADER = "x-profile"
+
+# Long-lived event streams would keep a profiler running for the whole connection
+EXCLUDED_PATHS = (f"{settings.API_V1_STR}/events",)
+
+_current_profile = contextvars.ContextVar("current_profile", default=None)
+
+
+def pyinstrument_available() -> bool:
+    return importlib.util.find_spec("pyinstrument") is not None
+
+
+def token_matches(token: Optional[str]) -> bool:
+    """True when ``token`` equals PROFILING_ADMIN_TOKEN; always False while no token is configured."""
+    if not settings.PROFILING_ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.PROFILING_ADMIN_TOKEN.encode())
+
+
+class ProfilingControl:
+    """Runtime switches deciding which requests are profiled, plus recent profile files."""
+
+    def __init__(self):
+        self.enabled = settings.PROFILING_ENABLED
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.paths = [path.strip() for path in settings.PROFILING_PATHS.split(",") if path.strip()]
+        self.profiled_total = 0
+        self.recent = deque(maxlen=20)
+
+    def should_profile(self, path: str, header_token: Optional[str]) -> bool:
+        if path.startswith(EXCLUDED_PATHS):
+            return False
+        if header_token is not None and token_matches(header_token):
+            return True
+        if not self.enabled or self.sample_rate <= 0:
+            return False
+        if self.paths and not path.startswith(tuple(self.paths)):
+            return False
+        return random.random() < self.sample_rate
+
+    def update(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None, paths: Optional[List[str]] = None):
+        if enabled is not None:
+            self.enabled = enabled
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if paths is not None:
+            self.paths = paths
+        print(f"DEBUG: profiling.py - Profiling enabled={self.enabled} sample_rate={self.sample_rate} paths={self.paths}")
+
+    def state(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "paths": list(self.paths),
+            "profiler": "pyinstrument" if pyinstrument_available() else None,
+            "output_dir": settings.PROFILING_OUTPUT_DIR,
+            "profiled_total": self.profiled_total,
+            "recent": list(self.recent),
+        }
+
+
+profiling_control = ProfilingControl()
+
+
+class RequestProfile:
+    """SQL statement counts and durations collected for one profiled request."""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.status_code = None
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.statements = {} # statement -> [count, seconds]
+
+    def record_sql(self, statement: str, seconds: float):
+        self.sql_count += 1
+        self.sql_seconds += seconds
+        entry = self.statements.setdefault(statement, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def server_timing(self) -> str:
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        return f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.sql_count} queries", app;dur={elapsed_ms:.1f}'
+
+    def summary(self, top: int = 20) -> dict:
+        statements = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 2),
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql_seconds * 1000, 2),
+            "statements": [
+                {"statement": statement, "count": count, "total_ms": round(seconds * 1000, 2)}
+                for statement, (count, seconds) in statements
+            ],
+        }
+
+
+# Registered on the Engine class so the primary and every read replica are covered.
+# The profile travels in a context variable, which Starlette copies into the threadpool
+# that runs sync endpoints, so their queries are attributed to the right request.
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None and context is not None:
+        context._profiling_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = getattr(context, "_profiling_started", None)
+    if profile is not None and started is not None:
+        profile.record_sql(statement, time.perf_counter() - started)
+
+
+def _file_stem(profile: RequestProfile) -> str:
+    route = re.sub(r"[^A-Za-z0-9]+", "_", profile.path).strip("_") or "root"
+    return f"{profile.started_at:%Y%m%dT%H%M%S}_{profile.method}_{route}_{profile.id}"
+
+
+def _prune(output_dir: str, keep: int):
+    files = sorted(
+        (entry for entry in os.scandir(output_dir) if entry.is_file()),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in files[:max(0, len(files) - keep)]:
+        os.remove(entry.path)
+
+
+def write_profile(profile: RequestProfile, session) -> List[str]:
+    """Writes ``<stem>.speedscope.json`` (when a profiler ran) and ``<stem>.json``; returns the paths."""
+    os.makedirs(settings.PROFILING_OUTPUT_DIR, exist_ok=True)
+    stem = os.path.join(settings.PROFILING_OUTPUT_DIR, _file_stem(profile))
+    paths = []
+    if session is not None:
+        from pyinstrument.renderers import SpeedscopeRenderer
+        with open(f"{stem}.speedscope.json", "w") as speedscope_file:
+            speedscope_file.write(SpeedscopeRenderer().render(session))
+        paths.append(f"{stem}.speedscope.json")
+    with open(f"{stem}.json", "w") as summary_file:
+        json.dump(profile.summary(), summary_file, indent=2)
+    paths.append(f"{stem}.json")
+    # Up to two files per profile
+    _prune(settings.PROFILING_OUTPUT_DIR, settings.PROFILING_MAX_PROFILES * 2)
+    return paths
+
+
+class ProfilingMiddleware:
+    """Profiles the requests ``profiling_control`` selects; everything else passes straight through.
+
+    Profiled responses carry X-Profile-Id and a Server-Timing header with SQL time so far.
+    pyinstrument follows the request's coroutines on the event loop; a sync endpoint's
+    own Python frames run in the threadpool and show up as time awaiting it, while its
+    SQL is still listed in the summary.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        if not pyinstrument_available():
+            print("WARNING: profiling.py - pyinstrument is not installed; profiles will only contain SQL timings.")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header_token = Headers(scope=scope).get(PROFILE_HEADER)
+        if not profiling_control.should_profile(scope["path"], header_token):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = _current_profile.set(profile)
+
+        async def send_with_profile_headers(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                headers = MutableHeaders(raw=message["headers"])
+                headers["X-Profile-Id"] = profile.id
+                headers.append("Server-Timing", profile.server_timing())
+            await send(message)
+
+        profiler = None
+        if pyinstrument_available():
+            from pyinstrument import Profiler
+            profiler = Profiler(interval=settings.PROFILING_INTERVAL_SECONDS, async_mode="enabled")
+            profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_headers)
+        finally:
+            session = profiler.stop() if profiler is not None else None
+            profile.duration = time.perf_counter() - profile.started
+            _current_profile.reset(token)
+            profiling_control.profiled_total += 1
+            try:
+                paths = await run_in_threadpool(write_profile, profile, session)
+                profiling_control.recent.append({"id": profile.id, "path": profile.path, "files": paths})
+                print(f"DEBUG: profiling.py - Profiled {profile.method} {profile.path} in "
+                      f"{profile.duration * 1000:.1f}ms ({profile.sql_count} queries) -> {paths[-1]}")
+            except OSError as e:
+                print(f"ERROR: profiling.py - Could not write profile {profile.id}: {e}")
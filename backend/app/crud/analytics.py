@@ -0,0 +1,130 @@
+import datetime
+from typing import Iterable, List, Optional
+from sqlalchemy import func, insert, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.crud.hcp_activity import UNKNOWN
+from app.models.analytics import HCPWeeklyStat, InteractionStatsQueue, InteractionWeeklyStat
+from app.models.hcp import HCP
+from zoneinfo import ZoneInfo
+
+# Sentiments reported separately; anything else counts as "Other"
+SENTIMENTS = ("Positive", "Neutral", "Negative")
+
+def week_start(occurred_at: datetime.datetime) -> datetime.date:
+    """Monday of the week containing ``occurred_at`` in INTERACTION_TIMEZONE."""
+    local = occurred_at.astimezone(ZoneInfo(settings.INTERACTION_TIMEZONE)).date()
+    return local - datetime.timedelta(days=local.weekday())
+
+def queue_weeks(db: Session, occurred_ats: Iterable[Optional[datetime.datetime]]):
+    """Marks the weeks of ``occurred_ats`` stale, in the caller's transaction."""
+    weeks = {week_start(value) for value in occurred_ats if value is not None}
+    if weeks:
+        db.execute(insert(InteractionStatsQueue), [{"week_start": week} for week in sorted(weeks)])
+
+# Per-HCP counts for the interactions selected by {where}; the specialty rollup is
+# derived from these rows rather than from a second scan of interactions.
+_HCP_WEEKLY_SELECT = """
+    SELECT hcp_id, CAST(date_trunc('week', occurred_at AT TIME ZONE :tz) AS date) AS week_start,
+           coalesce(nullif(btrim(interaction_type), ''), :unknown) AS interaction_type,
+           coalesce(nullif(btrim(hcp_sentiment), ''), :unknown) AS hcp_sentiment,
+           count(*) AS interaction_count
+    FROM interactions
+    WHERE hcp_id IS NOT NULL {where}
+    GROUP BY 1, 2, 3, 4
+"""
+
+# The interaction_date bounds (local days of the week) let PostgreSQL prune to the
+# partitions covering it; the occurred_at bounds select the week exactly.
+_ONE_WEEK = """
+      AND interaction_date >= CAST(:week AS timestamp)
+      AND interaction_date < CAST(:week AS timestamp) + interval '7 days'
+      AND occurred_at >= (CAST(:week AS timestamp) AT TIME ZONE :tz)
+      AND occurred_at < ((CAST(:week AS timestamp) + interval '7 days') AT TIME ZONE :tz)
+"""
+
+INSERT_HCP_WEEKLY_SQL = "INSERT INTO hcp_weekly_stats (hcp_id, week_start, interaction_type, hcp_sentiment, interaction_count) " + _HCP_WEEKLY_SELECT
+
+INSERT_SPECIALTY_WEEKLY_SQL = text("""
+    INSERT INTO interaction_weekly_stats (week_start, specialty, interaction_type, hcp_sentiment, interaction_count)
+    SELECT s.week_start, coalesce(nullif(btrim(h.specialty), ''), :unknown), s.interaction_type, s.hcp_sentiment, sum(s.interaction_count)
+    FROM hcp_weekly_stats s JOIN hcps h ON h.id = s.hcp_id
+    WHERE CAST(:week AS date) IS NULL OR s.week_start = :week
+    GROUP BY 1, 2, 3, 4
+""")
+
+def _params(week: Optional[datetime.date] = None) -> dict:
+    return {"week": week, "tz": settings.INTERACTION_TIMEZONE, "unknown": UNKNOWN}
+
+def _recompute_week(db: Session, week: datetime.date):
+    for model in (InteractionWeeklyStat, HCPWeeklyStat):
+        db.query(model).filter(model.week_start == week).delete(synchronize_session=False)
+    db.execute(text(INSERT_HCP_WEEKLY_SQL.format(where=_ONE_WEEK)), _params(week))
+    db.execute(INSERT_SPECIALTY_WEEKLY_SQL, _params(week))
+
+def refresh_stats(db: Session) -> List[datetime.date]:
+    """Recomputes every queued week and clears exactly the queue rows it saw.
+
+    Run it in a REPEATABLE READ transaction: the queue rows and the interactions it reads
+    then come from one snapshot, so a write committing meanwhile stays queued for the
+    next run instead of being lost.
+    """
+    queued = db.query(InteractionStatsQueue.id, InteractionStatsQueue.week_start).all()
+    weeks = sorted({week for _, week in queued})
+    for week in weeks:
+        _recompute_week(db, week)
+    if queued:
+        db.query(InteractionStatsQueue).filter(InteractionStatsQueue.id.in_([row_id for row_id, _ in queued]))\
+            .delete(synchronize_session=False)
+    return weeks
+
+def rebuild_stats(db: Session) -> int:
+    """Recomputes all stats from scratch (backfill, or after HCP specialties or INTERACTION_TIMEZONE change)."""
+    for model in (InteractionStatsQueue, InteractionWeeklyStat, HCPWeeklyStat):
+        db.query(model).delete(synchronize_session=False)
+    db.execute(text(INSERT_HCP_WEEKLY_SQL.format(where="")), _params())
+    return db.execute(INSERT_SPECIALTY_WEEKLY_SQL, _params()).rowcount
+
+def get_weekly_trends(
+    db: Session,
+    group_by: str,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    hcp_id: Optional[int] = None,
+    specialty: Optional[str] = None,
+    interaction_type: Optional[str] = None,
+):
+    """One row per (week_start, group) with total and per-sentiment interaction counts.
+
+    Grouping by HCP (or filtering on one) reads hcp_weekly_stats; everything else reads
+    the much smaller specialty rollup.
+    """
+    per_hcp = group_by == "hcp" or hcp_id is not None
+    stats = HCPWeeklyStat if per_hcp else InteractionWeeklyStat
+    group = {
+        "hcp": HCPWeeklyStat.hcp_id,
+        "specialty": func.coalesce(func.nullif(func.btrim(HCP.specialty), ""), UNKNOWN) if per_hcp else InteractionWeeklyStat.specialty,
+        "interaction_type": stats.interaction_type,
+    }[group_by].label("group")
+    query = db.query(
+        stats.week_start,
+        group,
+        func.sum(stats.interaction_count).label("interaction_count"),
+        *[
+            func.coalesce(func.sum(stats.interaction_count).filter(stats.hcp_sentiment == sentiment), 0).label(sentiment)
+            for sentiment in SENTIMENTS
+        ],
+    )
+    if per_hcp and (group_by == "specialty" or specialty is not None):
+        query = query.join(HCP, HCP.id == HCPWeeklyStat.hcp_id)
+    if start is not None:
+        query = query.filter(stats.week_start >= start)
+    if end is not None:
+        query = query.filter(stats.week_start < end)
+    if hcp_id is not None:
+        query = query.filter(HCPWeeklyStat.hcp_id == hcp_id)
+    if specialty is not None:
+        query = query.filter((HCP.specialty if per_hcp else InteractionWeeklyStat.specialty) == specialty)
+    if interaction_type is not None:
+        query = query.filter(stats.interaction_type == interaction_type)
+    return query.group_by(stats.week_start, group).order_by(stats.week_start, group).all()
@@ -1,6 +1,12 @@
+from typing import List
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
+from app.core.events import queue_event
 from app.models.hcp import HCP
-from app.schemas.hcp import HPCCreate
+from app.schemas.hcp import HCP as HCPSchema, HPCCreate
+
+HCP_FIELDS = {column.key: column for column in (HCP.id, HCP.name, HCP.specialty, HCP.contact_info)}
 
 def get_hcp(db: Session, hcp_id: int):
     return db.query(HCP).filter(HCP.id == hcp_id).first()
@@ -11,9 +17,46 @@ def get_hcp_by_name(db: Session, name: str):
 def get_hcps(db: Session, skip: int = 0, limit: int = 100):
     return db.query(HCP).offset(skip).limit(limit).all()
 
+def get_hcp_fields(db: Session, fields, skip: int = 0, limit: int = 100):
+    """List query that selects only ``fields`` (names from HCP_FIELDS); returns row mappings."""
+    query = select(*[HCP_FIELDS[field] for field in fields]).order_by(HCP.id).offset(skip).limit(limit)
+    return db.execute(query).mappings().all()
+
 def create_hcp(db: Session, hcp: HPCCreate):
-    db_hcp = HCP(name=hcp.name, specialty=hcp.specialty, contact_info=hcp.contact_info)
-    db.add(db_hcp)
+    """Inserts ``hcp`` in one statement; returns None when the name is already taken.
+
+    ON CONFLICT makes concurrent creates of the same name safe: exactly one wins and
+    the others see None instead of an IntegrityError.
+    """
+    statement = insert(HCP).values(name=hcp.name, specialty=hcp.specialty, contact_info=hcp.contact_info)\
+        .on_conflict_do_nothing(index_elements=[HCP.name])\
+        .returning(HCP)
+    db_hcp = db.scalars(statement).first()
+    if db_hcp is not None:
+        queue_event(db, "hcp.created", HCPSchema.model_validate(db_hcp).model_dump(mode="json"))
     db.commit()
-    db.refresh(db_hcp)
-    return db_hcp
\ No newline at end of file
+    if db_hcp is not None:
+        db.refresh(db_hcp)
+    return db_hcp
+
+def upsert_hcps(db: Session, hcps: List[HPCCreate]):
+    """Inserts or updates ``hcps`` by name in a single INSERT ... ON CONFLICT statement.
+
+    Blank specialty/contact_info keep the stored value. Returns (id, name, created)
+    tuples; names must be unique within one call. The caller commits, which publishes an
+    hcp.created/hcp.updated event per row carrying only id and name.
+    """
+    if not hcps:
+        return []
+    statement = insert(HCP).values([hcp.model_dump() for hcp in hcps])
+    statement = statement.on_conflict_do_update(
+        index_elements=[HCP.name],
+        set_={
+            "specialty": func.coalesce(statement.excluded.specialty, HCP.specialty),
+            "contact_info": func.coalesce(statement.excluded.contact_info, HCP.contact_info),
+        },
+    ).returning(HCP.id, HCP.name, literal_column("xmax = 0").label("created")) # xmax is 0 only on freshly inserted rows
+    rows = db.execute(statement).all()
+    for row in rows:
+        queue_event(db, "hcp.created" if row.created else "hcp.updated", {"id": row.id, "name": row.name})
+    return rows
@@ -0,0 +1,223 @@
+import json
+from typing import Iterable, Optional
+from sqlalchemy import Integer, and_, case, func, or_, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.hcp_activity import HCPActivity
+from app.models.interaction import Interaction
+
+# Interactions with no sentiment/type are counted under this key
+UNKNOWN = "Unknown"
+
+def _key(value: Optional[str]) -> str:
+    return (value or "").strip() or UNKNOWN
+
+def _follow_up(value: Optional[str]) -> Optional[str]:
+    return (value or "").strip() or None
+
+def _bump(column, key: str, delta: int):
+    """JSONB counter update: column[key] += delta, dropping the key when it reaches zero."""
+    current = func.coalesce(column[key].astext.cast(Integer), 0)
+    return case(
+        (current + delta <= 0, column.op("-")(key)),
+        else_=column.op("||")(func.jsonb_build_object(key, current + delta)),
+    )
+
+def get_activity(db: Session, hcp_id: int):
+    return db.get(HCPActivity, hcp_id)
+
+def record_interaction(db: Session, interaction: Interaction):
+    """Adds a newly written interaction to its HCP's rollup (one INSERT ... ON CONFLICT).
+
+    Call after the interaction is flushed and before the transaction commits.
+    """
+    if interaction.hcp_id is None:
+        return
+    sentiment, interaction_type = _key(interaction.hcp_sentiment), _key(interaction.interaction_type)
+    follow_up = _follow_up(interaction.follow_up_actions)
+    statement = insert(HCPActivity).values(
+        hcp_id=interaction.hcp_id,
+        interaction_count=1,
+        sentiment_counts={sentiment: 1},
+        type_counts={interaction_type: 1},
+        last_interaction_id=interaction.id,
+        last_interaction_at=interaction.occurred_at,
+        last_follow_up_actions=follow_up,
+        last_follow_up_at=interaction.occurred_at if follow_up else None,
+        updated_at=func.now(),
+    )
+    new = statement.excluded
+    is_latest = or_(
+        HCPActivity.last_interaction_at.is_(None),
+        tuple_(new.last_interaction_at, new.last_interaction_id) >= tuple_(HCPActivity.last_interaction_at, HCPActivity.last_interaction_id),
+    )
+    is_latest_follow_up = and_(
+        new.last_follow_up_at.isnot(None),
+        or_(HCPActivity.last_follow_up_at.is_(None), new.last_follow_up_at >= HCPActivity.last_follow_up_at),
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[HCPActivity.hcp_id],
+        set_={
+            "interaction_count": HCPActivity.interaction_count + 1,
+            "sentiment_counts": _bump(HCPActivity.sentiment_counts, sentiment, 1),
+            "type_counts": _bump(HCPActivity.type_counts, interaction_type, 1),
+            "last_interaction_id": case((is_latest, new.last_interaction_id), else_=HCPActivity.last_interaction_id),
+            "last_interaction_at": case((is_latest, new.last_interaction_at), else_=HCPActivity.last_interaction_at),
+            "last_follow_up_actions": case((is_latest_follow_up, new.last_follow_up_actions), else_=HCPActivity.last_follow_up_actions),
+            "last_follow_up_at": case((is_latest_follow_up, new.last_follow_up_at), else_=HCPActivity.last_follow_up_at),
+            "updated_at": func.now(),
+        },
+    ))
+
+# Adds per-HCP deltas (one JSON record per HCP) to the rollup; counters are merged key by
+# key and the last_* fields follow the same "is it newer" rules as record_interaction
+_MERGE_COUNTS = """(
+    SELECT jsonb_object_agg(key, total) FROM (
+        SELECT key, sum(value::integer) AS total
+        FROM (SELECT * FROM jsonb_each_text(a.{column}) UNION ALL SELECT * FROM jsonb_each_text(excluded.{column})) counts
+        GROUP BY key
+    ) merged
+)"""
+_IS_LATEST = """a.last_interaction_at IS NULL
+    OR (excluded.last_interaction_at, excluded.last_interaction_id) >= (a.last_interaction_at, a.last_interaction_id)"""
+_IS_LATEST_FOLLOW_UP = """excluded.last_follow_up_at IS NOT NULL
+    AND (a.last_follow_up_at IS NULL OR excluded.last_follow_up_at >= a.last_follow_up_at)"""
+RECORD_MANY_SQL = text(f"""
+    INSERT INTO hcp_activity AS a (
+        hcp_id, interaction_count, sentiment_counts, type_counts, last_interaction_id,
+        last_interaction_at, last_follow_up_actions, last_follow_up_at, updated_at
+    )
+    SELECT hcp_id, interaction_count, sentiment_counts, type_counts, last_interaction_id,
+           last_interaction_at, last_follow_up_actions, last_follow_up_at, now()
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(
+        hcp_id integer, interaction_count integer, sentiment_counts jsonb, type_counts jsonb,
+        last_interaction_id integer, last_interaction_at timestamptz,
+        last_follow_up_actions text, last_follow_up_at timestamptz
+    )
+    ON CONFLICT (hcp_id) DO UPDATE SET
+        interaction_count = a.interaction_count + excluded.interaction_count,
+        sentiment_counts = {_MERGE_COUNTS.format(column="sentiment_counts")},
+        type_counts = {_MERGE_COUNTS.format(column="type_counts")},
+        last_interaction_id = CASE WHEN {_IS_LATEST} THEN excluded.last_interaction_id ELSE a.last_interaction_id END,
+        last_interaction_at = CASE WHEN {_IS_LATEST} THEN excluded.last_interaction_at ELSE a.last_interaction_at END,
+        last_follow_up_actions = CASE WHEN {_IS_LATEST_FOLLOW_UP} THEN excluded.last_follow_up_actions ELSE a.last_follow_up_actions END,
+        last_follow_up_at = CASE WHEN {_IS_LATEST_FOLLOW_UP} THEN excluded.last_follow_up_at ELSE a.last_follow_up_at END,
+        updated_at = now()
+""")
+
+def record_interactions(db: Session, interactions: Iterable[Interaction]):
+    """record_interaction for many new interactions: aggregated per HCP, one statement in all.
+
+    Call after the interactions are flushed and before the transaction commits.
+    """
+    rows = {}
+    for interaction in interactions:
+        if interaction.hcp_id is None:
+            continue
+        row = rows.setdefault(interaction.hcp_id, {
+            "hcp_id": interaction.hcp_id, "interaction_count": 0, "sentiment_counts": {}, "type_counts": {},
+            "last_interaction_id": None, "last_interaction_at": None, "last_follow_up_actions": None, "last_follow_up_at": None,
+        })
+        row["interaction_count"] += 1
+        for counts, value in ((row["sentiment_counts"], interaction.hcp_sentiment), (row["type_counts"], interaction.interaction_type)):
+            counts[_key(value)] = counts.get(_key(value), 0) + 1
+        if row["last_interaction_at"] is None or (interaction.occurred_at, interaction.id) >= (row["last_interaction_at"], row["last_interaction_id"]):
+            row["last_interaction_id"], row["last_interaction_at"] = interaction.id, interaction.occurred_at
+        follow_up = _follow_up(interaction.follow_up_actions)
+        if follow_up and (row["last_follow_up_at"] is None or interaction.occurred_at >= row["last_follow_up_at"]):
+            row["last_follow_up_actions"], row["last_follow_up_at"] = follow_up, interaction.occurred_at
+    if rows:
+        for row in rows.values():
+            for field in ("last_interaction_at", "last_follow_up_at"):
+                row[field] = row[field].isoformat() if row[field] is not None else None
+        db.execute(RECORD_MANY_SQL, {"rows": json.dumps(list(rows.values()))})
+
+def forget_interaction(db: Session, hcp_id: Optional[int], hcp_sentiment: Optional[str], interaction_type: Optional[str]):
+    """Removes an interaction's old values from the counters before it is changed."""
+    if hcp_id is None:
+        return
+    sentiment, interaction_type = _key(hcp_sentiment), _key(interaction_type)
+    db.query(HCPActivity).filter(HCPActivity.hcp_id == hcp_id).update({
+        HCPActivity.interaction_count: func.greatest(HCPActivity.interaction_count - 1, 0),
+        HCPActivity.sentiment_counts: _bump(HCPActivity.sentiment_counts, sentiment, -1),
+        HCPActivity.type_counts: _bump(HCPActivity.type_counts, interaction_type, -1),
+        HCPActivity.updated_at: func.now(),
+    }, synchronize_session=False)
+
+# Latest interaction, and latest one with follow-up actions, via the (hcp_id, occurred_at) index
+REFRESH_LATEST_SQL = text("""
+    UPDATE hcp_activity SET
+        (last_interaction_id, last_interaction_at) = (
+            SELECT id, occurred_at FROM interactions WHERE hcp_id = :hcp_id
+            ORDER BY occurred_at DESC, id DESC LIMIT 1
+        ),
+        (last_follow_up_actions, last_follow_up_at) = (
+            SELECT t.follow_up_actions, i.occurred_at
+            FROM interactions i JOIN interaction_text t ON t.interaction_id = i.id
+            WHERE i.hcp_id = :hcp_id AND btrim(coalesce(t.follow_up_actions, '')) <> ''
+            ORDER BY i.occurred_at DESC, i.id DESC LIMIT 1
+        ),
+        updated_at = now()
+    WHERE hcp_id = :hcp_id
+""")
+
+def refresh_latest(db: Session, hcp_id: Optional[int]):
+    """Recomputes the last_* fields, e.g. after the latest interaction was moved or re-dated."""
+    if hcp_id is not None:
+        db.flush() # text() statements do not autoflush pending ORM changes
+        db.execute(REFRESH_LATEST_SQL, {"hcp_id": hcp_id})
+
+# Full recomputation from interactions; :hcp_id NULL means every HCP
+REBUILD_SQL = text("""
+    WITH scoped AS (
+        SELECT i.id, i.hcp_id, i.occurred_at, t.follow_up_actions,
+               coalesce(nullif(btrim(i.hcp_sentiment), ''), :unknown) AS sentiment,
+               coalesce(nullif(btrim(i.interaction_type), ''), :unknown) AS interaction_type
+        FROM interactions i LEFT JOIN interaction_text t ON t.interaction_id = i.id
+        WHERE i.hcp_id IS NOT NULL AND (CAST(:hcp_id AS integer) IS NULL OR i.hcp_id = :hcp_id)
+    ),
+    totals AS (
+        SELECT hcp_id, count(*) AS n FROM scoped GROUP BY hcp_id
+    ),
+    sentiments AS (
+        SELECT hcp_id, jsonb_object_agg(sentiment, n) AS counts
+        FROM (SELECT hcp_id, sentiment, count(*) AS n FROM scoped GROUP BY hcp_id, sentiment) s
+        GROUP BY hcp_id
+    ),
+    types AS (
+        SELECT hcp_id, jsonb_object_agg(interaction_type, n) AS counts
+        FROM (SELECT hcp_id, interaction_type, count(*) AS n FROM scoped GROUP BY hcp_id, interaction_type) t
+        GROUP BY hcp_id
+    ),
+    latest AS (
+        SELECT DISTINCT ON (hcp_id) hcp_id, id, occurred_at
+        FROM scoped ORDER BY hcp_id, occurred_at DESC, id DESC
+    ),
+    latest_follow_up AS (
+        SELECT DISTINCT ON (hcp_id) hcp_id, follow_up_actions, occurred_at
+        FROM scoped WHERE btrim(coalesce(follow_up_actions, '')) <> ''
+        ORDER BY hcp_id, occurred_at DESC, id DESC
+    )
+    INSERT INTO hcp_activity (
+        hcp_id, interaction_count, sentiment_counts, type_counts, last_interaction_id,
+        last_interaction_at, last_follow_up_actions, last_follow_up_at, updated_at
+    )
+    SELECT l.hcp_id, n.n, s.counts, t.counts, l.id, l.occurred_at, f.follow_up_actions, f.occurred_at, now()
+    FROM latest l
+    JOIN totals n USING (hcp_id)
+    JOIN sentiments s USING (hcp_id)
+    JOIN types t USING (hcp_id)
+    LEFT JOIN latest_follow_up f USING (hcp_id)
+""")
+
+def rebuild_activity(db: Session, hcp_id: Optional[int] = None) -> int:
+    """Replaces the rollup rows (all, or one HCP's) with values recomputed from interactions.
+
+    Runs in the caller's transaction; returns the number of rows written.
+    """
+    query = db.query(HCPActivity)
+    if hcp_id is not None:
+        query = query.filter(HCPActivity.hcp_id == hcp_id)
+    query.delete(synchronize_session=False)
+    db.flush()
+    return db.execute(REBUILD_SQL, {"hcp_id": hcp_id, "unknown": UNKNOWN}).rowcount
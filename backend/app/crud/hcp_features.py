@@ -0,0 +1,138 @@
+import json
+import re
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+from app.models.hcp_features import HCPFeatures
+from app.models.interaction import Interaction
+
+SENTIMENT_SCORES = {"positive": 1, "neutral": 0, "negative": -1}
+# Sentiments kept per HCP, newest first; enough to tell a trend from a single bad meeting
+RECENT_SENTIMENTS = 6
+
+# "Dosing card, trial reprint and Product X brochure" -> three items
+ITEM_SEPARATORS = re.compile(r"\s*(?:[,;\n]|\band\b)\s*", re.IGNORECASE)
+NO_ITEMS = {"", "none", "n/a", "na", "not mentioned", "unknown", "-"}
+
+def split_items(value: Optional[str]) -> List[str]:
+    """Distinct normalized (lowercased, single-spaced) items of a materials/samples field."""
+    items = []
+    for item in ITEM_SEPARATORS.split(value or ""):
+        item = " ".join(item.split()).lower().strip(".")
+        if item not in NO_ITEMS and item not in items:
+            items.append(item)
+    return items
+
+def sentiment_score(value: Optional[str]) -> Optional[int]:
+    return SENTIMENT_SCORES.get((value or "").strip().lower())
+
+def get_features(db: Session, hcp_id: int):
+    return db.get(HCPFeatures, hcp_id)
+
+def _deltas(interactions: Iterable) -> List[dict]:
+    """One record per HCP with what ``interactions`` add; anything with hcp_id, id,
+    occurred_at, hcp_sentiment, materials_shared and samples_distributed attributes works."""
+    rows = {}
+    for interaction in interactions:
+        if interaction.hcp_id is None:
+            continue
+        row = rows.setdefault(interaction.hcp_id, {
+            "hcp_id": interaction.hcp_id, "first_interaction_at": None,
+            "recent_sentiments": [], "materials_given": {}, "samples_given": {},
+        })
+        if row["first_interaction_at"] is None or interaction.occurred_at < row["first_interaction_at"]:
+            row["first_interaction_at"] = interaction.occurred_at
+        score = sentiment_score(interaction.hcp_sentiment)
+        if score is not None:
+            row["recent_sentiments"].append([interaction.occurred_at.timestamp(), interaction.id, score])
+            if len(row["recent_sentiments"]) > 2 * RECENT_SENTIMENTS:
+                _trim(row)
+        for counts, value in ((row["materials_given"], interaction.materials_shared), (row["samples_given"], interaction.samples_distributed)):
+            for item in split_items(value):
+                counts[item] = counts.get(item, 0) + 1
+    for row in rows.values():
+        _trim(row)
+    return list(rows.values())
+
+def _trim(row: dict):
+    row["recent_sentiments"] = sorted(row["recent_sentiments"], reverse=True)[:RECENT_SENTIMENTS]
+
+def _upsert(db: Session, rows: List[dict]):
+    if rows:
+        rows = [{**row, "first_interaction_at": row["first_interaction_at"].isoformat()} for row in rows]
+        db.execute(RECORD_SQL, {"rows": json.dumps(rows)})
+
+_MERGE_COUNTS = """coalesce((
+    SELECT jsonb_object_agg(key, total) FROM (
+        SELECT key, sum(value::integer) AS total
+        FROM (SELECT * FROM jsonb_each_text(f.{column}) UNION ALL SELECT * FROM jsonb_each_text(excluded.{column})) counts
+        GROUP BY key
+    ) merged
+), '{{}}'::jsonb)"""
+_SENTIMENT_ORDER = "(entry->>0)::float8 DESC, (entry->>1)::integer DESC"
+RECORD_SQL = text(f"""
+    INSERT INTO hcp_features AS f (
+        hcp_id, first_interaction_at, recent_sentiments, materials_given, samples_given, updated_at
+    )
+    SELECT hcp_id, first_interaction_at, recent_sentiments, materials_given, samples_given, now()
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(
+        hcp_id integer, first_interaction_at timestamptz,
+        recent_sentiments jsonb, materials_given jsonb, samples_given jsonb
+    )
+    ON CONFLICT (hcp_id) DO UPDATE SET
+        first_interaction_at = least(f.first_interaction_at, excluded.first_interaction_at),
+        recent_sentiments = coalesce((
+            SELECT jsonb_agg(entry ORDER BY {_SENTIMENT_ORDER}) FROM (
+                SELECT entry FROM jsonb_array_elements(f.recent_sentiments || excluded.recent_sentiments) entry
+                ORDER BY {_SENTIMENT_ORDER} LIMIT {RECENT_SENTIMENTS}
+            ) kept
+        ), '[]'::jsonb),
+        materials_given = {_MERGE_COUNTS.format(column="materials_given")},
+        samples_given = {_MERGE_COUNTS.format(column="samples_given")},
+        updated_at = now()
+""")
+
+def record_interactions(db: Session, interactions: Iterable[Interaction]):
+    """Adds newly written interactions to their HCPs' features (one statement in all).
+
+    Call after the interactions are flushed and before the transaction commits.
+    """
+    _upsert(db, _deltas(interactions))
+
+FEATURE_COLUMNS = (
+    Interaction.id, Interaction.hcp_id, Interaction.occurred_at, Interaction.hcp_sentiment,
+    Interaction.materials_shared, Interaction.samples_distributed,
+)
+
+def rebuild_features(db: Session, hcp_id: Optional[int] = None, batch_size: int = 1000) -> int:
+    """Replaces the feature rows (all, or one HCP's) with values recomputed from interactions.
+
+    Also how edits are applied: an edited interaction may remove an item or a sentiment,
+    which cannot be subtracted incrementally. Runs in the caller's transaction; returns
+    the number of rows written.
+    """
+    db.flush() # the edited interaction must be visible to the select below
+    query = db.query(HCPFeatures)
+    if hcp_id is not None:
+        query = query.filter(HCPFeatures.hcp_id == hcp_id)
+    query.delete(synchronize_session=False)
+
+    statement = select(*FEATURE_COLUMNS).where(Interaction.hcp_id.is_not(None))
+    if hcp_id is not None:
+        statement = statement.where(Interaction.hcp_id == hcp_id)
+    totals: Dict[int, dict] = {}
+    result = db.execute(statement.execution_options(yield_per=batch_size))
+    for batch in result.partitions():
+        for row in _deltas(batch):
+            total = totals.get(row["hcp_id"])
+            if total is None:
+                totals[row["hcp_id"]] = row
+                continue
+            total["first_interaction_at"] = min(total["first_interaction_at"], row["first_interaction_at"])
+            total["recent_sentiments"] += row["recent_sentiments"]
+            _trim(total)
+            for column in ("materials_given", "samples_given"):
+                for item, count in row[column].items():
+                    total[column][item] = total[column].get(item, 0) + count
+    _upsert(db, list(totals.values()))
+    return len(totals)
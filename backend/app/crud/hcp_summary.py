@@ -0,0 +1,98 @@
+import json
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.hcp_summary import HCPSummary
+from app.models.interaction import Interaction
+
+# (label, attribute) of the fields a digest line keeps, each clipped to HCP_SUMMARY_FIELD_CHARS
+DIGEST_FIELDS = (
+    ("topics", "topics_discussed"),
+    ("materials", "materials_shared"),
+    ("samples", "samples_distributed"),
+    ("outcome", "outcomes"),
+    ("follow-up", "follow_up_actions"),
+)
+
+def clip(value: str, limit: int) -> str:
+    return value if len(value) <= limit else value[:limit - 1].rstrip() + "…"
+
+def digest(interaction) -> str:
+    """One line for an interaction: date, type, sentiment and its main fields.
+
+    Anything with the Interaction attributes works, e.g. rows selected with those labels.
+    """
+    line = f"{interaction.occurred_at:%Y-%m-%d} {(interaction.interaction_type or '').strip() or 'Interaction'}"
+    if (interaction.hcp_sentiment or "").strip():
+        line += f" ({interaction.hcp_sentiment.strip()})"
+    parts = [line]
+    for label, field in DIGEST_FIELDS:
+        value = " ".join((getattr(interaction, field) or "").split())
+        if value:
+            parts.append(f"{label}: {clip(value, settings.HCP_SUMMARY_FIELD_CHARS)}")
+    summary = " ".join((getattr(interaction, "summary", None) or "").split())
+    if len(parts) == 1 and summary:
+        parts.append(clip(summary, settings.HCP_SUMMARY_FIELD_CHARS))
+    return "; ".join(parts)
+
+def digest_entry(interaction) -> list:
+    return [interaction.occurred_at.timestamp(), interaction.id, digest(interaction)]
+
+def get_summary(db: Session, hcp_id: int):
+    return db.get(HCPSummary, hcp_id)
+
+RECORD_SQL = text("""
+    INSERT INTO hcp_summaries AS s (hcp_id, summarized_count, pending_digests, raw_chars, updated_at)
+    SELECT hcp_id, 0, pending_digests, raw_chars, now()
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(hcp_id integer, pending_digests jsonb, raw_chars bigint)
+    ON CONFLICT (hcp_id) DO UPDATE SET
+        pending_digests = s.pending_digests || excluded.pending_digests,
+        raw_chars = s.raw_chars + excluded.raw_chars,
+        updated_at = now()
+""")
+
+def record_interactions(db: Session, interactions: Iterable[Tuple[Interaction, dict]]):
+    """Appends a digest of each new interaction to its HCP's pending digests (one statement).
+
+    Takes (interaction, body as the API returns it) pairs; the body's size is what the
+    history context is measured against. Call after the interactions are flushed and
+    before the transaction commits.
+    """
+    rows = {}
+    for interaction, body in interactions:
+        if interaction.hcp_id is None:
+            continue
+        row = rows.setdefault(interaction.hcp_id, {"hcp_id": interaction.hcp_id, "pending_digests": [], "raw_chars": 0})
+        row["pending_digests"].append(digest_entry(interaction))
+        row["raw_chars"] += len(json.dumps(body))
+    if rows:
+        db.execute(RECORD_SQL, {"rows": json.dumps(list(rows.values()))})
+
+def _without(entries: List[list], interaction_id: int) -> Tuple[List[list], bool]:
+    kept = [entry for entry in entries if entry[1] != interaction_id]
+    return kept, len(kept) != len(entries)
+
+def update_interaction(db: Session, interaction: Interaction, old_hcp_id: Optional[int]):
+    """Re-digests an edited interaction in the caller's transaction.
+
+    A pending digest is replaced (or moved to the new HCP). An interaction that was
+    already folded into a summary cannot be taken out of it, so that summary is marked
+    stale and the next compaction rebuilds it from the full history.
+    """
+    for hcp_id in sorted({old_hcp_id, interaction.hcp_id} - {None}):
+        row = db.get(HCPSummary, hcp_id, with_for_update=True)
+        if row is None:
+            if hcp_id == interaction.hcp_id:
+                record_interactions(db, [(interaction, {})])
+            continue
+        pending, was_pending = _without(row.pending_digests, interaction.id)
+        if hcp_id == interaction.hcp_id:
+            if was_pending or hcp_id != old_hcp_id:
+                pending.append(digest_entry(interaction))
+            else:
+                row.stale_at = func.now()
+        elif not was_pending:
+            row.stale_at = func.now()
+        row.pending_digests = pending
+        row.updated_at = func.now()
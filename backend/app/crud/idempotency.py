@@ -0,0 +1,72 @@
+import datetime
+import json
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+
+def get_key(db: Session, scope: str, key: str):
+    return db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key).first()
+
+def reserve_key(db: Session, scope: str, key: str, request_hash: str):
+    """Claims ``key`` for a new request.
+
+    Returns None when the caller now owns the key, or the existing record when the key
+    was already used (finished or still in progress). Expired records are replaced, and
+    a claim left pending past IDEMPOTENCY_CLAIM_LEASE_SECONDS is taken over.
+    """
+    existing = get_key(db, scope, key)
+    now = datetime.datetime.now()
+    if existing is not None and existing.status_code is None:
+        if existing.created_at >= now - datetime.timedelta(seconds=settings.IDEMPOTENCY_CLAIM_LEASE_SECONDS):
+            return existing
+        # Conditional on the old claim time, so of several concurrent retries only one wins
+        taken = db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+            IdempotencyKey.created_at == existing.created_at,
+        ).update({"created_at": now, "request_hash": request_hash}, synchronize_session=False)
+        db.commit()
+        if taken:
+            print(f"WARNING: idempotency.py - Took over stale claim of {scope} key {key!r} from {existing.created_at}.")
+            return None
+        return get_key(db, scope, key)
+    if existing is not None:
+        if existing.created_at >= now - datetime.timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS):
+            return existing
+        db.delete(existing)
+        db.commit()
+
+    db.add(IdempotencyKey(scope=scope, key=key, request_hash=request_hash))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request claimed the key between the lookup and the insert
+        db.rollback()
+        return get_key(db, scope, key)
+    return None
+
+def complete_key(db: Session, scope: str, key: str, status_code: int, body):
+    record = get_key(db, scope, key)
+    if record is None:
+        return None
+    record.status_code = status_code
+    record.response_body = json.dumps(body)
+    db.commit()
+    return record
+
+def complete_keys(db: Session, scope: str, outcomes):
+    """complete_key for many (key, status_code, body) outcomes in one query; the caller commits."""
+    bodies = {key: (status_code, body) for key, status_code, body in outcomes}
+    if not bodies:
+        return
+    for record in db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key.in_(list(bodies))):
+        record.status_code, body = bodies[record.key]
+        record.response_body = json.dumps(body)
+
+def release_key(db: Session, scope: str, key: str):
+    """Forgets a reservation whose request failed, so a retry can run again."""
+    db.rollback()
+    db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key).delete()
+    db.commit()
@@ -1,44 +1,240 @@
-from sqlalchemy.orm import Session
-from app.models.interaction import Interaction
-from app.schemas.interaction import InteractionCreate, InteractionUpdate # Import InteractionUpdate
+from typing import List
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from app.models.hcp import HCP
+from app.models.interaction import Interaction, InteractionFingerprint, InteractionText
+from app.schemas.interaction import Interaction as InteractionSchema, InteractionCreate, InteractionUpdate # Import InteractionUpdate
 from app.crud import hcp as crud_hcp  # Add this import
+from app.crud import analytics as crud_analytics, hcp_activity as crud_hcp_activity, hcp_features as crud_hcp_features, hcp_summary as crud_hcp_summary
+from app.core.config import settings
+from app.core.events import queue_event
+from zoneinfo import ZoneInfo
+import datetime
+import hashlib
+import re
+
+# Most-recent lookups search this window first so only the newest partitions are scanned
+RECENT_INTERACTION_LOOKBACK_DAYS = 90
+
+# Every field a list endpoint can return, by name (see ``fields=``)
+INTERACTION_FIELDS = {
+    column.key: column
+    for column in (
+        Interaction.id, Interaction.hcp_id, Interaction.interaction_type, Interaction.interaction_date,
+        Interaction.interaction_time, Interaction.occurred_at, Interaction.attendees,
+        InteractionText.topics_discussed, Interaction.materials_shared, Interaction.samples_distributed,
+        Interaction.hcp_sentiment, InteractionText.outcomes, InteractionText.follow_up_actions,
+        InteractionText.summary, InteractionText.raw_text_input,
+    )
+}
 
 def get_interaction(db: Session, interaction_id: int):
-    return db.query(Interaction).filter(Interaction.id == interaction_id).first()
+    return db.query(Interaction).options(joinedload(Interaction.text)).filter(Interaction.id == interaction_id).first()
+
+def select_interaction_columns(columns):
+    """SELECT of ``columns`` from interactions, joining interaction_text only if one of them lives there."""
+    query = select(*columns).select_from(Interaction)
+    if any(column.table is InteractionText.__table__ for column in columns):
+        query = query.outerjoin(InteractionText, InteractionText.interaction_id == Interaction.id)
+    return query
+
+def get_interaction_fields(db: Session, fields, skip: int = 0, limit: int = 100, start=None, end=None, hcp_id: int = None):
+    """List query that selects only ``fields`` (names from INTERACTION_FIELDS); returns row mappings."""
+    query = select_interaction_columns([INTERACTION_FIELDS[field] for field in fields])
+    if hcp_id is not None:
+        query = query.where(Interaction.hcp_id == hcp_id)
+    query = filter_occurred_between(query, start, end)\
+        .order_by(Interaction.occurred_at.desc(), Interaction.id.desc()).offset(skip).limit(limit)
+    return db.execute(query).mappings().all()
+
+_TIME_OF_DAY = re.compile(r"^\s*([01]?\d|2[0-3]):([0-5]\d)")
+
+def _interaction_tz():
+    return ZoneInfo(settings.INTERACTION_TIMEZONE)
+
+def as_aware(value: datetime.datetime) -> datetime.datetime:
+    """Naive datetimes are taken to be in INTERACTION_TIMEZONE."""
+    return value if value.tzinfo is not None else value.replace(tzinfo=_interaction_tz())
 
-def get_interactions_by_hcp(db: Session, hcp_id: int, skip: int = 0, limit: int = 100):
-    return db.query(Interaction).filter(Interaction.hcp_id == hcp_id).offset(skip).limit(limit).all()
+def combine_occurred_at(interaction_date: datetime.datetime, interaction_time: str = None) -> datetime.datetime:
+    """Builds the timezone-aware moment of an interaction from its local date and "HH:MM" time.
 
-def create_interaction(db: Session, interaction: InteractionCreate, summary: str = None, raw_text_input: str = None):
+    A missing or unparseable time keeps the time already on ``interaction_date``.
+    """
+    value = interaction_date
+    match = _TIME_OF_DAY.match(interaction_time or "")
+    if match:
+        value = value.replace(hour=int(match.group(1)), minute=int(match.group(2)), second=0, microsecond=0)
+    return as_aware(value)
+
+def split_occurred_at(occurred_at: datetime.datetime):
+    """Inverse of combine_occurred_at: (local naive interaction_date, "HH:MM")."""
+    local = as_aware(occurred_at).astimezone(_interaction_tz()).replace(tzinfo=None)
+    return local, local.strftime("%H:%M")
+
+def filter_occurred_between(query, start=None, end=None):
+    """Restricts ``query`` (Query or select) to start <= occurred_at < end.
+
+    The matching interaction_date bounds are added too: occurred_at always falls on the
+    local day of interaction_date, so they never exclude a row, and they let PostgreSQL
+    prune partitions while the occurred_at index does the actual range scan.
+    """
+    if start is not None:
+        start = as_aware(start)
+        local_day = start.astimezone(_interaction_tz()).replace(tzinfo=None)
+        query = query.where(
+            Interaction.occurred_at >= start,
+            Interaction.interaction_date >= datetime.datetime.combine(local_day.date(), datetime.time.min),
+        )
+    if end is not None:
+        end = as_aware(end)
+        local_day = end.astimezone(_interaction_tz()).replace(tzinfo=None)
+        query = query.where(
+            Interaction.occurred_at < end,
+            Interaction.interaction_date < datetime.datetime.combine(local_day.date() + datetime.timedelta(days=1), datetime.time.min),
+        )
+    return query
+
+def get_interactions_by_hcp(db: Session, hcp_id: int, skip: int = 0, limit: int = 100, start=None, end=None):
+    query = filter_occurred_between(db.query(Interaction).options(joinedload(Interaction.text)).filter(Interaction.hcp_id == hcp_id), start, end)
+    return query.order_by(Interaction.occurred_at.desc(), Interaction.id.desc()).offset(skip).limit(limit).all()
+
+def build_interaction(interaction: InteractionCreate, summary: str = None, raw_text_input: str = None, extracted_by: str = None):
+    """Returns (interaction with date/time derived from occurred_at, unsaved Interaction row)."""
+    if interaction.occurred_at is not None:
+        interaction_date, interaction_time = split_occurred_at(interaction.occurred_at)
+        interaction = interaction.model_copy(update={"interaction_date": interaction_date, "interaction_time": interaction_time})
     db_interaction = Interaction(
         hcp_id=interaction.hcp_id,
         interaction_type=interaction.interaction_type,
         interaction_date=interaction.interaction_date,
         interaction_time=interaction.interaction_time,
+        occurred_at=combine_occurred_at(interaction.interaction_date, interaction.interaction_time),
         attendees=interaction.attendees,
         topics_discussed=interaction.topics_discussed,
         materials_shared=interaction.materials_shared,
         samples_distributed=interaction.samples_distributed,
         hcp_sentiment=interaction.hcp_sentiment,
-        outcomes=interaction.outcomes,
-        follow_up_actions=interaction.follow_up_actions,
-        summary=summary, # Pass summary
-        raw_text_input=raw_text_input # Pass raw_text_input
     )
+    text_values = {
+        "topics_discussed": interaction.topics_discussed,
+        "outcomes": interaction.outcomes,
+        "follow_up_actions": interaction.follow_up_actions,
+        "summary": summary,
+        "raw_text_input": raw_text_input,
+    }
+    # No interaction_text row when there is no text at all
+    if any(value is not None for value in text_values.values()):
+        db_interaction.text = InteractionText(**text_values, extracted_by=extracted_by)
+    return interaction, db_interaction
+
+def create_interaction(db: Session, interaction: InteractionCreate, summary: str = None, raw_text_input: str = None, extracted_by: str = None):
+    interaction, db_interaction = build_interaction(interaction, summary, raw_text_input, extracted_by)
     db.add(db_interaction)
-    db.commit()
+    fingerprint = interaction_fingerprint(interaction, raw_text_input)
+    try:
+        db.flush()
+        db.add(InteractionFingerprint(fingerprint=fingerprint, interaction_id=db_interaction.id))
+        # Same transaction as the insert, so the rollup never drifts from the table
+        crud_hcp_activity.record_interaction(db, db_interaction)
+        crud_hcp_features.record_interactions(db, [db_interaction])
+        crud_analytics.queue_weeks(db, [db_interaction.occurred_at])
+        body = interaction_event_data(db_interaction)
+        crud_hcp_summary.record_interactions(db, [(db_interaction, body)])
+        queue_event(db, "interaction.created", body)
+        db.commit()
+    except IntegrityError:
+        # Same HCP, day and text already logged (e.g. a client retry): return that row instead
+        db.rollback()
+        existing_id = db.query(InteractionFingerprint.interaction_id)\
+            .filter(InteractionFingerprint.fingerprint == fingerprint).scalar()
+        if existing_id is None:
+            raise
+        return get_interaction(db, existing_id)
     db.refresh(db_interaction)
     return db_interaction
 
+def insert_interactions(db: Session, interactions: List[InteractionCreate]) -> List[dict]:
+    """Adds ``interactions`` to the current transaction with their text, fingerprints, rollup
+    and stats updates, for group commits; returns each one as the API does. The caller commits.
+
+    A duplicate (fingerprint already stored, or repeated in the list) resolves to the
+    existing row as in create_interaction. Raises IntegrityError if another writer
+    stored one of the fingerprints in the meantime.
+    """
+    built = [build_interaction(interaction) for interaction in interactions]
+    fingerprints = [interaction_fingerprint(interaction) for interaction, _ in built]
+    existing = dict(
+        db.query(InteractionFingerprint.fingerprint, InteractionFingerprint.interaction_id)
+        .filter(InteractionFingerprint.fingerprint.in_(set(fingerprints))).all()
+    )
+    new_rows = {}
+    for fingerprint, (_, db_interaction) in zip(fingerprints, built):
+        if fingerprint not in existing and fingerprint not in new_rows:
+            new_rows[fingerprint] = db_interaction
+    db.add_all(new_rows.values())
+    db.flush()
+
+    db.add_all([InteractionFingerprint(fingerprint=fingerprint, interaction_id=row.id) for fingerprint, row in new_rows.items()])
+    crud_hcp_activity.record_interactions(db, new_rows.values())
+    crud_hcp_features.record_interactions(db, new_rows.values())
+    crud_analytics.queue_weeks(db, [row.occurred_at for row in new_rows.values()])
+    bodies = {fingerprint: interaction_event_data(row) for fingerprint, row in new_rows.items()}
+    crud_hcp_summary.record_interactions(db, [(row, bodies[fingerprint]) for fingerprint, row in new_rows.items()])
+    for body in bodies.values():
+        queue_event(db, "interaction.created", body)
+    if existing:
+        stored = db.query(Interaction).options(joinedload(Interaction.text))\
+            .filter(Interaction.id.in_(set(existing.values()))).all()
+        by_id = {row.id: interaction_event_data(row) for row in stored}
+        bodies.update({fingerprint: by_id[interaction_id] for fingerprint, interaction_id in existing.items()})
+    db.flush()
+    return [bodies[fingerprint] for fingerprint in fingerprints]
+
+def interaction_event_data(db_interaction: Interaction) -> dict:
+    """The interaction as the API returns it, for change events."""
+    return InteractionSchema.model_validate(db_interaction).model_dump(mode="json")
+
+def interaction_fingerprint(interaction: InteractionCreate, raw_text_input: str = None) -> str:
+    """Hash of (HCP, interaction day, normalized text) used to reject duplicate inserts."""
+    text = raw_text_input or "|".join(
+        value or "" for value in (
+            interaction.interaction_type, interaction.attendees, interaction.topics_discussed,
+            interaction.materials_shared, interaction.samples_distributed, interaction.outcomes,
+            interaction.follow_up_actions,
+        )
+    )
+    normalized = " ".join(text.lower().split())
+    day = interaction.interaction_date.date().isoformat()
+    return hashlib.sha256(f"{interaction.hcp_id}|{day}|{normalized}".encode()).hexdigest()
+
 # Add to your CRUD operations
 def get_most_recent_interaction_by_hcp_name(db: Session, hcp_name: str):
     hcp = crud_hcp.get_hcp_by_name(db, hcp_name)
     if not hcp:
         return None
-    return db.query(Interaction)\
+    # The rollup names the latest interaction; its timestamp pins the lookup to one partition
+    activity = crud_hcp_activity.get_activity(db, hcp.id)
+    if activity is not None and activity.last_interaction_id is not None:
+        at = activity.last_interaction_at
+        latest = filter_occurred_between(
+            db.query(Interaction).filter(Interaction.id == activity.last_interaction_id),
+            at, at + datetime.timedelta(microseconds=1),
+        ).first()
+        if latest is not None:
+            return latest
+    # No rollup row (e.g. not rebuilt since upgrading): search the history directly
+    query = db.query(Interaction)\
         .filter(Interaction.hcp_id == hcp.id)\
-        .order_by(Interaction.interaction_date.desc())\
-        .first()
+        .order_by(Interaction.occurred_at.desc(), Interaction.id.desc())
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=RECENT_INTERACTION_LOOKBACK_DAYS)
+    recent = query.filter(Interaction.interaction_date >= cutoff).first()
+    if recent is not None:
+        return recent
+    # Nothing recent: fall back to the full history
+    return query.filter(Interaction.interaction_date < cutoff).first()
 
 def update_interaction(db: Session, interaction_id: int, interaction_in: InteractionUpdate): # Updated function
     db_interaction = db.query(Interaction).filter(Interaction.id == interaction_id).first()
@@ -48,10 +244,99 @@ def update_interaction(db: Session, interaction_id: int, interaction_in: Interac
     # Update only the provided fields
     # Use .dict(exclude_unset=True) for Pydantic v1, or .model_dump(exclude_unset=True) for Pydantic v2
     update_data = interaction_in.model_dump(exclude_unset=True) # Changed from .dict() for Pydantic v2 compatibility
+    before = _rollup_fields(db_interaction)
+    features_before = _feature_fields(db_interaction)
+    digest_before = crud_hcp_summary.digest(db_interaction)
+    fingerprint_before = interaction_fingerprint(db_interaction, db_interaction.raw_text_input)
+    occurred_at = update_data.pop("occurred_at", None)
+    if occurred_at is not None:
+        update_data["interaction_date"], update_data["interaction_time"] = split_occurred_at(occurred_at)
     for field, value in update_data.items():
         setattr(db_interaction, field, value)
+    if "raw_text_input" in update_data:
+        # The stored fields no longer come from one extraction of this text
+        db_interaction.extracted_by = "edit"
+    if "interaction_date" in update_data or "interaction_time" in update_data:
+        db_interaction.occurred_at = combine_occurred_at(db_interaction.interaction_date, db_interaction.interaction_time)
 
     db.add(db_interaction)
+    if _rollup_fields(db_interaction) != before:
+        crud_hcp_activity.forget_interaction(db, before["hcp_id"], before["hcp_sentiment"], before["interaction_type"])
+        crud_hcp_activity.record_interaction(db, db_interaction)
+        for hcp_id in {before["hcp_id"], db_interaction.hcp_id}:
+            crud_hcp_activity.refresh_latest(db, hcp_id)
+        crud_analytics.queue_weeks(db, [before["occurred_at"], db_interaction.occurred_at])
+    if _feature_fields(db_interaction) != features_before:
+        for hcp_id in {before["hcp_id"], db_interaction.hcp_id} - {None}:
+            crud_hcp_features.rebuild_features(db, hcp_id)
+    if db_interaction.hcp_id != before["hcp_id"] or crud_hcp_summary.digest(db_interaction) != digest_before:
+        crud_hcp_summary.update_interaction(db, db_interaction, before["hcp_id"])
+    _refresh_fingerprint(db, db_interaction, fingerprint_before)
+    queue_event(db, "interaction.updated", interaction_event_data(db_interaction))
     db.commit()
     db.refresh(db_interaction)
-    return db_interaction
\ No newline at end of file
+    return db_interaction
+
+def _refresh_fingerprint(db: Session, db_interaction: Interaction, fingerprint_before: str):
+    """Re-keys the interaction's fingerprint after an edit of its HCP, day or text.
+
+    If another interaction already has the new fingerprint, that one keeps it: the edit is
+    saved, and a later create of the same text resolves to the older row.
+    """
+    fingerprint = interaction_fingerprint(db_interaction, db_interaction.raw_text_input)
+    if fingerprint == fingerprint_before:
+        return
+    db.query(InteractionFingerprint).filter(
+        InteractionFingerprint.fingerprint == fingerprint_before,
+        InteractionFingerprint.interaction_id == db_interaction.id,
+    ).delete(synchronize_session=False)
+    db.execute(
+        insert(InteractionFingerprint)
+        .values(fingerprint=fingerprint, interaction_id=db_interaction.id)
+        .on_conflict_do_nothing(index_elements=[InteractionFingerprint.fingerprint])
+    )
+
+def get_extraction_examples(db: Session):
+    """Chat interactions whose fields came from the LLM (or predate extracted_by), as dicts
+    with the chat text under ``text``; training data for the local extractor."""
+    query = select(
+        Interaction.id, InteractionText.raw_text_input.label("text"), HCP.name.label("hcp_name"),
+        Interaction.interaction_type, Interaction.hcp_sentiment, Interaction.attendees,
+        InteractionText.topics_discussed, Interaction.materials_shared, Interaction.samples_distributed,
+        InteractionText.outcomes, InteractionText.follow_up_actions,
+    ).select_from(Interaction)\
+        .join(InteractionText, InteractionText.interaction_id == Interaction.id)\
+        .join(HCP, HCP.id == Interaction.hcp_id)\
+        .where(InteractionText.raw_text_input.is_not(None))\
+        .where(InteractionText.extracted_by.is_(None) | (InteractionText.extracted_by == "llm"))
+    return [dict(row) for row in db.execute(query.order_by(Interaction.id)).mappings()]
+
+def _rollup_fields(db_interaction: Interaction) -> dict:
+    """Fields that feed hcp_activity and the weekly stats; an update touching none of them skips both."""
+    return {
+        field: getattr(db_interaction, field)
+        for field in ("hcp_id", "hcp_sentiment", "interaction_type", "occurred_at", "follow_up_actions")
+    }
+
+def _feature_fields(db_interaction: Interaction) -> dict:
+    """Fields that feed hcp_features; the affected HCPs' rows are rebuilt when one changes."""
+    return {
+        field: getattr(db_interaction, field)
+        for field in ("hcp_id", "occurred_at", "hcp_sentiment", "materials_shared", "samples_distributed")
+    }
+
+def stream_interaction_batches(db: Session, columns, hcp_id: int = None, start=None, end=None, batch_size: int = 1000):
+    """Yields lists of interaction rows (tuples of ``columns``) from a server-side cursor.
+
+    Rows are fetched ``batch_size`` at a time so memory stays flat regardless of table size.
+    """
+    query = select_interaction_columns(columns).order_by(Interaction.id)
+    if hcp_id is not None:
+        query = query.where(Interaction.hcp_id == hcp_id)
+    query = filter_occurred_between(query, start, end)
+
+    result = db.execute(query.execution_options(stream_results=True, yield_per=batch_size))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
@@ -0,0 +1,34 @@
+# backend/app/jobs/hcp_activity.py
+#
+# Backfills or repairs the per-HCP rollups (hcp_activity and hcp_features) from the
+# interactions table. Run it once after upgrading, and any time they are suspected to
+# have drifted:
+#
+#   python -m app.jobs.hcp_activity rebuild               # every HCP, one transaction
+#   python -m app.jobs.hcp_activity rebuild --hcp-id 42   # a single HCP
+
+import argparse
+
+from app.core.database import SessionLocal
+from app.crud.hcp_activity import rebuild_activity
+from app.crud.hcp_features import rebuild_features
+from app.models import hcp  # noqa: F401 - registers HCP for the Interaction.hcp relationship
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="hcp_activity")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser("rebuild", help="Recompute the rollups from interactions")
+    rebuild.add_argument("--hcp-id", type=int, default=None)
+
+    args = parser.parse_args(argv)
+    with SessionLocal() as db:
+        rows = rebuild_activity(db, hcp_id=args.hcp_id)
+        feature_rows = rebuild_features(db, hcp_id=args.hcp_id)
+        db.commit()
+    print(f"rebuilt {rows} hcp_activity row(s) and {feature_rows} hcp_features row(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# backend/app/jobs/hcp_summaries.py
+#
+# Compacts the rolling per-HCP history summaries (hcp_summaries) behind the agent's
+# fetch_interaction_history tool. Schedule `compact` every few minutes; `rebuild`
+# backfills after upgrading or re-summarizes from scratch:
+#
+#   python -m app.jobs.hcp_summaries compact               # stale summaries and long pending lists
+#   python -m app.jobs.hcp_summaries rebuild               # every HCP with interactions
+#   python -m app.jobs.hcp_summaries rebuild --hcp-id 42   # a single HCP
+#   ... --no-llm                                           # extractive compaction, no Groq calls
+
+import argparse
+
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models import hcp  # noqa: F401 - registers HCP for the Interaction.hcp relationship
+from app.models.interaction import Interaction
+from app.services.hcp_history import compact_hcp, hcps_to_compact
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="hcp_summaries")
+    parser.add_argument("--no-llm", action="store_true", help="Compact without calling the LLM")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compact = subparsers.add_parser("compact", help="Fold older digests into the summaries that need it")
+    compact.add_argument("--limit", type=int, default=None, help="At most this many HCPs per run")
+    rebuild = subparsers.add_parser("rebuild", help="Re-summarize from the full interaction history")
+    rebuild.add_argument("--hcp-id", type=int, default=None)
+
+    args = parser.parse_args(argv)
+    llm = None
+    if not args.no_llm:
+        from app.services.agent_loader import get_agent
+        llm = get_agent().llm
+
+    with SessionLocal() as db:
+        if args.command == "compact":
+            hcp_ids = hcps_to_compact(db, limit=args.limit)
+        elif args.hcp_id is not None:
+            hcp_ids = [args.hcp_id]
+        else:
+            hcp_ids = list(db.scalars(select(Interaction.hcp_id).where(Interaction.hcp_id.is_not(None)).distinct()))
+
+    results = []
+    for hcp_id in hcp_ids:
+        result = compact_hcp(SessionLocal, hcp_id, llm=llm, rebuild=args.command == "rebuild")
+        if result is not None:
+            results.append(result)
+            print(f"DEBUG: hcp_summaries.py - {result}")
+    folded = sum(result["folded"] for result in results)
+    print(f"compacted {len(results)} hcp_summaries row(s), {folded} interaction(s) folded")
+
+
+if __name__ == "__main__":
+    main()
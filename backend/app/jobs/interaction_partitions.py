@@ -0,0 +1,36 @@
+# backend/app/jobs/interaction_partitions.py
+#
+# Partition maintenance for the interactions table. Schedule it (cron, k8s CronJob)
+# from the backend directory:
+#
+#   python -m app.jobs.interaction_partitions create    # pre-create upcoming monthly partitions
+#   python -m app.jobs.interaction_partitions archive   # move cold partitions to compressed files
+
+import argparse
+
+from app.core.database import engine
+from app.core.partitions import archive_cold_partitions, ensure_interaction_partitions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="interaction_partitions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    create = subparsers.add_parser("create", help="Create monthly partitions ahead of today")
+    create.add_argument("--months-ahead", type=int, default=None)
+
+    archive = subparsers.add_parser("archive", help="Archive partitions older than the retention window")
+    archive.add_argument("--older-than-months", type=int, default=None)
+    archive.add_argument("--archive-dir", default=None)
+
+    args = parser.parse_args(argv)
+    if args.command == "create":
+        for name in ensure_interaction_partitions(engine, months_ahead=args.months_ahead):
+            print(name)
+    else:
+        for path in archive_cold_partitions(engine, args.older_than_months, args.archive_dir):
+            print(path)
+
+
+if __name__ == "__main__":
+    main()
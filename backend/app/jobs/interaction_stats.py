@@ -0,0 +1,36 @@
+# backend/app/jobs/interaction_stats.py
+#
+# Keeps interaction_weekly_stats (the /analytics source) current. Schedule `refresh`
+# every few minutes; `rebuild` backfills from scratch:
+#
+#   python -m app.jobs.interaction_stats refresh   # recompute weeks touched since the last run
+#   python -m app.jobs.interaction_stats rebuild   # recompute every week
+
+import argparse
+
+from app.core.database import SessionLocal, engine
+from app.crud.analytics import rebuild_stats, refresh_stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="interaction_stats")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("refresh", help="Recompute queued weeks")
+    subparsers.add_parser("rebuild", help="Recompute all weeks")
+
+    args = parser.parse_args(argv)
+    if args.command == "refresh":
+        # One snapshot for the queue and the interactions (see refresh_stats)
+        with SessionLocal(bind=engine.execution_options(isolation_level="REPEATABLE READ")) as db:
+            weeks = refresh_stats(db)
+            db.commit()
+        print(f"refreshed {len(weeks)} week(s)")
+    else:
+        with SessionLocal() as db:
+            rows = rebuild_stats(db)
+            db.commit()
+        print(f"rebuilt {rows} interaction_weekly_stats row(s)")
+
+
+if __name__ == "__main__":
+    main()
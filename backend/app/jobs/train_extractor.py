@@ -0,0 +1,46 @@
+# backend/app/jobs/train_extractor.py
+#
+# Trains the local chat field extractor from interactions whose fields the LLM extracted,
+# saves it as a new version under LOCAL_EXTRACTOR_DIR and points LATEST at it. Every
+# tenth interaction (by id) is held out and scored. Restart the API to pick up a new version.
+#
+#   python -m app.jobs.train_extractor
+#   python -m app.jobs.train_extractor --epochs 12 --min-examples 500
+
+import argparse
+import json
+import time
+
+from app.core.database import SessionLocal
+from app.crud.interaction import get_extraction_examples
+from app.services import local_extractor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="train_extractor")
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--min-examples", type=int, default=200, help="Refuse to train on fewer labeled chats")
+    parser.add_argument("--dir", default=None, help="Model directory (default: LOCAL_EXTRACTOR_DIR)")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        examples = get_extraction_examples(db)
+    training = [example for example in examples if not local_extractor.is_holdout(example["id"])]
+    holdout = [example for example in examples if local_extractor.is_holdout(example["id"])]
+    if len(training) < args.min_examples:
+        raise SystemExit(f"only {len(training)} labeled chat interaction(s); need at least {args.min_examples}")
+
+    started = time.perf_counter()
+    extractor = local_extractor.train(training, epochs=args.epochs)
+    extractor.meta["training_seconds"] = round(time.perf_counter() - started, 2)
+    if holdout:
+        extractor.meta["holdout"] = local_extractor.evaluate(extractor, holdout)
+    version = local_extractor.save_model(extractor, base_dir=args.dir)
+    print(f"trained {version} on {len(training)} chat(s) ({extractor.meta['aligned_examples']} aligned for the tagger) "
+          f"in {extractor.meta['training_seconds']}s")
+    if holdout:
+        print(json.dumps(extractor.meta["holdout"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
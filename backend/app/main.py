@@ -1,8 +1,22 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.router import api_router
 from app.core.database import Base, engine
+from app.core.partitions import ensure_interaction_partitions
+from app.core.admission import chat_admission
+from app.core.coalescing import chat_coalescer
+from app.core.compression import CompressionMiddleware, compression_stats
+from app.core.events import event_broker
+from app.core.profiling import ProfilingMiddleware
+from app.services import llm_resilience
+from app.services.agent_governor import agent_run_stats
+from app.services.hcp_history import history_stats
+from app.services.next_steps import next_step_engine
+from app.services.agent_loader import load_agent
+from app.services.write_behind import interaction_write_buffer
 
 # Create database tables
 try:
@@ -12,9 +26,35 @@ except Exception as e:
     print(f"ERROR: main.py - Failed to create database tables: {e}")
     raise e # <--- ADD THIS LINE
 
+
+def _ensure_partitions():
+    # Rows keep landing in the default partition meanwhile, so a failure must not stop
+    # the API; `python -m app.jobs.interaction_partitions create` retries it
+    try:
+        ensure_interaction_partitions(engine)
+    except Exception as e:
+        print(f"ERROR: main.py - Could not create upcoming interaction partitions: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(_ensure_partitions)
+    # Warm the agent without delaying startup; CRUD endpoints are served meanwhile
+    warmup = asyncio.create_task(load_agent()) if settings.AGENT_WARMUP_ON_STARTUP else None
+    await event_broker.start()
+    if settings.WRITE_BEHIND_ENABLED:
+        interaction_write_buffer.start()
+    yield
+    # Drain queued writes before the event broker goes, so their events are still published
+    await asyncio.to_thread(interaction_write_buffer.stop)
+    await event_broker.stop()
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Set up CORS middleware
@@ -25,10 +65,33 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES,
+    gzip_level=settings.RESPONSE_GZIP_LEVEL,
+    brotli_quality=settings.RESPONSE_BROTLI_QUALITY,
+)
+# Added last so it is outermost and profiles the other middleware too
+app.add_middleware(ProfilingMiddleware)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
 @app.get("/")
 async def root():
-    return {"message": "HCP CRM Module Backend API"}
\ No newline at end of file
+    return {"message": "HCP CRM Module Backend API"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "agent_runs": agent_run_stats.metrics(),
+        "chat_admission": chat_admission.metrics(),
+        "chat_coalescing": chat_coalescer.metrics(),
+        "compression": compression_stats.metrics(),
+        "events": event_broker.metrics(),
+        "hcp_history": history_stats.metrics(),
+        "llm": llm_resilience.metrics(),
+        "next_steps": next_step_engine.metrics(),
+        "write_behind": interaction_write_buffer.metrics(),
+    }
@@ -0,0 +1,37 @@
+from sqlalchemy import BigInteger, Column, Date, Integer, String
+from app.core.database import Base
+
+# Both stats tables are maintained by `python -m app.jobs.interaction_stats refresh`,
+# which recomputes the weeks listed in interaction_stats_queue.
+
+class InteractionWeeklyStat(Base):
+    """Interaction counts per (week, specialty, type, sentiment); small enough to scan for dashboards.
+
+    The specialty is the HCP's at the time the week was last recomputed.
+    """
+    __tablename__ = "interaction_weekly_stats"
+
+    week_start = Column(Date, primary_key=True) # Monday, in INTERACTION_TIMEZONE
+    specialty = Column(String(255), primary_key=True)
+    interaction_type = Column(String(100), primary_key=True)
+    hcp_sentiment = Column(String(50), primary_key=True)
+    interaction_count = Column(Integer, nullable=False)
+
+
+class HCPWeeklyStat(Base):
+    """Interaction counts per (HCP, week, type, sentiment), keyed by HCP first for per-HCP trends."""
+    __tablename__ = "hcp_weekly_stats"
+
+    hcp_id = Column(Integer, primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    interaction_type = Column(String(100), primary_key=True)
+    hcp_sentiment = Column(String(50), primary_key=True)
+    interaction_count = Column(Integer, nullable=False)
+
+
+class InteractionStatsQueue(Base):
+    """Weeks whose stats are stale; one row is appended per interaction write (no row locks)."""
+    __tablename__ = "interaction_stats_queue"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    week_start = Column(Date, nullable=False)
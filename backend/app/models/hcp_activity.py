@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, DateTime, Text, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+class HCPActivity(Base):
+    """Per-HCP rollup of interactions, kept current in the same transaction as each write.
+
+    Rebuild from the interactions table with `python -m app.jobs.hcp_activity rebuild`.
+    """
+    __tablename__ = "hcp_activity"
+
+    hcp_id = Column(Integer, ForeignKey("hcps.id"), primary_key=True)
+    interaction_count = Column(Integer, nullable=False, default=0)
+    sentiment_counts = Column(JSONB, nullable=False, default=dict) # e.g. {"Positive": 3, "Neutral": 1}
+    type_counts = Column(JSONB, nullable=False, default=dict) # e.g. {"Meeting": 2, "Call": 2}
+    last_interaction_id = Column(Integer, nullable=True)
+    last_interaction_at = Column(DateTime(timezone=True), nullable=True)
+    last_follow_up_actions = Column(Text, nullable=True) # From the latest interaction that had any
+    last_follow_up_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+class HCPFeatures(Base):
+    """Per-HCP inputs for next-step suggestions that hcp_activity does not already hold.
+
+    Kept current in the same transaction as each interaction write; rebuild from the
+    interactions table with `python -m app.jobs.hcp_activity rebuild`.
+    """
+    __tablename__ = "hcp_features"
+
+    hcp_id = Column(Integer, ForeignKey("hcps.id"), primary_key=True)
+    first_interaction_at = Column(DateTime(timezone=True), nullable=True)
+    recent_sentiments = Column(JSONB, nullable=False, default=list) # [[epoch seconds, interaction id, score], ...], newest first
+    materials_given = Column(JSONB, nullable=False, default=dict) # e.g. {"dosing card": 2}
+    samples_given = Column(JSONB, nullable=False, default=dict)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, Column, Integer, DateTime, Text, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+class HCPSummary(Base):
+    """Rolling interaction-history summary of one HCP, the agent's history context.
+
+    Each new interaction is appended to ``pending_digests`` as one line, in the same
+    transaction as the write; `python -m app.jobs.hcp_summaries compact` folds all but
+    the newest into ``summary`` with the LLM, off the request path.
+    """
+    __tablename__ = "hcp_summaries"
+
+    hcp_id = Column(Integer, ForeignKey("hcps.id"), primary_key=True)
+    summary = Column(Text, nullable=True) # Compacted history of summarized_count interactions
+    summarized_count = Column(Integer, nullable=False, default=0)
+    pending_digests = Column(JSONB, nullable=False, default=list) # [[epoch seconds, interaction id, digest], ...] not folded in yet
+    raw_chars = Column(BigInteger, nullable=False, default=0) # JSON size of every interaction as the API returns it
+    stale_at = Column(DateTime(timezone=True), nullable=True) # A summarized interaction changed; the next compaction starts over
+    compacted_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from app.core.database import Base
+import datetime
+
+class IdempotencyKey(Base):
+    """Stored outcome of a request sent with an Idempotency-Key header."""
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String(50), primary_key=True) # Endpoint the key was used on
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False) # Same key with a different payload is rejected
+    status_code = Column(Integer, nullable=True) # NULL while the first request is still running
+    response_body = Column(Text, nullable=True) # JSON
+    created_at = Column(DateTime, default=datetime.datetime.now) # Claim time; renewed when a stale claim is taken over
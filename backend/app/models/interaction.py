@@ -1,24 +1,96 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, DDL, event
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import datetime
 
 class Interaction(Base):
     __tablename__ = "interactions"
+    # Monthly range partitions on interaction_date (see app/core/partitions.py).
+    # PostgreSQL requires the partition key in the primary key, so it is part of it.
+    __table_args__ = (
+        Index("ix_interactions_hcp_id_interaction_date", "hcp_id", "interaction_date"),
+        Index("ix_interactions_hcp_id_occurred_at", "hcp_id", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (interaction_date)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     hcp_id = Column(Integer, ForeignKey("hcps.id"))
     hcp = relationship("HCP") # Relationship to HCP model
 
     interaction_type = Column(String(100)) # e.g., Meeting, Call, Email
-    interaction_date = Column(DateTime, default=datetime.datetime.now)
+    interaction_date = Column(DateTime, primary_key=True, default=datetime.datetime.now)
     interaction_time = Column(String(50)) # e.g., "19:36"
+    occurred_at = Column(DateTime(timezone=True), nullable=False, index=True) # interaction_date + interaction_time, timezone-aware
     attendees = Column(Text, nullable=True) # Comma-separated names or JSON string
-    topics_discussed = Column(Text, nullable=True)
     materials_shared = Column(Text, nullable=True)
     samples_distributed = Column(Text, nullable=True)
     hcp_sentiment = Column(String(50), nullable=True) # Positive, Neutral, Negative
+
+    # Long free text lives in interaction_text and is loaded on first access
+    text = relationship(
+        "InteractionText",
+        primaryjoin="Interaction.id == foreign(InteractionText.interaction_id)",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
+    topics_discussed = association_proxy("text", "topics_discussed", creator=lambda value: InteractionText(topics_discussed=value))
+    outcomes = association_proxy("text", "outcomes", creator=lambda value: InteractionText(outcomes=value))
+    follow_up_actions = association_proxy("text", "follow_up_actions", creator=lambda value: InteractionText(follow_up_actions=value))
+    summary = association_proxy("text", "summary", creator=lambda value: InteractionText(summary=value)) # AI-generated summary
+    raw_text_input = association_proxy("text", "raw_text_input", creator=lambda value: InteractionText(raw_text_input=value)) # Original text from chat
+    extracted_by = association_proxy("text", "extracted_by", creator=lambda value: InteractionText(extracted_by=value))
+
+    # Rows are still identified by id alone within the ORM
+    __mapper_args__ = {"primary_key": [id]}
+
+
+class InteractionText(Base):
+    """Large free-text fields of an interaction, one row per interaction that has any.
+
+    Keeping them off the (partitioned) interactions table keeps its rows narrow for
+    list and range queries. A low toast_tuple_target makes PostgreSQL compress values
+    from a few hundred bytes up. There is no foreign key: the interactions primary key
+    is (id, interaction_date).
+    """
+    __tablename__ = "interaction_text"
+    __table_args__ = {"postgresql_with": {"toast_tuple_target": 256}}
+
+    interaction_id = Column(Integer, primary_key=True)
+    topics_discussed = Column(Text, nullable=True)
     outcomes = Column(Text, nullable=True)
     follow_up_actions = Column(Text, nullable=True)
-    summary = Column(String, nullable=True) # AI-generated summary
-    raw_text_input = Column(String, nullable=True) # Original text from chat
\ No newline at end of file
+    summary = Column(Text, nullable=True)
+    raw_text_input = Column(Text, nullable=True)
+    # Source of the structured fields of a chat interaction: llm, local, heuristic or edit
+    extracted_by = Column(String(16), nullable=True)
+
+
+# lz4 compresses and decompresses much faster than the default pglz; use it when the
+# server was built with it (PostgreSQL 14+)
+USE_LZ4_COMPRESSION = DDL("""
+DO $$
+BEGIN
+    IF 'lz4' = ANY (SELECT unnest(enumvals) FROM pg_settings WHERE name = 'default_toast_compression') THEN
+        ALTER TABLE interaction_text
+            ALTER COLUMN topics_discussed SET COMPRESSION lz4,
+            ALTER COLUMN outcomes SET COMPRESSION lz4,
+            ALTER COLUMN follow_up_actions SET COMPRESSION lz4,
+            ALTER COLUMN summary SET COMPRESSION lz4,
+            ALTER COLUMN raw_text_input SET COMPRESSION lz4;
+    END IF;
+END $$
+""")
+event.listen(InteractionText.__table__, "after_create", USE_LZ4_COMPRESSION.execute_if(dialect="postgresql"))
+
+
+class InteractionFingerprint(Base):
+    """One row per distinct (HCP, day, normalized text); the primary key rejects duplicates.
+
+    Kept outside the partitioned interactions table because a unique index there would
+    have to include interaction_date and could not catch same-day retries.
+    """
+    __tablename__ = "interaction_fingerprints"
+
+    fingerprint = Column(String(64), primary_key=True)
+    interaction_id = Column(Integer, nullable=False, index=True)
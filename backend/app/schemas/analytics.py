@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import Dict, Optional, Union
+from datetime import date
+
+class WeeklyTrend(BaseModel):
+    week_start: date
+    group: Union[int, str] # HCP id, specialty or interaction type, depending on group_by
+    interaction_count: int
+    sentiment_counts: Dict[str, int]
+    sentiment_score: Optional[float] = None # (positive - negative) / interactions, from -1 to 1
@@ -1,10 +1,11 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from datetime import datetime
 
 class HCPBase(BaseModel):
-    name: str
-    specialty: Optional[str] = None
-    contact_info: Optional[str] = None
+    name: str = Field(min_length=1, max_length=255)
+    specialty: Optional[str] = Field(None, max_length=255)
+    contact_info: Optional[str] = Field(None, max_length=255)
 
 class HPCCreate(HCPBase):
     pass
@@ -13,4 +14,37 @@ class HCP(HCPBase):
     id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class HCPFields(BaseModel): # List responses; only the fields selected with fields= are present
+    id: int
+    name: Optional[str] = None
+    specialty: Optional[str] = None
+    contact_info: Optional[str] = None
+
+class HCPActivity(BaseModel):
+    hcp_id: int
+    interaction_count: int = 0
+    sentiment_counts: Dict[str, int] = {}
+    type_counts: Dict[str, int] = {}
+    last_interaction_id: Optional[int] = None
+    last_interaction_at: Optional[datetime] = None
+    last_follow_up_actions: Optional[str] = None
+    last_follow_up_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class NextStep(BaseModel):
+    action: str # e.g. follow_up, schedule_visit, address_concerns
+    text: str
+    reason: str
+    score: float # 0-1, higher first
+
+class HCPNextSteps(BaseModel):
+    hcp_id: int
+    hcp_name: str
+    suggestions: List[NextStep] = []
+    features: Dict[str, Any] = {} # What the suggestions were ranked from
+    phrased_by: str = "local" # "llm" when the LLM reworded the suggestion texts
+    generated_at: datetime
@@ -7,6 +7,7 @@ class InteractionBase(BaseModel):
     interaction_type: str = "Meeting"
     interaction_date: datetime = Field(default_factory=datetime.now)
     interaction_time: str = Field(default_factory=lambda: datetime.now().strftime("%H:%M"))
+    occurred_at: Optional[datetime] = None # When given, interaction_date/interaction_time are derived from it
     attendees: Optional[str] = None
     topics_discussed: Optional[str] = None
     materials_shared: Optional[str] = None
@@ -22,6 +23,7 @@ class InteractionUpdate(BaseModel): # Schema for updating interactions
     interaction_type: Optional[str] = None
     interaction_date: Optional[datetime] = None
     interaction_time: Optional[str] = None
+    occurred_at: Optional[datetime] = None
     attendees: Optional[str] = None
     topics_discussed: Optional[str] = None
     materials_shared: Optional[str] = None
@@ -38,10 +40,30 @@ class InteractionCreateFromChat(BaseModel):
     hcp_name: str
     hcp_sentiment: Optional[str] = "Neutral"
     
+class AgentMessage(BaseModel): # Free-form request for the tool-calling agent
+    message: str
+
 class Interaction(InteractionBase): # Full Interaction schema for responses
     id: int
     summary: Optional[str] = None
     raw_text_input: Optional[str] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class InteractionFields(BaseModel): # List responses; only the fields selected with fields= are present
+    id: int
+    hcp_id: Optional[int] = None
+    interaction_type: Optional[str] = None
+    interaction_date: Optional[datetime] = None
+    interaction_time: Optional[str] = None
+    occurred_at: Optional[datetime] = None
+    attendees: Optional[str] = None
+    topics_discussed: Optional[str] = None
+    materials_shared: Optional[str] = None
+    samples_distributed: Optional[str] = None
+    hcp_sentiment: Optional[str] = None
+    outcomes: Optional[str] = None
+    follow_up_actions: Optional[str] = None
+    summary: Optional[str] = None
+    raw_text_input: Optional[str] = None
\ No newline at end of file
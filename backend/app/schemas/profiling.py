@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+class ProfilingState(BaseModel):
+    enabled: bool
+    sample_rate: float
+    paths: List[str]
+    profiler: Optional[str] = None # None when pyinstrument is not installed; only SQL timings are recorded
+    output_dir: str
+    profiled_total: int
+    recent: List[Dict[str, Any]]
+
+class ProfilingUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = Field(None, ge=0, le=1)
+    paths: Optional[List[str]] = None # Path prefixes to sample; an empty list means every path
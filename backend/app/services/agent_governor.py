@@ -0,0 +1,131 @@
+# backend/app/services/agent_governor.py
+#
+# Limits and accounting for one run of the LangGraph agent (ai_agent.app_agent). The
+# governor travels in the graph state: call_model takes one step per model turn and ends
+# the run once AGENT_MAX_STEPS or the run's deadline is reached, every LLM and tool call
+# gets only the time left, read-only lookups are answered from a per-run cache after the
+# first call, and usage() is returned with the run's response.
+
+import json
+import time
+from typing import Callable, Optional
+
+from app.core.config import settings
+
+
+class AgentGovernor:
+    """Step budget, deadline, lookup cache and usage counters for a single agent run."""
+
+    def __init__(self, max_steps: Optional[int] = None, deadline: Optional[float] = None):
+        self.max_steps = max_steps or settings.AGENT_MAX_STEPS
+        self.started = time.monotonic()
+        # time.monotonic() timestamp, the same clock as the event loop's
+        self.deadline = deadline if deadline is not None else self.started + settings.AGENT_TIMEOUT_SECONDS
+        self.steps = 0
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tokens_estimated = False
+        self.tool_calls = 0
+        self.tool_cache_hits = 0
+        self.stop_reason: Optional[str] = None
+        self._tool_cache = {}
+
+    def time_left(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def begin_step(self) -> bool:
+        """Counts a model turn; False (with ``stop_reason`` set) when the run may not take another."""
+        if self.steps >= self.max_steps:
+            self.stop_reason = "max_steps"
+        elif self.time_left() <= 0:
+            self.stop_reason = "deadline"
+        else:
+            self.steps += 1
+            return True
+        return False
+
+    def record_llm_call(self, response, estimated_prompt_tokens: int = 0):
+        """Adds the provider's token usage for ``response``, or the local prompt estimate without it."""
+        self.llm_calls += 1
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            self.prompt_tokens += usage.get("input_tokens", 0)
+            self.completion_tokens += usage.get("output_tokens", 0)
+        else:
+            self.prompt_tokens += estimated_prompt_tokens
+            self.tokens_estimated = True
+
+    def call_tool(self, name: str, args: dict, run: Callable[[], dict], cacheable: bool) -> dict:
+        """Runs a tool, or returns the cached output of an identical earlier lookup.
+
+        Any tool that is not cacheable may write, so it clears the cache: a lookup after
+        create_hcp must see the new row.
+        """
+        key = json.dumps([name, args], sort_keys=True, default=str)
+        if cacheable and key in self._tool_cache:
+            self.tool_cache_hits += 1
+            return self._tool_cache[key]
+        if self.time_left() <= 0:
+            self.stop_reason = "deadline"
+            return {"status": "error", "message": f"Time ran out before '{name}' could run."}
+        self.tool_calls += 1
+        output = run()
+        if cacheable:
+            self._tool_cache[key] = output
+        else:
+            self._tool_cache.clear()
+        return output
+
+    def usage(self) -> dict:
+        return {
+            "steps": self.steps,
+            "max_steps": self.max_steps,
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls,
+            "tool_cache_hits": self.tool_cache_hits,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000, 1),
+            "stop_reason": self.stop_reason,
+        }
+
+
+class AgentRunStats:
+    """Totals over finished agent runs, for /metrics."""
+
+    def __init__(self):
+        self.runs_total = 0
+        self.stopped_max_steps_total = 0
+        self.stopped_deadline_total = 0
+        self.steps_total = 0
+        self.llm_calls_total = 0
+        self.tool_cache_hits_total = 0
+        self.tokens_total = 0
+
+    def record(self, governor: AgentGovernor):
+        self.runs_total += 1
+        if governor.stop_reason == "max_steps":
+            self.stopped_max_steps_total += 1
+        elif governor.stop_reason == "deadline":
+            self.stopped_deadline_total += 1
+        self.steps_total += governor.steps
+        self.llm_calls_total += governor.llm_calls
+        self.tool_cache_hits_total += governor.tool_cache_hits
+        self.tokens_total += governor.prompt_tokens + governor.completion_tokens
+
+    def metrics(self) -> dict:
+        return {
+            "runs_total": self.runs_total,
+            "stopped_max_steps_total": self.stopped_max_steps_total,
+            "stopped_deadline_total": self.stopped_deadline_total,
+            "average_steps": round(self.steps_total / self.runs_total, 2) if self.runs_total else 0.0,
+            "llm_calls_total": self.llm_calls_total,
+            "tool_cache_hits_total": self.tool_cache_hits_total,
+            "tokens_total": self.tokens_total,
+        }
+
+
+agent_run_stats = AgentRunStats()
@@ -0,0 +1,83 @@
+# backend/app/services/agent_history.py
+#
+# Keeps the LangGraph message list within a token budget before each model call.
+
+import json
+from typing import List, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage, ToolMessage
+
+# Rough chars-per-token ratio; gemma's tokenizer is not available locally and the
+# budget only needs to be approximately right.
+CHARS_PER_TOKEN = 4
+PER_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_tokens(messages: Sequence[BaseMessage]) -> int:
+    total = 0
+    for message in messages:
+        text = message.content if isinstance(message.content, str) else json.dumps(message.content)
+        if isinstance(message, AIMessage) and message.tool_calls:
+            text += json.dumps([call["args"] for call in message.tool_calls])
+        total += len(text) // CHARS_PER_TOKEN + PER_MESSAGE_OVERHEAD_TOKENS
+    return total
+
+
+def _turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+    """Groups an AI message that called tools with the tool results that answer it.
+
+    Trimming works on whole groups so a ToolMessage is never sent without its call.
+    """
+    groups: List[List[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, ToolMessage) and groups:
+            groups[-1].append(message)
+        else:
+            groups.append([message])
+    return groups
+
+
+def _summarize(dropped: Sequence[BaseMessage]) -> str:
+    """One line per dropped tool result; no LLM call."""
+    lines = []
+    for message in dropped:
+        if not isinstance(message, ToolMessage):
+            continue
+        try:
+            result = json.loads(message.content)
+            lines.append(f"- {message.name}: {result.get('status')} - {result.get('message', '')}")
+        except (json.JSONDecodeError, AttributeError):
+            lines.append(f"- {message.name}: {str(message.content)[:120]}")
+    skipped = len(dropped) - len(lines)
+    if skipped:
+        lines.append(f"- {skipped} earlier message(s) omitted")
+    return "Earlier steps in this request:\n" + "\n".join(lines)
+
+
+def fit_to_budget(prefix: Sequence[BaseMessage], history: Sequence[BaseMessage], budget: int) -> Tuple[List[BaseMessage], int]:
+    """Returns ``prefix`` + as much recent ``history`` as fits in ``budget`` tokens.
+
+    The first message of ``history`` (the user's request) is always kept. Groups dropped
+    from the middle are replaced by a short system note listing their tool outcomes.
+    Returns the messages to send and their estimated token count.
+    """
+    messages = list(prefix) + list(history)
+    size = count_tokens(messages)
+    if size <= budget or len(history) < 2:
+        return messages, size
+
+    first, rest = history[0], _turns(history[1:])
+    used = count_tokens(prefix) + count_tokens([first])
+    kept: List[List[BaseMessage]] = []
+    # Always keep the latest group; then walk backwards while groups still fit
+    for index, group in enumerate(reversed(rest)):
+        group_size = count_tokens(group)
+        if index and used + group_size > budget:
+            break
+        kept.insert(0, group)
+        used += group_size
+
+    dropped = [message for group in rest[:len(rest) - len(kept)] for message in group]
+    note = [SystemMessage(content=_summarize(dropped))] if dropped else []
+    messages = list(prefix) + [first] + note + [message for group in kept for message in group]
+    return messages, count_tokens(messages)
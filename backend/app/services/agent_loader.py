@@ -0,0 +1,36 @@
+# backend/app/services/agent_loader.py
+#
+# The agent module pulls in langchain_core, langchain_groq and langgraph and builds the
+# Groq clients and the compiled graph at import time. CRUD-only paths never need it, so
+# it is imported on first use (or warmed in the background at startup) and cached.
+
+import asyncio
+import importlib
+import threading
+import time
+
+_agent = None
+_lock = threading.Lock()
+
+
+def get_agent():
+    """Returns the loaded ``app.services.ai_agent`` module, importing it once."""
+    global _agent
+    if _agent is None:
+        with _lock:
+            if _agent is None:
+                started = time.perf_counter()
+                _agent = importlib.import_module("app.services.ai_agent")
+                print(f"DEBUG: agent_loader.py - Agent loaded in {time.perf_counter() - started:.2f}s.")
+    return _agent
+
+
+async def load_agent():
+    """Loads the agent in a worker thread so the event loop keeps serving requests."""
+    if _agent is not None:
+        return _agent
+    return await asyncio.to_thread(get_agent)
+
+
+def is_loaded() -> bool:
+    return _agent is not None
@@ -1,9 +1,10 @@
 # backend/app/services/ai_agent.py
 
+import inspect
 import operator
 import re
 from typing import Annotated, Any, Dict, List, Optional, Sequence, TypedDict
-from langchain_core.messages import BaseMessage, FunctionMessage, HumanMessage, ToolMessage, AIMessage
+from langchain_core.messages import BaseMessage, FunctionMessage, HumanMessage, ToolMessage, AIMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_groq import ChatGroq
@@ -11,9 +12,16 @@ from langgraph.graph import StateGraph, END, START
 from langchain_core.tools import tool
 
 from app.core.config import settings
-from app.crud import hcp as crud_hcp, interaction as crud_interaction
+from app.core.database import SessionLocal
+from app.crud import hcp as crud_hcp, hcp_activity as crud_hcp_activity, interaction as crud_interaction
+from app.services.llm_resilience import CircuitOpenError, DeadlineExceeded, resilient
+from app.services.agent_governor import AgentGovernor, agent_run_stats
+from app.services import local_extractor
+from app.services.agent_history import count_tokens, fit_to_budget
+from app.services.hcp_history import history_context
+from app.services.next_steps import next_step_engine
 from app.schemas.interaction import InteractionCreate, InteractionUpdate, Interaction
-from app.schemas.hcp import HPCCreate, HCP
+from app.schemas.hcp import HPCCreate, HCP, HCPActivity
 from sqlalchemy.orm import Session
 import json
 import asyncio
@@ -81,8 +89,8 @@ def parse_interaction_from_response(response_text: str) -> Dict[str, Any]:
     parsed_data = {
         'hcp_name': '',
         'interaction_type': 'Meeting',
-        'interaction_date': datetime.now().strftime("%Y-%m-%d"),
-        'interaction_time': datetime.now().strftime("%H:%M"),
+        'interaction_date': None, # None = not mentioned; the write path defaults to now
+        'interaction_time': None,
         'attendees': '',
         'topics_discussed': '',
         'materials_shared': '',
@@ -141,37 +149,117 @@ def parse_interaction_from_response(response_text: str) -> Dict[str, Any]:
 
     return parsed_data
 
-async def process_chat_input(db: Session, user_message: str):
+# Prompt templates are compiled once at import and reused for every request
+# MODIFIED PROMPT: Emphasize extracting HCP Name consistently
+EXTRACTION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an AI assistant for logging and editing HCP interactions. "
+               "Your primary goal is to extract specific details from the user's message "
+               "and output them in a structured, concise manner, ideally as key-value pairs. "
+               "**Always prioritize extracting the HCP name if it is mentioned or implied.** " # <-- ADDED EMPHASIS
+               "Extract the following: "
+               "1. HCP name (e.g., 'Dr. Jane Smith')"
+               "2. Topics discussed"
+               "3. Materials shared"
+               "4. Samples distributed"
+               "5. HCP sentiment (Positive, Neutral, Negative)"
+               "6. Outcomes"
+               "7. Follow-up actions"
+               "8. If the user is referring to a specific interaction ID (e.g., 'interaction 123'), extract that too." # <-- ADDED FOR EDITING
+               "If a detail is not present or implies 'none', indicate 'Not mentioned' or leave it blank. "
+               "Example: 'HCP Name: Dr. Emily White. Topics: Product X. Sentiment: Positive. Interaction ID: Not mentioned.'"), # <-- UPDATED EXAMPLE
+    ("human", "{user_input}")
+])
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Create a concise 1-2 sentence summary of the following interaction:"),
+    ("human", "{user_input}")
+])
+
+TOOL_SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert summarizer. Summarize the following interaction details concisely, focusing on key points, discussions, and outcomes. The summary should be suitable for a CRM interaction log."),
+    ("human", "{user_input}")
+])
+
+
+def parse_interaction_from_heuristics(user_message: str) -> Dict[str, Any]:
+    """Regex-only extraction used when the LLM is unavailable (circuit open)."""
+    parsed_data = parse_interaction_from_response("")
+    parsed_data.update({k: v for k, v in extract_interaction_details(user_message).items() if v})
+    return parsed_data
+
+# Edits name the interaction they change; only the LLM extraction reports that ID
+INTERACTION_REFERENCE = re.compile(r"\binteraction\s*(?:id|#|no\.?|number)?\s*:?\s*#?\d+", re.IGNORECASE)
+
+def parse_interaction_locally(user_message: str, require_confidence: bool = True) -> Optional[Dict[str, Any]]:
+    """Fields from the local extractor, or None when the LLM should extract them instead.
+
+    That is the case when no model is trained, the message refers to an interaction ID,
+    no HCP name was found, or (with ``require_confidence``) the model is less sure than
+    LOCAL_EXTRACTOR_MIN_CONFIDENCE.
+    """
+    extractor = local_extractor.get_extractor()
+    if extractor is None or INTERACTION_REFERENCE.search(user_message):
+        return None
+    prediction = extractor.predict(user_message)
+    print(f"DEBUG: Local extraction (model {extractor.version}) confidence {prediction['confidence']:.3f}: {prediction['confidences']}")
+    if not prediction["fields"]["hcp_name"]:
+        return None
+    if require_confidence and prediction["confidence"] < settings.LOCAL_EXTRACTOR_MIN_CONFIDENCE:
+        return None
+    parsed_data = parse_interaction_from_response("")
+    parsed_data.update({k: v for k, v in prediction["fields"].items() if v})
+    return parsed_data
+
+async def process_chat_input(user_message: str, session_factory=SessionLocal, deadline: Optional[float] = None):
+    """Runs the chat pipeline: LLM extraction and summary first, then the database write.
+
+    ``session_factory`` is only called once the LLM stage has finished, so no connection
+    is held while waiting on Groq. ``deadline`` is an event-loop timestamp shared with
+    the caller (including any time spent queued); it defaults to CHAT_TIMEOUT_SECONDS from now.
+    The result carries a ``usage`` block (LLM calls, tokens, elapsed time) like run_agent's.
+    """
+    if deadline is None:
+        deadline = asyncio.get_running_loop().time() + settings.CHAT_TIMEOUT_SECONDS
+    # The loop's clock is time.monotonic(), the governor's
+    governor = AgentGovernor(deadline=deadline)
+    result = await _process_chat_input(user_message, session_factory, deadline, governor)
+    result["usage"] = governor.usage()
+    print(f"DEBUG: process_chat_input - {result['usage']}")
+    return result
+
+async def _process_chat_input(user_message: str, session_factory, deadline: float, governor: AgentGovernor):
     try:
-        async with asyncio.timeout(30):
-            # MODIFIED PROMPT: Emphasize extracting HCP Name consistently
-            extraction_prompt = ChatPromptTemplate.from_messages([
-                ("system", "You are an AI assistant for logging and editing HCP interactions. "
-                           "Your primary goal is to extract specific details from the user's message "
-                           "and output them in a structured, concise manner, ideally as key-value pairs. "
-                           "**Always prioritize extracting the HCP name if it is mentioned or implied.** " # <-- ADDED EMPHASIS
-                           "Extract the following: "
-                           "1. HCP name (e.g., 'Dr. Jane Smith')"
-                           "2. Topics discussed"
-                           "3. Materials shared"
-                           "4. Samples distributed"
-                           "5. HCP sentiment (Positive, Neutral, Negative)"
-                           "6. Outcomes"
-                           "7. Follow-up actions"
-                           "8. If the user is referring to a specific interaction ID (e.g., 'interaction 123'), extract that too." # <-- ADDED FOR EDITING
-                           "If a detail is not present or implies 'none', indicate 'Not mentioned' or leave it blank. "
-                           "Example: 'HCP Name: Dr. Emily White. Topics: Product X. Sentiment: Positive. Interaction ID: Not mentioned.'"), # <-- UPDATED EXAMPLE
-                ("human", "{user_input}")
-            ]).format_prompt(user_input=user_message)
-
-            llm_extraction_response = await llm.ainvoke(extraction_prompt.to_messages())
-            
-            if not llm_extraction_response.content:
+        async with asyncio.timeout_at(deadline):
+            # A confident local extraction skips the LLM extraction call entirely
+            interaction_data = parse_interaction_locally(user_message)
+            extracted_by = "local"
+            if interaction_data is not None:
+                extraction_text = ""
+            else:
+                extracted_by = "llm"
+                extraction_messages = EXTRACTION_PROMPT.format_prompt(user_input=user_message).to_messages()
+                try:
+                    llm_extraction_response = await llm.ainvoke(extraction_messages, deadline=deadline)
+                    governor.record_llm_call(llm_extraction_response, count_tokens(extraction_messages))
+                    extraction_text = llm_extraction_response.content
+                except CircuitOpenError:
+                    print("DEBUG: LLM circuit open; falling back to local or heuristic extraction.")
+                    extraction_text = None
+
+            if interaction_data is not None:
+                print("DEBUG: Using local extraction; LLM extraction skipped.")
+            elif extraction_text is None:
+                interaction_data = parse_interaction_locally(user_message, require_confidence=False)
+                extracted_by = "local"
+                if interaction_data is None:
+                    interaction_data = parse_interaction_from_heuristics(user_message)
+                    extracted_by = "heuristic"
+                extraction_text = ""
+            elif not extraction_text:
                 return {"status": "error", "response": "AI agent could not extract information. Please try rephrasing."}
-            
-            print(f"DEBUG: LLM Extraction Response Content: {llm_extraction_response.content}")
-
-            interaction_data = parse_interaction_from_response(llm_extraction_response.content)
+            else:
+                print(f"DEBUG: LLM Extraction Response Content: {extraction_text}")
+                interaction_data = parse_interaction_from_response(extraction_text)
             
             print(f"DEBUG: Parsed Interaction Data (from LLM output): {interaction_data}")
 
@@ -192,19 +280,20 @@ async def process_chat_input(db: Session, user_message: str):
                 return {"status": "error", "response": "Could not identify HCP name from your input. Please specify the HCP (e.g., 'Dr. John Doe')."}
 
 
-            summary_prompt = ChatPromptTemplate.from_messages([
-                ("system", "Create a concise 1-2 sentence summary of the following interaction:"),
-                ("human", user_message)
-            ])
-            summary_response = await llm.ainvoke(summary_prompt.format_prompt())
-            summary = summary_response.content if summary_response.content else user_message[:200]
+            try:
+                summary_messages = SUMMARY_PROMPT.format_prompt(user_input=user_message).to_messages()
+                summary_response = await llm.ainvoke(summary_messages, deadline=deadline)
+                governor.record_llm_call(summary_response, count_tokens(summary_messages))
+                summary = summary_response.content if summary_response.content else user_message[:200]
+            except CircuitOpenError:
+                summary = user_message[:200]
             
             print(f"DEBUG: Generated Summary: {summary}")
 
             # Check if an interaction ID was extracted for editing purposes
             # We add a new field 'interaction_id' to `parsed_data` based on LLM output
             extracted_interaction_id = None
-            id_match = re.search(r"Interaction ID:\s*(\d+)", llm_extraction_response.content, re.IGNORECASE)
+            id_match = re.search(r"Interaction ID:\s*(\d+)", extraction_text, re.IGNORECASE)
             if id_match:
                 try:
                     extracted_interaction_id = int(id_match.group(1))
@@ -212,60 +301,63 @@ async def process_chat_input(db: Session, user_message: str):
                 except ValueError:
                     pass # Not a valid number
 
-            if extracted_interaction_id:
-                # This suggests an edit operation
-                # Construct kwargs for edit_internal_interaction from interaction_data
-                edit_kwargs = {k: v for k, v in interaction_data.items() if k not in ['hcp_name', 'interaction_type', 'interaction_date', 'interaction_time'] and v}
+            # LLM stage is done; only now take a database session
+            with session_factory() as db:
+                if extracted_interaction_id:
+                    # This suggests an edit operation
+                    # Construct kwargs for edit_internal_interaction from interaction_data
+                    edit_kwargs = {k: v for k, v in interaction_data.items() if k not in ['hcp_name', 'interaction_type', 'interaction_date', 'interaction_time'] and v}
                 
-                # If HCP name changed in the prompt, find the new hcp_id
-                hcp_to_edit_obj = crud_hcp.get_hcp_by_name(db, interaction_data['hcp_name'])
-                if not hcp_to_edit_obj:
-                    return {"status": "error", "response": f"HCP '{interaction_data['hcp_name']}' not found for editing interaction. Please create it first."}
-                edit_kwargs['hcp_id'] = hcp_to_edit_obj.id
-
-                # Include other potential edits like type, date, time if explicitly extracted
-                if interaction_data['interaction_type'] != 'Meeting': # if changed from default
-                    edit_kwargs['interaction_type'] = interaction_data['interaction_type']
-                if interaction_data['interaction_date'] != datetime.now().strftime("%Y-%m-%d"):
-                    edit_kwargs['interaction_date'] = interaction_data['interaction_date']
-                if interaction_data['interaction_time'] != datetime.now().strftime("%H:%M"):
-                    edit_kwargs['interaction_time'] = interaction_data['interaction_time']
-
-                # Always update summary and raw_text_input for edits from chat
-                edit_kwargs['summary'] = summary
-                edit_kwargs['raw_text_input'] = user_message
-
-                result = edit_internal_interaction(db, extracted_interaction_id, **edit_kwargs)
-                print(f"DEBUG: Result from edit_internal_interaction: {result}") # Debug print
-                return {
-                    "status": "success",
-                    "response": result.get("message", "Interaction updated successfully!"),
-                    "interaction_object": result.get("interaction_object")
-                }
-            else:
-                # This suggests a log operation (if no interaction ID for edit)
-                result = log_internal_interaction(
-                    db=db,
-                    hcp_name=interaction_data['hcp_name'],
-                    interaction_type=interaction_data['interaction_type'],
-                    interaction_date=interaction_data['interaction_date'],
-                    interaction_time=interaction_data['interaction_time'],
-                    attendees=interaction_data['attendees'],
-                    topics_discussed=interaction_data['topics_discussed'],
-                    materials_shared=interaction_data['materials_shared'],
-                    samples_distributed=interaction_data['samples_distributed'],
-                    hcp_sentiment=interaction_data['hcp_sentiment'],
-                    outcomes=interaction_data['outcomes'],
-                    follow_up_actions=interaction_data['follow_up_actions'],
-                    summary=summary,
-                    raw_text_input=user_message
-                )
-                print(f"DEBUG: Result from log_internal_interaction: {result}")
-                return {
-                    "status": "success",
-                    "response": result.get("message", "Interaction logged successfully!"),
-                    "interaction_object": result.get("interaction_object")
-                }
+                    # If HCP name changed in the prompt, find the new hcp_id
+                    hcp_to_edit_obj = crud_hcp.get_hcp_by_name(db, interaction_data['hcp_name'])
+                    if not hcp_to_edit_obj:
+                        return {"status": "error", "response": f"HCP '{interaction_data['hcp_name']}' not found for editing interaction. Please create it first."}
+                    edit_kwargs['hcp_id'] = hcp_to_edit_obj.id
+
+                    # Include other potential edits like type, date, time if explicitly extracted
+                    if interaction_data['interaction_type'] != 'Meeting': # if changed from default
+                        edit_kwargs['interaction_type'] = interaction_data['interaction_type']
+                    if interaction_data['interaction_date']:
+                        edit_kwargs['interaction_date'] = interaction_data['interaction_date']
+                    if interaction_data['interaction_time']:
+                        edit_kwargs['interaction_time'] = interaction_data['interaction_time']
+
+                    # Always update summary and raw_text_input for edits from chat
+                    edit_kwargs['summary'] = summary
+                    edit_kwargs['raw_text_input'] = user_message
+
+                    result = edit_internal_interaction(db, extracted_interaction_id, **edit_kwargs)
+                    print(f"DEBUG: Result from edit_internal_interaction: {result}") # Debug print
+                    return {
+                        "status": "success",
+                        "response": result.get("message", "Interaction updated successfully!"),
+                        "interaction_object": result.get("interaction_object")
+                    }
+                else:
+                    # This suggests a log operation (if no interaction ID for edit)
+                    result = log_internal_interaction(
+                        db=db,
+                        hcp_name=interaction_data['hcp_name'],
+                        interaction_type=interaction_data['interaction_type'],
+                        interaction_date=interaction_data['interaction_date'],
+                        interaction_time=interaction_data['interaction_time'],
+                        attendees=interaction_data['attendees'],
+                        topics_discussed=interaction_data['topics_discussed'],
+                        materials_shared=interaction_data['materials_shared'],
+                        samples_distributed=interaction_data['samples_distributed'],
+                        hcp_sentiment=interaction_data['hcp_sentiment'],
+                        outcomes=interaction_data['outcomes'],
+                        follow_up_actions=interaction_data['follow_up_actions'],
+                        summary=summary,
+                        raw_text_input=user_message,
+                        extracted_by=extracted_by,
+                    )
+                    print(f"DEBUG: Result from log_internal_interaction: {result}")
+                    return {
+                        "status": "success",
+                        "response": result.get("message", "Interaction logged successfully!"),
+                        "interaction_object": result.get("interaction_object")
+                    }
 
     except asyncio.TimeoutError:
         return {
@@ -552,12 +644,34 @@ def get_hcp_by_name_wrapper(name: str):
     pass
 
 
+class SuggestNextStepsInput(BaseModel):
+    """Input for suggesting next steps with an HCP."""
+    hcp_name: str = Field(description="The name of the Healthcare Professional to suggest next steps for.")
+
+@tool("suggest_next_steps", args_schema=SuggestNextStepsInput)
+def suggest_next_steps_wrapper(hcp_name: str):
+    """Suggests ranked next steps (follow-ups, visits, materials) for an HCP based on their interaction history."""
+    pass
+
+
+class FetchInteractionHistoryInput(BaseModel):
+    """Input for fetching the interaction history of an HCP."""
+    hcp_name: str = Field(description="The name of the Healthcare Professional whose interaction history is needed.")
+
+@tool("fetch_interaction_history", args_schema=FetchInteractionHistoryInput)
+def fetch_interaction_history_wrapper(hcp_name: str):
+    """Fetches a summary of all past interactions with an HCP plus the most recent ones. Use it for context on an HCP's history."""
+    pass
+
+
 # --- Helper functions that interact with DB via CRUD ops ---
 def create_internal_hcp(db: Session, name: str, specialty: Optional[str] = None, contact_info: Optional[str] = None):
     """Internal function to handle creating HCP with db session and proper return."""
     hcp_data = HPCCreate(name=name, specialty=specialty, contact_info=contact_info)
     try:
         db_hcp = crud_hcp.create_hcp(db, hcp_data)
+        if db_hcp is None:
+            return {"status": "error", "message": f"HCP '{name}' already exists."}
         return {"status": "success", "message": f"HCP '{db_hcp.name}' created with ID {db_hcp.id}.", "hcp": HCP.from_orm(db_hcp).model_dump()}
     except Exception as e:
         return {"status": "error", "message": f"Failed to create HCP: {str(e)}"}
@@ -577,7 +691,8 @@ def log_internal_interaction(
     outcomes: str = None,
     follow_up_actions: str = None,
     summary: str = None,
-    raw_text_input: str = None
+    raw_text_input: str = None,
+    extracted_by: str = None,
 ):
     """Fixed function with all expected parameters"""
 
@@ -607,7 +722,7 @@ def log_internal_interaction(
     )
 
     try:
-        db_interaction = crud_interaction.create_interaction(db, interaction_data)
+        db_interaction = crud_interaction.create_interaction(db, interaction_data, summary=summary, raw_text_input=raw_text_input, extracted_by=extracted_by)
         return {
             "status": "success",
             "message": f"Interaction logged for {hcp_name}",
@@ -617,6 +732,7 @@ def log_internal_interaction(
                 "interaction_type": db_interaction.interaction_type,
                 "interaction_date": db_interaction.interaction_date.isoformat(),
                 "interaction_time": db_interaction.interaction_time,
+                "occurred_at": db_interaction.occurred_at.isoformat(),
                 "attendees": db_interaction.attendees,
                 "topics_discussed": db_interaction.topics_discussed,
                 "materials_shared": db_interaction.materials_shared,
@@ -652,10 +768,7 @@ def edit_internal_interaction(db: Session, interaction_id: int, hcp_id: Optional
             return {"status": "error", "message": f"Interaction with ID {interaction_id} not found."}
         # --- IMPORTANT CHANGE: Return the full interaction_object here ---
         # Ensure datetimes are serialized to strings
-        interaction_dict = Interaction.from_orm(db_interaction).model_dump()
-        if 'interaction_date' in interaction_dict and isinstance(interaction_dict['interaction_date'], datetime):
-            interaction_dict['interaction_date'] = interaction_dict['interaction_date'].isoformat()
-        # Add other datetime fields if needed
+        interaction_dict = Interaction.from_orm(db_interaction).model_dump(mode="json")
         return {"status": "success", "message": f"Interaction {db_interaction.id} updated successfully! HCP: {db_interaction.hcp.name if db_interaction.hcp else 'Unknown'}", "interaction_object": interaction_dict}
     except Exception as e:
         return {"status": "error", "message": f"Failed to update interaction {interaction_id}: {str(e)}"}
@@ -668,9 +781,7 @@ def get_internal_most_recent_interaction_by_hcp_name(db: Session, hcp_name: str)
         return {"status": "error", "message": f"No recent interaction found for HCP '{hcp_name}'."}
 
     # Convert SQLAlchemy model to Pydantic model for JSON serialization
-    interaction_dict = Interaction.from_orm(db_interaction).model_dump()
-    if 'interaction_date' in interaction_dict and isinstance(interaction_dict['interaction_date'], datetime):
-        interaction_dict['interaction_date'] = interaction_dict['interaction_date'].isoformat()
+    interaction_dict = Interaction.from_orm(db_interaction).model_dump(mode="json")
     return {"status": "success", "message": f"Found interaction {db_interaction.id} for {hcp_name}.", "interaction_object": interaction_dict} # Changed 'interaction' to 'interaction_object' for consistency
 
 
@@ -680,7 +791,33 @@ def get_internal_hcp_by_name(db: Session, name: str):
     db_hcp = crud_hcp.get_hcp_by_name(db, name)
     if not db_hcp:
         return {"status": "error", "message": f"HCP '{name}' not found. Please create HCP first."}
-    return {"status": "success", "message": f"Found HCP '{db_hcp.name}' with ID {db_hcp.id}.", "hcp_id": db_hcp.id}
+    activity = crud_hcp_activity.get_activity(db, db_hcp.id)
+    activity_dict = HCPActivity.model_validate(activity).model_dump(mode="json") if activity else HCPActivity(hcp_id=db_hcp.id).model_dump(mode="json")
+    return {"status": "success", "message": f"Found HCP '{db_hcp.name}' with ID {db_hcp.id}.", "hcp_id": db_hcp.id, "activity": activity_dict}
+
+
+def get_internal_next_steps(db: Session, hcp_name: str):
+    """Internal function to suggest next steps for an HCP from its precomputed features."""
+    db_hcp = crud_hcp.get_hcp_by_name(db, hcp_name)
+    if not db_hcp:
+        return {"status": "error", "message": f"HCP '{hcp_name}' not found."}
+    result = next_step_engine.suggest(db, db_hcp)
+    steps = "\n".join(f"{number}. {step.text} ({step.reason})" for number, step in enumerate(result.suggestions, start=1))
+    return {
+        "status": "success",
+        "message": f"Suggested next steps for {db_hcp.name}:\n{steps}",
+        "suggestions": [step.model_dump() for step in result.suggestions],
+    }
+
+
+def get_internal_interaction_history(db: Session, hcp_name: str):
+    """Internal function returning an HCP's bounded history context from the rolling summary."""
+    db_hcp = crud_hcp.get_hcp_by_name(db, hcp_name)
+    if not db_hcp:
+        return {"status": "error", "message": f"HCP '{hcp_name}' not found."}
+    history = history_context(db, db_hcp)
+    print(f"DEBUG: fetch_interaction_history - {history['context_tokens']} context tokens instead of ~{history['raw_tokens']} for the raw rows")
+    return {"status": "success", "message": history["context"], "tokens_saved": history["tokens_saved"]}
 
 
 # --- This is the dictionary mapping tool names to the actual functions that perform the database ops ---
@@ -690,6 +827,8 @@ internal_tool_implementations = {
     "edit_interaction": lambda db, **kwargs: edit_internal_interaction(db, **kwargs),
     "get_most_recent_interaction_by_hcp_name": lambda db, **kwargs: get_internal_most_recent_interaction_by_hcp_name(db, **kwargs),
     "get_hcp_by_name": lambda db, **kwargs: get_internal_hcp_by_name(db, **kwargs),
+    "suggest_next_steps": lambda db, **kwargs: get_internal_next_steps(db, **kwargs),
+    "fetch_interaction_history": lambda db, **kwargs: get_internal_interaction_history(db, **kwargs),
 }
 
 
@@ -703,26 +842,32 @@ class AgentState(TypedDict):
     hcp_id_for_edit: Optional[int]
     old_hcp_name_for_correction: Optional[str]
     new_hcp_name_for_correction: Optional[str]
+    prompt_tokens: Annotated[List[int], operator.add] # Estimated prompt size of each model turn
+    governor: AgentGovernor # Step budget, deadline, lookup cache and usage for this run
 
 
 # --- 3. Initialize the LLM and Bind Tools ---
 
-llm = ChatGroq(temperature=0, model_name="gemma2-9b-it", groq_api_key=settings.GROQ_API_KEY)
+groq_llm = ChatGroq(temperature=0, model_name="gemma2-9b-it", groq_api_key=settings.GROQ_API_KEY)
 
-llm_with_tools = llm.bind_tools([
+# Both clients share one circuit breaker; see app/services/llm_resilience.py
+llm = resilient(groq_llm, "llm")
+
+llm_with_tools = resilient(groq_llm.bind_tools([
     create_hcp_tool_wrapper,
     log_interaction_tool_wrapper,
     edit_interaction_tool_wrapper,
     get_most_recent_interaction_by_hcp_name_wrapper,
-    get_hcp_by_name_wrapper
-])
+    get_hcp_by_name_wrapper,
+    suggest_next_steps_wrapper,
+    fetch_interaction_history_wrapper,
+]), "llm_with_tools")
 
 
 # --- 4. Define Nodes and Edges for the LangGraph ---
 
-def call_model(state: AgentState):
-    messages = state["messages"]
-    system_message_content = """You are an AI assistant for a life science field representative.
+# Built once; cleandoc strips the source indentation so it is not sent as tokens
+AGENT_SYSTEM_PROMPT = inspect.cleandoc("""You are an AI assistant for a life science field representative.
     Your primary goal is to help log and manage interactions with Healthcare Professionals (HCPs).
     You can perform the following actions:
     1. Log a new interaction: Use the `log_interaction` tool.
@@ -733,29 +878,59 @@ def call_model(state: AgentState):
           - **Step 1: Get Old Interaction ID**: Call `get_most_recent_interaction_by_hcp_name` using the *incorrect/old* HCP name.
           - **Step 2: Get New HCP ID**: Call `get_hcp_by_name` using the *new/correct* HCP name.
           - **Step 3: Edit Interaction**: Call `edit_interaction` using the `interaction_id` found in Step 1, and the `hcp_id` found in Step 2.
+    4. Suggest next steps for an HCP (e.g., "What should I do next with Dr. Smith?"): Use the `suggest_next_steps` tool.
+    5. Answer questions about past interactions with an HCP (e.g., "What did I discuss with Dr. Smith?"): Use the `fetch_interaction_history` tool, then answer from the history it returns.
 
-    Always try to extract all necessary information from the user's request. If you need more information (e.g., "Which interaction for Dr. Smith?", "What is the new name?"), askгих specific questions.
+    Always try to extract all necessary information from the user's request. If you need more information (e.g., "Which interaction for Dr. Smith?", "What is the new name?"), ask specific questions.
     If you log or edit successfully, confirm it to the user.
-    """
+    """)
+
+
+# Lookups that only read; repeating one with the same arguments in a run is served from the governor's cache
+READ_ONLY_TOOLS = {"get_most_recent_interaction_by_hcp_name", "get_hcp_by_name", "suggest_next_steps", "fetch_interaction_history"}
+
+STOPPED_RESPONSES = {
+    "max_steps": "I could not finish this request within the allowed number of steps. Please try a more specific request.",
+    "deadline": "I ran out of time processing this request. Please try again or simplify your request.",
+}
+
 
-    updated_messages = []
-    # Add state context to messages for the LLM
+def call_model(state: AgentState):
+    messages = state["messages"]
+    governor = state["governor"]
+    if not governor.begin_step():
+        print(f"WARNING: call_model - stopping agent run ({governor.stop_reason}) after {governor.steps} steps")
+        return {"messages": [AIMessage(content=STOPPED_RESPONSES[governor.stop_reason])]}
+
+    # Tool context from earlier steps goes into the single system message instead of
+    # separate AIMessages, so it is sent once per turn
+    context_lines = []
     if state.get("found_interaction_id") is not None:
-        updated_messages.append(AIMessage(content=f"Tool Context: Previous step found interaction ID: {state['found_interaction_id']}"))
+        context_lines.append(f"Previous step found interaction ID: {state['found_interaction_id']}")
     if state.get("hcp_id_for_edit") is not None:
-        updated_messages.append(AIMessage(content=f"Tool Context: Previous step found new HCP ID: {state['hcp_id_for_edit']}"))
+        context_lines.append(f"Previous step found new HCP ID: {state['hcp_id_for_edit']}")
     if state.get("old_hcp_name_for_correction"):
-        updated_messages.append(AIMessage(content=f"Tool Context: Old HCP Name: {state['old_hcp_name_for_correction']}"))
+        context_lines.append(f"Old HCP Name: {state['old_hcp_name_for_correction']}")
     if state.get("new_hcp_name_for_correction"):
-        updated_messages.append(AIMessage(content=f"Tool Context: New HCP Name: {state['new_hcp_name_for_correction']}"))
+        context_lines.append(f"New HCP Name: {state['new_hcp_name_for_correction']}")
 
-    # Prepend the system message if not already present or if new system message
-    if messages and not (isinstance(messages[0], AIMessage) and messages[0].content == system_message_content):
-        updated_messages.append(AIMessage(content=system_message_content))
-    updated_messages.extend(messages) # Add original messages last
+    system_content = AGENT_SYSTEM_PROMPT
+    if context_lines:
+        system_content += "\nTool Context:\n" + "\n".join(context_lines)
+
+    prompt_messages, prompt_tokens = fit_to_budget(
+        [SystemMessage(content=system_content)], messages, settings.AGENT_HISTORY_TOKEN_BUDGET
+    )
+    print(f"DEBUG: call_model - turn {governor.steps}/{governor.max_steps}: "
+          f"~{prompt_tokens} prompt tokens, {len(prompt_messages)}/{len(messages) + 1} messages sent")
 
-    response = llm_with_tools.invoke(updated_messages)
-    return {"messages": [response]}
+    try:
+        response = llm_with_tools.invoke(prompt_messages, deadline=governor.deadline)
+    except DeadlineExceeded:
+        governor.stop_reason = "deadline"
+        return {"messages": [AIMessage(content=STOPPED_RESPONSES["deadline"])]}
+    governor.record_llm_call(response, prompt_tokens)
+    return {"messages": [response], "prompt_tokens": [prompt_tokens]}
 
 
 def call_tool(state: AgentState):
@@ -763,6 +938,7 @@ def call_tool(state: AgentState):
     last_message = messages[-1]
     db_session = state["db_session"]
     user_input = state["user_input"]
+    governor = state["governor"]
 
     # Initialize state updates that might be passed back
     state_updates = {}
@@ -779,17 +955,23 @@ def call_tool(state: AgentState):
                 # Special handling for log_interaction summary/raw_text_input
                 current_summary = tool_args.get("summary")
                 if tool_name == "log_interaction" and not current_summary and user_input:
-                    summary_prompt = ChatPromptTemplate.from_messages([
-                        ("system", "You are an expert summarizer. Summarize the following interaction details concisely, focusing on key points, discussions, and outcomes. The summary should be suitable for a CRM interaction log."),
-                        ("human", user_input)
-                    ])
-                    summary_response = llm.invoke(summary_prompt)
-                    tool_args["summary"] = summary_response.content
+                    try:
+                        summary_response = llm.invoke(TOOL_SUMMARY_PROMPT.format_prompt(user_input=user_input), deadline=governor.deadline)
+                        governor.record_llm_call(summary_response)
+                        tool_args["summary"] = summary_response.content
+                    except (CircuitOpenError, DeadlineExceeded):
+                        tool_args["summary"] = user_input[:200]
 
                 if tool_name == "log_interaction" and "raw_text_input" not in tool_args:
                     tool_args["raw_text_input"] = user_input
+                if tool_name == "log_interaction":
+                    tool_args["extracted_by"] = "llm"
 
-                output = tool_function_to_call(db=db_session, **tool_args)
+                output = governor.call_tool(
+                    tool_name, tool_args,
+                    lambda: tool_function_to_call(db=db_session, **tool_args),
+                    cacheable=tool_name in READ_ONLY_TOOLS,
+                )
                 tool_outputs.append(ToolMessage(content=json.dumps(output), name=tool_call["name"], tool_call_id=tool_call["id"]))
 
                 # --- Handle state updates based on tool outputs for multi-step ops ---
@@ -833,6 +1015,10 @@ def route_after_tool_call(state: AgentState) -> str:
                 # After finding new HCP ID, route back to model to perform edit_interaction
                 return "call_model"
 
+            elif tool_name_from_output == "fetch_interaction_history" and content_dict.get("status") == "success":
+                # The history is context; the model still has to answer with it
+                return "call_model"
+
             # If any other tool (log, edit) returned a definitive status, or if previous steps are done, end.
             elif content_dict.get("status") in ["success", "error"]:
                 return END # End the graph
@@ -855,7 +1041,7 @@ workflow.add_conditional_edges(
     # If model returns tool_calls, go to call_tool. Otherwise, it's a final text response and END.
     # Note: If this directly goes to END without a message, process_chat_input will handle.
     lambda state: "call_tool" if state["messages"][-1].tool_calls else END,
-    {"call_tool": "call_tool"},
+    {"call_tool": "call_tool", END: END},
 )
 workflow.add_conditional_edges( # New conditional edge after call_tool
     "call_tool",
@@ -864,4 +1050,49 @@ workflow.add_conditional_edges( # New conditional edge after call_tool
 )
 
 # IMPORTANT: Set checkpointer=None for development if not using state persistence
-app_agent = workflow.compile(checkpointer=None)
\ No newline at end of file
+app_agent = workflow.compile(checkpointer=None)
+
+
+def run_agent(user_message: str, session_factory=SessionLocal, deadline: Optional[float] = None, max_steps: Optional[int] = None) -> dict:
+    """Runs ``app_agent`` on one message under an AgentGovernor and reports its usage.
+
+    ``deadline`` is a time.monotonic() timestamp (defaults to AGENT_TIMEOUT_SECONDS from
+    now). Blocking: call it through asyncio.to_thread from async code.
+    """
+    governor = AgentGovernor(max_steps=max_steps, deadline=deadline)
+    try:
+        with session_factory() as db:
+            final_state = app_agent.invoke(
+                {
+                    "messages": [HumanMessage(content=user_message)],
+                    "db_session": db,
+                    "user_input": user_message,
+                    "prompt_tokens": [],
+                    "governor": governor,
+                },
+                # Backstop only: call_model ends the run first (a model and a tool node per step)
+                config={"recursion_limit": 2 * governor.max_steps + 2},
+            )
+        last_message = final_state["messages"][-1]
+        if isinstance(last_message, ToolMessage):
+            try:
+                output = json.loads(last_message.content)
+            except json.JSONDecodeError:
+                output = {"status": "error", "message": last_message.content}
+            result = {
+                "status": output.get("status", "success"),
+                "response": output.get("message", ""),
+                "interaction_object": output.get("interaction_object"),
+            }
+        else:
+            result = {"status": "error" if governor.stop_reason else "success", "response": last_message.content}
+    except CircuitOpenError:
+        result = {"status": "error", "response": "The AI service is temporarily unavailable. Please try again shortly."}
+    except Exception as e:
+        print(f"ERROR: run_agent: {e}")
+        result = {"status": "error", "response": f"An unexpected error occurred: {str(e)}. Please check backend logs."}
+
+    agent_run_stats.record(governor)
+    result["usage"] = governor.usage()
+    print(f"DEBUG: run_agent - {result['usage']}")
+    return result
@@ -0,0 +1,163 @@
+# backend/app/services/export.py
+
+import csv
+import importlib.util
+import io
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine, next_read_engine
+from app.crud import interaction as crud_interaction
+from app.models.interaction import Interaction, InteractionText
+
+# Columns written to every export, in output order
+EXPORT_COLUMNS = [
+    Interaction.id,
+    Interaction.hcp_id,
+    Interaction.interaction_type,
+    Interaction.interaction_date,
+    Interaction.interaction_time,
+    Interaction.occurred_at,
+    Interaction.attendees,
+    InteractionText.topics_discussed,
+    Interaction.materials_shared,
+    Interaction.samples_distributed,
+    Interaction.hcp_sentiment,
+    InteractionText.outcomes,
+    InteractionText.follow_up_actions,
+    InteractionText.summary,
+    InteractionText.raw_text_input,
+]
+EXPORT_FIELDNAMES = [column.key for column in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _iter_batches(hcp_id: Optional[int], start: Optional[datetime], end: Optional[datetime], use_primary: bool):
+    """Streams row batches using a session owned by the generator.
+
+    The session must outlive the request handler (the response body is produced
+    after the endpoint returns), so it is opened and closed here rather than
+    taken from the request-scoped dependency. Exports read from a replica, or from the
+    primary (``use_primary``) for a client that has just written.
+    """
+    db = SessionLocal(bind=engine if use_primary else next_read_engine())
+    try:
+        yield from crud_interaction.stream_interaction_batches(
+            db, EXPORT_COLUMNS, hcp_id=hcp_id, start=start, end=end,
+            batch_size=settings.EXPORT_BATCH_SIZE,
+        )
+    finally:
+        db.close()
+
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(hcp_id: Optional[int] = None, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             use_primary: bool = False) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDNAMES)
+    yield buffer.getvalue()
+
+    for batch in _iter_batches(hcp_id, start, end, use_primary):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_serialize(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+
+
+def iter_ndjson(hcp_id: Optional[int] = None, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                use_primary: bool = False) -> Iterator[str]:
+    for batch in _iter_batches(hcp_id, start, end, use_primary):
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_FIELDNAMES, map(_serialize, row)))) + "\n"
+            for row in batch
+        )
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only file object that hands back what was written since the last drain.
+
+    ``tell`` keeps counting across drains so Parquet footer offsets stay correct.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def iter_parquet(hcp_id: Optional[int] = None, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 use_primary: bool = False) -> Iterator[bytes]:
+    """Writes one Parquet row group per batch and yields the bytes as they are produced."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("hcp_id", pa.int64()),
+        ("interaction_type", pa.string()),
+        ("interaction_date", pa.timestamp("us")),
+        ("interaction_time", pa.string()),
+        ("occurred_at", pa.timestamp("us", tz="UTC")),
+        ("attendees", pa.string()),
+        ("topics_discussed", pa.string()),
+        ("materials_shared", pa.string()),
+        ("samples_distributed", pa.string()),
+        ("hcp_sentiment", pa.string()),
+        ("outcomes", pa.string()),
+        ("follow_up_actions", pa.string()),
+        ("summary", pa.string()),
+        ("raw_text_input", pa.string()),
+    ])
+
+    sink = _ByteSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+    try:
+        for batch in _iter_batches(hcp_id, start, end, use_primary):
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+EXPORTERS = {
+    "csv": iter_csv,
+    "ndjson": iter_ndjson,
+    "parquet": iter_parquet,
+}
@@ -0,0 +1,214 @@
+# backend/app/services/hcp_history.py
+#
+# Interaction history as agent context, from the hcp_summaries rollup: the compacted
+# summary of older interactions plus the newest one-line digests, cut to
+# HCP_SUMMARY_CONTEXT_CHARS. Raw interaction rows are never loaded on the request path.
+#
+# Compaction folds the oldest pending digests into the summary, HCP_SUMMARY_CHUNK_SIZE at
+# a time, each step merging the previous summary with one chunk (so a long history is
+# summarized hierarchically and no single LLM call grows with it). It runs from
+# app/jobs/hcp_summaries.py; without an LLM it falls back to keeping the newest text.
+
+import json
+import time
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.crud import hcp_summary as crud_hcp_summary
+from app.crud.interaction import interaction_event_data
+from app.models.hcp_summary import HCPSummary
+from app.models.interaction import Interaction
+
+# Same rough estimate as app/services/agent_history.py (not imported: it loads langchain)
+CHARS_PER_TOKEN = 4
+
+COMPACTION_PROMPT = (
+    "You maintain the interaction history of a Healthcare Professional in a life science CRM. "
+    "Merge the existing summary and the new interactions into one summary of at most {words} words. "
+    "Keep products and topics, materials and samples given, how their sentiment has changed, "
+    "and any open commitments or follow-ups. Reply with the summary only."
+)
+
+
+def _tokens(chars: int) -> int:
+    return chars // CHARS_PER_TOKEN
+
+
+def _newest_first(entries: List[list]) -> List[list]:
+    return sorted(entries, key=lambda entry: (entry[0], entry[1]), reverse=True)
+
+
+class HistoryContextStats:
+    """Context blocks served, and their size against the raw rows they stand in for."""
+
+    def __init__(self):
+        self.requests_total = 0
+        self.context_tokens_total = 0
+        self.raw_tokens_total = 0
+
+    def record(self, context_tokens: int, raw_tokens: int):
+        self.requests_total += 1
+        self.context_tokens_total += context_tokens
+        self.raw_tokens_total += raw_tokens
+
+    def metrics(self) -> dict:
+        return {
+            "requests_total": self.requests_total,
+            "context_tokens_total": self.context_tokens_total,
+            "raw_tokens_total": self.raw_tokens_total,
+            "tokens_saved_total": max(0, self.raw_tokens_total - self.context_tokens_total),
+        }
+
+
+history_stats = HistoryContextStats()
+
+
+def history_context(db: Session, hcp) -> dict:
+    """A bounded context block for ``hcp`` with its estimated tokens and the tokens saved.
+
+    ``raw_tokens`` estimates sending every interaction row as the API returns it.
+    """
+    row = crud_hcp_summary.get_summary(db, hcp.id)
+    if row is None or (not row.summary and not row.pending_digests):
+        context = f"No interactions have been logged with {hcp.name} yet."
+        history_stats.record(_tokens(len(context)), 0)
+        return {"context": context, "interaction_count": 0, "context_tokens": _tokens(len(context)), "raw_tokens": 0, "tokens_saved": 0}
+
+    budget = settings.HCP_SUMMARY_CONTEXT_CHARS
+    pending = _newest_first(row.pending_digests)
+    total = row.summarized_count + len(pending)
+    lines = [f"Interaction history for {hcp.name} ({total} interactions):"]
+    if row.summary:
+        lines.append(crud_hcp_summary.clip(
+            f"Summary of the {row.summarized_count} earlier interactions: {row.summary}", budget // 2,
+        ))
+    if pending:
+        lines.append("Recent interactions, newest first:")
+    used = sum(len(line) + 1 for line in lines)
+    shown = 0
+    for entry in pending:
+        line = f"- {entry[2]}"
+        if used + len(line) + 1 > budget:
+            break
+        lines.append(line)
+        used += len(line) + 1
+        shown += 1
+    if shown < len(pending):
+        lines.append(f"({len(pending) - shown} older interactions not shown and not yet summarized.)")
+    context = "\n".join(lines)
+
+    context_tokens, raw_tokens = _tokens(len(context)), _tokens(row.raw_chars)
+    history_stats.record(context_tokens, raw_tokens)
+    return {
+        "context": context,
+        "interaction_count": total,
+        "context_tokens": context_tokens,
+        "raw_tokens": raw_tokens,
+        "tokens_saved": max(0, raw_tokens - context_tokens),
+    }
+
+
+def summarize(previous: Optional[str], digests: List[str], llm=None) -> Tuple[str, str]:
+    """Merges ``digests`` (oldest first) into ``previous``; returns (summary, "llm" or "extractive")."""
+    limit = settings.HCP_SUMMARY_MAX_CHARS
+    if llm is not None:
+        new_lines = "\n".join(f"- {line}" for line in digests)
+        messages = [
+            ("system", COMPACTION_PROMPT.format(words=limit // 6)),
+            ("human", f"Existing summary:\n{previous or '(none)'}\n\nNew interactions, oldest first:\n{new_lines}"),
+        ]
+        try:
+            response = llm.invoke(messages, deadline=time.monotonic() + settings.HCP_SUMMARY_LLM_TIMEOUT_SECONDS)
+            content = " ".join((response.content or "").split())
+            if content:
+                return crud_hcp_summary.clip(content, limit), "llm"
+        except Exception as e:
+            print(f"WARNING: hcp_history.py - LLM compaction failed ({type(e).__name__}); keeping the newest text instead.")
+    # Extractive fallback: the newest text survives, the oldest is cut
+    merged = " | ".join(part for part in [previous, *digests] if part)
+    return (merged if len(merged) <= limit else "…" + merged[-(limit - 1):]), "extractive"
+
+
+def _fold(previous: Optional[str], digests: List[str], llm) -> Tuple[Optional[str], str]:
+    summary, method = previous, "none"
+    chunk = settings.HCP_SUMMARY_CHUNK_SIZE
+    for start in range(0, len(digests), chunk):
+        summary, step_method = summarize(summary, digests[start:start + chunk], llm)
+        method = step_method if method in ("none", "llm") else method
+    return summary, method
+
+
+def compact_hcp(session_factory: Callable[[], Session], hcp_id: int, llm=None, rebuild: bool = False) -> Optional[dict]:
+    """Folds an HCP's older pending digests into its summary; None when there is nothing to do.
+
+    Keeps the newest HCP_SUMMARY_KEEP_RECENT digests pending. A stale summary (or
+    ``rebuild``) is recomputed from the full history. The LLM calls run outside any
+    transaction; the result is applied under a row lock and only if no other compaction
+    got there first, and digests appended meanwhile stay pending.
+    """
+    keep = settings.HCP_SUMMARY_KEEP_RECENT
+    with session_factory() as db:
+        started_at = db.scalar(select(func.now()))
+        row = crud_hcp_summary.get_summary(db, hcp_id)
+        rebuild = rebuild or row is None or row.stale_at is not None
+        if rebuild:
+            interactions = db.query(Interaction).options(joinedload(Interaction.text))\
+                .filter(Interaction.hcp_id == hcp_id)\
+                .order_by(Interaction.occurred_at, Interaction.id).all()
+            entries = [crud_hcp_summary.digest_entry(interaction) for interaction in interactions]
+            raw_chars = sum(len(json.dumps(interaction_event_data(interaction))) for interaction in interactions)
+            previous, base_count = None, 0
+        else:
+            entries = _newest_first(row.pending_digests)[::-1]
+            previous, base_count, raw_chars = row.summary, row.summarized_count, None
+            if len(entries) <= keep:
+                return None
+        expected_summary = row.summary if row is not None else None
+        db.rollback()
+
+    to_fold, kept = (entries[:-keep], entries[-keep:]) if keep else (entries, [])
+    summary, method = _fold(previous, [entry[2] for entry in to_fold], llm)
+    folded = {entry[1]: entry[2] for entry in to_fold}
+    read_ids = {entry[1] for entry in entries}
+
+    with session_factory() as db:
+        row = db.get(HCPSummary, hcp_id, with_for_update=True)
+        if row is None:
+            row = HCPSummary(hcp_id=hcp_id, summarized_count=0, pending_digests=[], raw_chars=0)
+            db.add(row)
+        elif row.summary != expected_summary:
+            db.rollback()
+            return None # Another compaction ran meanwhile
+        current = row.pending_digests or []
+        if rebuild:
+            # Digests appended after the history was read are kept; everything read is replaced
+            pending = kept + [entry for entry in current if entry[1] not in read_ids]
+            row.raw_chars = raw_chars
+            if row.stale_at is not None and row.stale_at <= started_at:
+                row.stale_at = None
+        else:
+            pending = [entry for entry in current if entry[1] not in folded]
+            # A folded digest edited during the LLM call: the summary has its old text
+            if any(entry[1] in folded and entry[2] != folded[entry[1]] for entry in current):
+                row.stale_at = func.now()
+        row.summary = summary
+        row.summarized_count = base_count + len(to_fold)
+        row.pending_digests = pending
+        row.compacted_at = func.now()
+        row.updated_at = func.now()
+        db.commit()
+    return {"hcp_id": hcp_id, "folded": len(to_fold), "pending": len(pending), "rebuilt": rebuild, "method": method}
+
+
+def hcps_to_compact(db: Session, limit: Optional[int] = None) -> List[int]:
+    """HCPs with a stale summary or more than HCP_SUMMARY_COMPACT_AFTER pending digests."""
+    query = select(HCPSummary.hcp_id).where(
+        HCPSummary.stale_at.is_not(None)
+        | (func.jsonb_array_length(HCPSummary.pending_digests) > settings.HCP_SUMMARY_COMPACT_AFTER)
+    ).order_by(HCPSummary.hcp_id)
+    if limit:
+        query = query.limit(limit)
+    return list(db.scalars(query))
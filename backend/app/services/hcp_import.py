@@ -0,0 +1,132 @@
+# backend/app/services/hcp_import.py
+#
+# Bulk HCP import for POST /hcps/bulk: parses CSV or NDJSON from a file object and
+# upserts it in chunks, reporting an outcome for every input row.
+
+import csv
+import json
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import hcp as crud_hcp
+from app.schemas.hcp import HPCCreate
+
+IMPORT_FIELDS = ("name", "specialty", "contact_info")
+
+
+def _clean(record: Dict) -> Dict:
+    """Keeps the known fields and turns blank strings into None ("leave unchanged")."""
+    cleaned = {}
+    for field in IMPORT_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            value = value.strip() or None
+        cleaned[field] = value
+    return cleaned
+
+
+def _decoded_lines(file: BinaryIO) -> Iterator[str]:
+    """Lines of ``file`` decoded one at a time, so a bad byte fails on its own line."""
+    for index, line in enumerate(file):
+        yield line.decode("utf-8-sig" if index == 0 else "utf-8")
+
+
+def iter_csv_records(file: BinaryIO) -> Iterator[Tuple[int, Dict]]:
+    """Yields (line number, record); the header names the columns.
+
+    A line that cannot be decoded or parsed ends the file: after it the row boundaries
+    (quoted fields can span lines) are unknown. It is yielded as a "_stop" error.
+    """
+    reader = csv.DictReader(_decoded_lines(file))
+    try:
+        for record in reader:
+            yield reader.line_num, record
+    except UnicodeDecodeError as e:
+        yield reader.line_num + 1, {"_error": f"invalid UTF-8 ({e.reason}); the rest of the file was not imported", "_stop": True}
+    except csv.Error as e:
+        yield reader.line_num, {"_error": f"invalid CSV ({e}); the rest of the file was not imported", "_stop": True}
+
+
+def iter_ndjson_records(file: BinaryIO) -> Iterator[Tuple[int, Dict]]:
+    for line_number, raw in enumerate(file, start=1):
+        try:
+            line = raw.decode("utf-8-sig" if line_number == 1 else "utf-8")
+        except UnicodeDecodeError as e:
+            yield line_number, {"_error": f"invalid UTF-8: {e.reason}"}
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, {"_error": f"invalid JSON: {e.msg}"}
+            continue
+        yield line_number, record if isinstance(record, dict) else {"_error": "expected a JSON object"}
+
+
+RECORD_READERS = {"csv": iter_csv_records, "ndjson": iter_ndjson_records}
+
+
+def _flush(db: Session, chunk: Dict[str, Tuple[int, HPCCreate]], results: List[Dict]):
+    if not chunk:
+        return
+    try:
+        rows = crud_hcp.upsert_hcps(db, [hcp for _, hcp in chunk.values()])
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        message = str(e.orig) if getattr(e, "orig", None) is not None else str(e)
+        results.extend({"line": line, "name": hcp.name, "status": "error", "error": message} for line, hcp in chunk.values())
+    else:
+        for row in rows:
+            line, _ = chunk[row.name]
+            results.append({"line": line, "name": row.name, "id": row.id, "status": "created" if row.created else "updated"})
+    chunk.clear()
+
+
+def import_hcps(db: Session, file: BinaryIO, format: str, chunk_size: int = None) -> Dict:
+    """Upserts every record in ``file`` and returns counts plus a per-row status list.
+
+    Each chunk of ``chunk_size`` rows is one statement and one transaction, so a bad
+    chunk does not undo earlier ones. A name repeated within a chunk is upserted once
+    (the later row wins) and the earlier row is reported as a duplicate. A CSV line that
+    cannot be read is reported as an error and ends the import; the rows before it
+    are still upserted and reported.
+    """
+    chunk_size = chunk_size or settings.HCP_BULK_CHUNK_SIZE
+    results: List[Dict] = []
+    chunk: Dict[str, Tuple[int, HPCCreate]] = {}
+
+    for line, record in RECORD_READERS[format](file):
+        if "_error" in record:
+            results.append({"line": line, "status": "error", "error": record["_error"]})
+            if record.get("_stop"):
+                break
+            continue
+        cleaned = _clean(record)
+        if any(isinstance(value, str) and "\x00" in value for value in cleaned.values()):
+            # PostgreSQL text cannot hold NUL; caught here it fails one row, not the whole chunk
+            results.append({"line": line, "name": cleaned["name"], "status": "error", "error": "NUL characters are not allowed"})
+            continue
+        try:
+            hcp = HPCCreate(**cleaned)
+        except ValidationError as e:
+            results.append({"line": line, "name": record.get("name"), "status": "error",
+                            "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())})
+            continue
+        if hcp.name in chunk:
+            results.append({"line": chunk[hcp.name][0], "name": hcp.name, "status": "duplicate"})
+        chunk[hcp.name] = (line, hcp)
+        if len(chunk) >= chunk_size:
+            _flush(db, chunk, results)
+    _flush(db, chunk, results)
+
+    results.sort(key=lambda result: result["line"])
+    counts = {status: 0 for status in ("created", "updated", "duplicate", "error")}
+    for result in results:
+        counts[result["status"]] += 1
+    return {**counts, "rows": results}
@@ -0,0 +1,275 @@
+# backend/app/services/llm_resilience.py
+#
+# Hedging, retries and a circuit breaker around LLM clients. Deliberately free of
+# langchain imports so metrics can be read without loading the agent stack.
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Optional
+
+from app.core.config import settings
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the breaker is open."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised instead of starting (or retrying) a call once the caller's deadline has passed."""
+
+
+class LatencyTracker:
+    """Keeps the most recent call latencies and reports a quantile over them."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20, default: float = 5.0):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.default = default
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        if len(self.samples) < self.min_samples:
+            return self.default
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Opens when the error rate over the last ``window`` calls reaches ``error_rate``.
+
+    While open every call fails fast; after ``cooldown`` seconds one trial call is let
+    through (half-open) and its outcome decides whether the breaker closes again.
+    """
+
+    def __init__(self, window: int, error_rate: float, min_calls: int, cooldown: float):
+        self.outcomes = deque(maxlen=window)
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.opened_total = 0
+        self.rejected_total = 0
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.cooldown:
+                self.rejected_total += 1
+                return False
+            self.state = "half_open"
+            return True
+        if self.state == "half_open":
+            # A trial call is already in flight
+            self.rejected_total += 1
+            return False
+        return True
+
+    def record(self, success: bool):
+        if self.state == "half_open":
+            if success:
+                self.state = "closed"
+                self.outcomes.clear()
+            else:
+                self._open()
+            return
+        self.outcomes.append(success)
+        failures = self.outcomes.count(False)
+        if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.error_rate:
+            self._open()
+
+    def release(self):
+        """For a call that was cancelled before it had an outcome: a half-open trial goes back
+        to open (with the cooldown already over), so the next call becomes the new trial."""
+        if self.state == "half_open":
+            self.state = "open"
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.opened_total += 1
+        self.outcomes.clear()
+
+
+class ResilientLLM:
+    """Wraps a LangChain chat model (or tool-bound runnable) with hedging, retries and a breaker.
+
+    ``ainvoke`` sends a second, hedged request when the first one is slower than the
+    observed p95 and returns whichever finishes first. Failed attempts are retried with
+    full-jitter backoff. Both ``ainvoke`` and ``invoke`` consult the shared breaker.
+
+    Both also take an optional ``deadline``, a time.monotonic() timestamp (the event
+    loop's clock): each attempt may only use the time left before it, and no attempt
+    starts after it.
+    """
+
+    def __init__(self, client, breaker: CircuitBreaker, name: str):
+        self.client = client
+        self.breaker = breaker
+        self.name = name
+        self.latency = LatencyTracker(
+            min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+            default=settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+        )
+        self.calls_total = 0
+        self.hedges_total = 0
+        self.hedge_wins_total = 0
+        self.retries_total = 0
+        self.errors_total = 0
+        self.deadline_exceeded_total = 0
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, settings.LLM_RETRY_BASE_DELAY_SECONDS * (2 ** attempt))
+
+    def _time_left(self, deadline: Optional[float], last_error: Optional[BaseException]) -> Optional[float]:
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self.deadline_exceeded_total += 1
+            raise DeadlineExceeded(f"{self.name}: deadline passed") from last_error
+        return remaining
+
+    async def _timed_call(self, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            result = await self.client.ainvoke(*args, **kwargs)
+        except (asyncio.CancelledError, TimeoutError):
+            # Cut short (a timeout or a hedge that lost): the elapsed time is still a lower
+            # bound, and leaving slow calls out would bias the hedge delay low
+            self.latency.record(time.monotonic() - started)
+            raise
+        self.latency.record(time.monotonic() - started)
+        return result
+
+    async def _hedged_call(self, *args, **kwargs):
+        primary = asyncio.ensure_future(self._timed_call(*args, **kwargs))
+        if not settings.LLM_HEDGE_ENABLED:
+            return await primary
+
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.latency.quantile(settings.LLM_HEDGE_QUANTILE))
+            if not done:
+                self.hedges_total += 1
+                tasks.append(asyncio.ensure_future(self._timed_call(*args, **kwargs)))
+            while True:
+                # Retrieve every finished result so failed losers are not reported as unhandled
+                finished = [task for task in tasks if task.done()]
+                errors = [task.exception() for task in finished]
+                for task, error in zip(finished, errors):
+                    if error is None:
+                        if task is not primary:
+                            self.hedge_wins_total += 1
+                        return task.result()
+                pending = [task for task in tasks if not task.done()]
+                if not pending:
+                    raise errors[-1]
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def ainvoke(self, *args, deadline: Optional[float] = None, **kwargs):
+        last_error: Optional[BaseException] = None
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            if attempt:
+                self.retries_total += 1
+                await asyncio.sleep(self._backoff(attempt - 1))
+            # Checked before the breaker so a half-open trial is never claimed and then skipped
+            remaining = self._time_left(deadline, last_error)
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name}: circuit open")
+            self.calls_total += 1
+            try:
+                async with asyncio.timeout(remaining):
+                    result = await self._hedged_call(*args, **kwargs)
+            except Exception as e:
+                self.errors_total += 1
+                self.breaker.record(False)
+                last_error = e
+                continue
+            except BaseException:
+                # Cancelled by the caller (e.g. its own timeout): no outcome to record, but a
+                # half-open trial must not stay claimed forever
+                self.breaker.release()
+                raise
+            self.breaker.record(True)
+            return result
+        raise last_error
+
+    def invoke(self, *args, deadline: Optional[float] = None, **kwargs):
+        last_error: Optional[BaseException] = None
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            if attempt:
+                self.retries_total += 1
+                time.sleep(self._backoff(attempt - 1))
+            remaining = self._time_left(deadline, last_error)
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name}: circuit open")
+            self.calls_total += 1
+            started = time.monotonic()
+            try:
+                # A blocking call cannot be cancelled, so the time left becomes the request timeout
+                if remaining is None:
+                    result = self.client.invoke(*args, **kwargs)
+                else:
+                    result = self.client.invoke(*args, timeout=remaining, **kwargs)
+            except Exception as e:
+                self.errors_total += 1
+                self.breaker.record(False)
+                last_error = e
+                if remaining is not None and time.monotonic() - started >= remaining:
+                    self.latency.record(time.monotonic() - started) # timed out: see _timed_call
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.latency.record(time.monotonic() - started)
+            self.breaker.record(True)
+            return result
+        raise last_error
+
+    def metrics(self) -> dict:
+        return {
+            "calls_total": self.calls_total,
+            "errors_total": self.errors_total,
+            "deadline_exceeded_total": self.deadline_exceeded_total,
+            "retries_total": self.retries_total,
+            "hedges_total": self.hedges_total,
+            "hedge_wins_total": self.hedge_wins_total,
+            "hedge_delay_seconds": round(self.latency.quantile(settings.LLM_HEDGE_QUANTILE), 3),
+        }
+
+
+# One breaker per upstream provider: plain and tool-bound calls both go to Groq
+groq_breaker = CircuitBreaker(
+    window=settings.LLM_BREAKER_WINDOW,
+    error_rate=settings.LLM_BREAKER_ERROR_RATE,
+    min_calls=settings.LLM_BREAKER_MIN_CALLS,
+    cooldown=settings.LLM_BREAKER_COOLDOWN_SECONDS,
+)
+
+# Wrapped clients register here so /metrics can report them
+registered_clients = {}
+
+
+def resilient(client, name: str) -> ResilientLLM:
+    wrapped = ResilientLLM(client, groq_breaker, name)
+    registered_clients[name] = wrapped
+    return wrapped
+
+
+def metrics() -> dict:
+    return {
+        "breaker": {
+            "state": groq_breaker.state,
+            "opened_total": groq_breaker.opened_total,
+            "rejected_total": groq_breaker.rejected_total,
+        },
+        **{name: client.metrics() for name, client in registered_clients.items()},
+    }
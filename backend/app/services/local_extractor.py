@@ -0,0 +1,484 @@
+# backend/app/services/local_extractor.py
+#
+# CPU-only field extractor learned from past chat interactions: each row's raw chat text
+# paired with the fields the LLM extracted from it. Two parts, both NumPy over hashed
+# features:
+#   - softmax classifiers for hcp_sentiment and interaction_type
+#   - a CRF-style token tagger (per-token softmax emissions, learned tag transitions,
+#     Viterbi decoding) marking the HCP name and the free-text fields as spans
+# Models are versioned directories under LOCAL_EXTRACTOR_DIR written by
+# `python -m app.jobs.train_extractor`; benchmarks/extractor_eval.py measures them.
+# Deliberately free of langchain imports.
+
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from functools import lru_cache
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+CLASS_FIELDS = ("hcp_sentiment", "interaction_type")
+SPAN_FIELDS = (
+    "hcp_name", "attendees", "topics_discussed", "materials_shared",
+    "samples_distributed", "outcomes", "follow_up_actions",
+)
+TAGS = ("O",) + tuple(f"{prefix}-{field}" for field in SPAN_FIELDS for prefix in ("B", "I"))
+
+N_FEATURES = 2 ** 16
+PAD = N_FEATURES # Feature index used to pad batches; its weights stay zero
+LATEST_FILE = "LATEST"
+# Interactions whose id is a multiple of this are held out of training for evaluation
+HOLDOUT_MODULO = 10
+# Words that most often open a span become "cue" features for the tokens after them
+MAX_CUES = 60
+# Tags per token considered while decoding
+TAG_BEAM = 3
+# Fuzzy span alignment: minimum token F1 between a label and a window of the text
+MIN_ALIGNMENT_F1 = 0.75
+
+_TOKEN = re.compile(r"(?:dr|mr|mrs|ms|prof)\.|\w+(?:[.'/-]\w+)*|[^\w\s]", re.IGNORECASE)
+_NEGATIONS = {"not", "no", "never", "n't", "didn't", "wasn't", "isn't", "don't", "won't", "without"}
+_SENTENCE_END = {".", ";", "!", "?"}
+
+
+def tokenize(text: str):
+    """Returns [(token, start, end)] with character offsets into ``text``."""
+    return [(match.group(0), match.start(), match.end()) for match in _TOKEN.finditer(text or "")]
+
+
+@lru_cache(maxsize=2 ** 16)
+def _index(feature: str) -> int:
+    # crc32 rather than hash() so indices are stable across processes
+    return zlib.crc32(feature.encode()) & (N_FEATURES - 1)
+
+
+def _shape(token: str) -> str:
+    if token.isdigit():
+        return "d"
+    if not token[0].isalnum():
+        return "p"
+    if token[0].isupper():
+        return "X" if token.isupper() and len(token) > 1 else "Xx"
+    return "x"
+
+
+def _normalize(value: str) -> str:
+    return " ".join((value or "").lower().split())
+
+
+def is_holdout(interaction_id: int) -> bool:
+    return interaction_id % HOLDOUT_MODULO == 0
+
+
+# --- Features ---
+
+def class_features(tokens) -> np.ndarray:
+    """Bias, unigrams and bigrams; words after a negation are marked until the sentence ends."""
+    words, negated = [], False
+    for token, _, _ in tokens:
+        word = token.lower()
+        if word in _SENTENCE_END:
+            negated = False
+            continue
+        words.append(("neg_" if negated else "") + word)
+        if word in _NEGATIONS:
+            negated = True
+    features = ["bias"] + [f"u={word}" for word in words] + [f"b={a}|{b}" for a, b in zip(words, words[1:])]
+    return np.unique(np.array([_index(feature) for feature in features], dtype=np.int64))
+
+
+def token_features(tokens, cues: frozenset) -> np.ndarray:
+    """Per-token window features plus the nearest preceding cue word in the same sentence.
+
+    Returns a (tokens, features per token) array of feature indices.
+    """
+    words = [token.lower() for token, _, _ in tokens]
+    padded = ["<s>", "<s>"] + words + ["</s>", "</s>"]
+    features, cue, since_cue = [], "none", 0
+    for i, (token, _, _) in enumerate(tokens):
+        word, shape = words[i], _shape(token)
+        p2, p1, _, n1, n2 = padded[i:i + 5] # two words either side of this token
+        distance = "1" if since_cue <= 1 else "2-3" if since_cue <= 3 else "4+"
+        features += (
+            "bias", "w=" + word, "shape=" + shape, "suf=" + word[-3:],
+            "p1=" + p1, "p2=" + p2, "n1=" + n1, "n2=" + n2,
+            "p1w=" + p1 + "|" + word, "wn1=" + word + "|" + n1,
+            "cue=" + cue, "cue=" + cue + "|" + distance, "cue=" + cue + "|shape=" + shape,
+        )
+        since_cue += 1
+        if word in _SENTENCE_END:
+            cue, since_cue = "none", 0
+        elif word in cues:
+            cue, since_cue = word, 0
+    return np.array([_index(feature) for feature in features], dtype=np.int64).reshape(len(tokens), -1)
+
+
+# --- Training ---
+
+def _pad(rows: Sequence[np.ndarray]) -> np.ndarray:
+    batch = np.full((len(rows), max(len(row) for row in rows)), PAD, dtype=np.int64)
+    for i, row in enumerate(rows):
+        batch[i, :len(row)] = row
+    return batch
+
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    scores = scores - scores.max(axis=-1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def train_softmax(rows: Sequence[np.ndarray], labels: np.ndarray, n_classes: int,
+                  epochs: int = 8, learning_rate: float = 0.3, batch_size: int = 256, seed: int = 0):
+    """Multinomial logistic regression over sparse binary features, trained with AdaGrad.
+
+    ``rows`` holds the active feature indices of each example. Returns (weights, bias).
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.zeros((N_FEATURES + 1, n_classes), dtype=np.float32)
+    bias = np.zeros(n_classes, dtype=np.float32)
+    weight_sq = np.full_like(weights, 1e-6)
+    bias_sq = np.full_like(bias, 1e-6)
+    for _ in range(epochs):
+        order = rng.permutation(len(rows))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            features = _pad([rows[i] for i in batch])
+            probs = _softmax(weights[features].sum(axis=1) + bias)
+            probs[np.arange(len(batch)), labels[batch]] -= 1.0 # d(loss)/d(scores)
+
+            unique, inverse = np.unique(features, return_inverse=True)
+            gradient = np.zeros((len(unique), n_classes), dtype=np.float32)
+            np.add.at(gradient, inverse.reshape(-1), np.repeat(probs, features.shape[1], axis=0))
+            weight_sq[unique] += gradient ** 2
+            weights[unique] -= learning_rate * gradient / np.sqrt(weight_sq[unique])
+            bias_gradient = probs.sum(axis=0)
+            bias_sq += bias_gradient ** 2
+            bias -= learning_rate * bias_gradient / np.sqrt(bias_sq)
+            weights[PAD] = 0.0
+    return weights, bias
+
+
+def _find_span(words: List[str], value_words: List[str]):
+    """(start, end) token range of ``value_words`` in ``words``: exact match, else best fuzzy window."""
+    n = len(value_words)
+    for start in range(len(words) - n + 1):
+        if words[start:start + n] == value_words:
+            return start, start + n
+    target, best, best_f1 = Counter(value_words), None, MIN_ALIGNMENT_F1
+    for length in range(max(1, n - 2), n + 3):
+        for start in range(len(words) - length + 1):
+            overlap = sum((Counter(words[start:start + length]) & target).values())
+            if not overlap:
+                continue
+            precision, recall = overlap / length, overlap / n
+            f1 = 2 * precision * recall / (precision + recall)
+            if f1 > best_f1:
+                best, best_f1 = (start, start + length), f1
+    return best
+
+
+def align_tags(tokens, labels: Dict[str, str]) -> Optional[List[int]]:
+    """Tag indices for ``tokens`` derived from the stored field values (distant supervision).
+
+    Returns None when a non-empty value cannot be located in the text or two values
+    overlap, so unreliable examples are left out instead of teaching "O" for real spans.
+    """
+    words = [token.lower() for token, _, _ in tokens]
+    tags = [0] * len(tokens)
+    for field in SPAN_FIELDS:
+        value_words = [token.lower() for token, _, _ in tokenize(labels.get(field) or "")]
+        if not value_words:
+            continue
+        span = _find_span(words, value_words)
+        if span is None or any(tags[span[0]:span[1]]):
+            return None
+        tags[span[0]] = TAGS.index(f"B-{field}")
+        for i in range(span[0] + 1, span[1]):
+            tags[i] = TAGS.index(f"I-{field}")
+    return tags
+
+
+def _allowed_transitions() -> np.ndarray:
+    """allowed[prev, cur]; the extra last row is the sequence start. I-x may only follow B-x or I-x."""
+    allowed = np.ones((len(TAGS) + 1, len(TAGS)), dtype=bool)
+    for cur, tag in enumerate(TAGS):
+        if tag.startswith("I-"):
+            allowed[:, cur] = False
+            allowed[TAGS.index("B-" + tag[2:]), cur] = True
+            allowed[cur, cur] = True
+    return allowed
+
+
+def train(examples: Iterable[dict], epochs: int = 8) -> "LocalExtractor":
+    """Trains on dicts holding ``text`` plus the CLASS_FIELDS and SPAN_FIELDS values."""
+    examples = [example for example in examples if example.get("text")]
+    if not examples:
+        raise ValueError("No labeled chat interactions to train on")
+    tokenized = [tokenize(example["text"]) for example in examples]
+
+    classifiers = {}
+    for field in CLASS_FIELDS:
+        labels = sorted({example.get(field) or "" for example in examples} - {""})
+        usable = [(tokens, labels.index(example[field])) for tokens, example in zip(tokenized, examples) if example.get(field)]
+        if len(labels) < 2:
+            # Only one value was ever seen; predict it with full confidence
+            classifiers[field] = {"labels": labels, "weights": None, "bias": None}
+            continue
+        weights, bias = train_softmax(
+            [class_features(tokens) for tokens, _ in usable],
+            np.array([label for _, label in usable]), len(labels), epochs=epochs,
+        )
+        classifiers[field] = {"labels": labels, "weights": weights, "bias": bias}
+
+    aligned = [(tokens, align_tags(tokens, example)) for tokens, example in zip(tokenized, examples)]
+    aligned = [(tokens, tags) for tokens, tags in aligned if tags is not None and tokens]
+    if not aligned:
+        raise ValueError("No chat interaction could be aligned with its extracted fields")
+
+    # Cues: the words that most often come right before the start of a span
+    cue_counts = Counter(
+        tokens[i - 1][0].lower()
+        for tokens, tags in aligned for i, tag in enumerate(tags)
+        if i and TAGS[tag].startswith("B-") and tokens[i - 1][0].isalpha()
+    )
+    cues = frozenset(word for word, count in cue_counts.most_common(MAX_CUES) if count >= 2)
+
+    rows, token_tags, transition_counts = [], [], np.ones((len(TAGS) + 1, len(TAGS)))
+    for tokens, tags in aligned:
+        rows.extend(token_features(tokens, cues))
+        token_tags.extend(tags)
+        for prev, cur in zip([len(TAGS)] + tags[:-1], tags):
+            transition_counts[prev, cur] += 1
+    tagger_weights, tagger_bias = train_softmax(rows, np.array(token_tags), len(TAGS), epochs=epochs)
+    transitions = np.log(transition_counts / transition_counts.sum(axis=1, keepdims=True))
+    transitions[~_allowed_transitions()] = -np.inf
+
+    meta = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "examples": len(examples),
+        "aligned_examples": len(aligned),
+        "cues": sorted(cues),
+        "class_labels": {field: classifier["labels"] for field, classifier in classifiers.items()},
+    }
+    return LocalExtractor(classifiers, tagger_weights, tagger_bias, transitions.astype(np.float32), meta)
+
+
+# --- Inference ---
+
+class LocalExtractor:
+    def __init__(self, classifiers: dict, tagger_weights, tagger_bias, transitions, meta: dict, version: str = ""):
+        self.classifiers = classifiers
+        self.tagger_weights = tagger_weights
+        self.tagger_bias = tagger_bias
+        self.transitions = transitions
+        self.meta = meta
+        self.version = version
+        self.cues = frozenset(meta["cues"])
+        self._transitions = transitions.tolist()
+
+    def _classify(self, field: str, features: np.ndarray):
+        classifier = self.classifiers[field]
+        if classifier["weights"] is None:
+            return (classifier["labels"] or [""])[0], 1.0
+        probs = _softmax(classifier["weights"][features].sum(axis=0) + classifier["bias"])
+        best = int(probs.argmax())
+        return classifier["labels"][best], float(probs[best])
+
+    def _tag(self, tokens):
+        """Viterbi path over log emission + transition scores; returns (tags, min emission probability).
+
+        Only each token's TAG_BEAM most likely tags (plus "O", which may follow anything)
+        are considered, so decoding is a few small Python loops rather than NumPy calls
+        per token.
+        """
+        features = token_features(tokens, self.cues)
+        emissions = np.log(_softmax(self.tagger_weights[features].sum(axis=1) + self.tagger_bias) + 1e-12)
+        candidates = np.argsort(-emissions, axis=1)[:, :TAG_BEAM].tolist()
+        scores = emissions.tolist()
+        transitions = self._transitions
+
+        # Beam entries are (score, tag, previous entry)
+        beam = [(transitions[-1][tag] + scores[0][tag], tag, None) for tag in set(candidates[0]) | {0}]
+        for i in range(1, len(tokens)):
+            row, next_beam = scores[i], []
+            for tag in set(candidates[i]) | {0}:
+                best_score, best_entry = -np.inf, None
+                for entry in beam:
+                    value = entry[0] + transitions[entry[1]][tag]
+                    if value > best_score:
+                        best_score, best_entry = value, entry
+                if best_entry is not None:
+                    next_beam.append((best_score + row[tag], tag, best_entry))
+            beam = next_beam
+
+        entry = max(beam)
+        path = []
+        while entry is not None:
+            path.append(entry[1])
+            entry = entry[2]
+        path.reverse()
+        confidence = float(np.exp(min(row[tag] for row, tag in zip(scores, path))))
+        return path, confidence
+
+    def predict(self, text: str) -> dict:
+        """Returns {"fields": {...}, "confidence": min over parts, "confidences": {...}}."""
+        tokens = tokenize(text)
+        fields = {field: "" for field in SPAN_FIELDS}
+        confidences = {}
+        features = class_features(tokens)
+        for field in CLASS_FIELDS:
+            fields[field], confidences[field] = self._classify(field, features)
+        if tokens:
+            path, confidences["spans"] = self._tag(tokens)
+            spans: Dict[str, List[str]] = {}
+            start = None
+            for i, tag in enumerate(path + [0]):
+                name = TAGS[tag]
+                if start is not None and not name.startswith("I-"):
+                    field = TAGS[path[start]][2:]
+                    spans.setdefault(field, []).append(text[tokens[start][1]:tokens[i - 1][2]].strip(" ,;:."))
+                    start = None
+                if name.startswith("B-"):
+                    start = i
+            for field, values in spans.items():
+                fields[field] = ", ".join(value for value in values if value)
+        return {"fields": fields, "confidence": min(confidences.values()), "confidences": confidences}
+
+
+# --- Versioned storage ---
+
+def save_model(extractor: LocalExtractor, base_dir: Optional[str] = None, version: Optional[str] = None) -> str:
+    """Writes ``base_dir/<version>/{model.npz,meta.json}`` and points LATEST at it; returns the version."""
+    base_dir = base_dir or settings.LOCAL_EXTRACTOR_DIR
+    version = version or datetime.now(timezone.utc).strftime("v%Y%m%d%H%M%S")
+    path = os.path.join(base_dir, version)
+    os.makedirs(path, exist_ok=True)
+    arrays = {"tagger_weights": extractor.tagger_weights, "tagger_bias": extractor.tagger_bias, "transitions": extractor.transitions}
+    for field, classifier in extractor.classifiers.items():
+        if classifier["weights"] is not None:
+            arrays[f"{field}_weights"] = classifier["weights"]
+            arrays[f"{field}_bias"] = classifier["bias"]
+    np.savez_compressed(os.path.join(path, "model.npz"), **arrays)
+    with open(os.path.join(path, "meta.json"), "w") as meta_file:
+        json.dump({**extractor.meta, "version": version, "n_features": N_FEATURES, "tags": list(TAGS)}, meta_file, indent=2)
+    # Replace LATEST atomically so a concurrent load never reads a half-written name
+    latest_tmp = os.path.join(base_dir, LATEST_FILE + ".tmp")
+    with open(latest_tmp, "w") as latest_file:
+        latest_file.write(version)
+    os.replace(latest_tmp, os.path.join(base_dir, LATEST_FILE))
+    extractor.version = version
+    return version
+
+
+def load_model(base_dir: Optional[str] = None, version: Optional[str] = None) -> LocalExtractor:
+    base_dir = base_dir or settings.LOCAL_EXTRACTOR_DIR
+    if not version:
+        with open(os.path.join(base_dir, LATEST_FILE)) as latest_file:
+            version = latest_file.read().strip()
+    path = os.path.join(base_dir, version)
+    with open(os.path.join(path, "meta.json")) as meta_file:
+        meta = json.load(meta_file)
+    if meta["n_features"] != N_FEATURES or meta["tags"] != list(TAGS):
+        raise ValueError(f"Extractor {version} was trained with a different feature layout; retrain it")
+    arrays = np.load(os.path.join(path, "model.npz"))
+    classifiers = {
+        field: {
+            "labels": meta["class_labels"][field],
+            "weights": arrays[f"{field}_weights"] if f"{field}_weights" in arrays else None,
+            "bias": arrays[f"{field}_bias"] if f"{field}_bias" in arrays else None,
+        }
+        for field in CLASS_FIELDS
+    }
+    return LocalExtractor(classifiers, arrays["tagger_weights"], arrays["tagger_bias"], arrays["transitions"], meta, version)
+
+
+_extractor = None
+_extractor_loaded = False
+_lock = threading.Lock()
+
+
+def get_extractor() -> Optional[LocalExtractor]:
+    """The configured extractor, loaded once; None when disabled or no model has been trained."""
+    global _extractor, _extractor_loaded
+    if not settings.LOCAL_EXTRACTOR_ENABLED:
+        return None
+    if not _extractor_loaded:
+        with _lock:
+            if not _extractor_loaded:
+                try:
+                    started = time.perf_counter()
+                    _extractor = load_model(version=settings.LOCAL_EXTRACTOR_VERSION)
+                    print(f"DEBUG: local_extractor.py - Loaded extractor {_extractor.version} in {time.perf_counter() - started:.2f}s.")
+                except FileNotFoundError:
+                    print("DEBUG: local_extractor.py - No trained extractor found; every chat uses the LLM.")
+                except ValueError as e:
+                    print(f"WARNING: local_extractor.py - {e}")
+                _extractor_loaded = True
+    return _extractor
+
+
+# --- Evaluation ---
+
+def _token_f1(predicted: str, expected: str) -> float:
+    predicted_words, expected_words = Counter(_normalize(predicted).split()), Counter(_normalize(expected).split())
+    if not predicted_words and not expected_words:
+        return 1.0
+    overlap = sum((predicted_words & expected_words).values())
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / sum(predicted_words.values()), overlap / sum(expected_words.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def evaluate(extractor: LocalExtractor, examples: Sequence[dict], thresholds: Sequence[float] = (0.0, 0.5, 0.7, 0.8, 0.9, 0.95)) -> dict:
+    """Accuracy (token F1 for span fields) and latency on ``examples``, overall and per confidence threshold.
+
+    At each threshold, ``coverage`` is the share of chats the extractor would answer
+    itself, i.e. the share of LLM extraction calls saved.
+    """
+    results = []
+    for example in examples:
+        started = time.perf_counter()
+        prediction = extractor.predict(example["text"])
+        elapsed = time.perf_counter() - started
+        scores = {field: float(_normalize(prediction["fields"][field]) == _normalize(example.get(field) or ""))
+                  for field in CLASS_FIELDS}
+        scores.update({field: _token_f1(prediction["fields"][field], example.get(field) or "") for field in SPAN_FIELDS})
+        results.append((prediction["confidence"], bool(prediction["fields"]["hcp_name"]), scores, elapsed))
+
+    def summarize(subset):
+        if not subset:
+            return {"count": 0}
+        return {
+            "count": len(subset),
+            "fields": {field: round(sum(scores[field] for _, _, scores, _ in subset) / len(subset), 3)
+                       for field in CLASS_FIELDS + SPAN_FIELDS},
+        }
+
+    latencies = sorted(elapsed for _, _, _, elapsed in results)
+    report = {
+        "examples": len(results),
+        "latency_ms": {
+            "p50": round(latencies[len(latencies) // 2] * 1000, 3) if latencies else None,
+            "p99": round(latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000, 3) if latencies else None,
+        },
+        "all": summarize(results),
+        "thresholds": {},
+    }
+    for threshold in thresholds:
+        # Mirrors the chat path: a prediction is only used with an HCP name and enough confidence
+        accepted = [result for result in results if result[0] >= threshold and result[1]]
+        report["thresholds"][threshold] = {
+            "coverage": round(len(accepted) / len(results), 3) if results else 0.0,
+            **summarize(accepted),
+        }
+    return report
@@ -0,0 +1,264 @@
+# backend/app/services/next_steps.py
+#
+# "Suggest Next Steps" for an HCP. Candidate actions are scored locally from precomputed
+# features, the hcp_activity and hcp_features rollups that every interaction write keeps
+# current, so no interaction history is read or sent to the LLM. Optionally the LLM only
+# rewords the top few candidates. Results are cached per HCP under the rollups'
+# updated_at stamps: a new or edited interaction of that HCP bumps them in its own
+# transaction, so every worker drops the stale entry on its next lookup. The date is
+# part of the version too, because the time-based features (days since the last
+# contact, an overdue visit) move on without any write.
+
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import hcp_activity as crud_hcp_activity, hcp_features as crud_hcp_features
+from app.schemas.hcp import HCPNextSteps, NextStep
+
+SENTIMENT_LABELS = {1: "Positive", 0: "Neutral", -1: "Negative"}
+
+PHRASING_PROMPT = (
+    "You help a life science field representative plan their next contact with a "
+    "Healthcare Professional. Rewrite each suggested next step below as one short, "
+    "actionable sentence. Keep the order and do not add new steps. Reply with exactly "
+    "one numbered line per step."
+)
+NUMBERED_LINE = re.compile(r"^\s*(\d+)[.)]\s*(.+)$")
+
+
+def _days(delta) -> float:
+    return delta.total_seconds() / 86400
+
+
+def build_features(activity, features, now: Optional[datetime] = None) -> dict:
+    """The feature vector the rules below score; either rollup row may be None."""
+    now = now or datetime.now(timezone.utc)
+    count = activity.interaction_count if activity is not None else 0
+    last_at = activity.last_interaction_at if activity is not None else None
+    first_at = features.first_interaction_at if features is not None else None
+    sentiments = [entry[2] for entry in features.recent_sentiments] if features is not None else [] # newest first
+
+    vector = {
+        "interaction_count": count,
+        "days_since_last": round(_days(now - last_at), 1) if last_at else None,
+        "average_gap_days": None,
+        "interactions_per_30_days": 0.0,
+        "last_sentiment": SENTIMENT_LABELS[sentiments[0]] if sentiments else None,
+        "sentiment_trend": 0.0,
+        "recent_sentiments": [SENTIMENT_LABELS[score] for score in sentiments],
+        "outstanding_follow_up": None,
+        "days_since_follow_up": None,
+        "type_counts": dict(activity.type_counts) if activity is not None else {},
+        "materials_given": dict(features.materials_given) if features is not None else {},
+        "samples_given": dict(features.samples_given) if features is not None else {},
+    }
+    if first_at and last_at:
+        if count > 1:
+            vector["average_gap_days"] = round(_days(last_at - first_at) / (count - 1), 1)
+        vector["interactions_per_30_days"] = round(count * 30 / max(_days(now - first_at), 30), 2)
+    if len(sentiments) >= 2:
+        # Newer half against older half: -2 (Positive -> Negative) .. +2
+        half = len(sentiments) // 2
+        newer, older = sentiments[:half], sentiments[half:]
+        vector["sentiment_trend"] = round(sum(newer) / len(newer) - sum(older) / len(older), 2)
+    # A follow-up agreed at the latest interaction has had no contact since
+    if activity is not None and activity.last_follow_up_at is not None and activity.last_follow_up_at >= last_at:
+        vector["outstanding_follow_up"] = activity.last_follow_up_actions
+        vector["days_since_follow_up"] = round(_days(now - activity.last_follow_up_at), 1)
+    return vector
+
+
+def _top(counts: dict) -> Optional[str]:
+    return max(counts, key=counts.get) if counts else None
+
+
+def rank_candidates(vector: dict) -> List[NextStep]:
+    """Every candidate action the features support, highest score first."""
+    candidates = []
+
+    def add(action: str, score: float, text: str, reason: str):
+        candidates.append(NextStep(action=action, score=round(min(score, 1.0), 3), text=text, reason=reason))
+
+    count = vector["interaction_count"]
+    if count == 0:
+        add("introduce", 1.0, "Schedule an introductory meeting.", "No interactions have been logged yet.")
+        return candidates
+
+    if vector["outstanding_follow_up"]:
+        days = vector["days_since_follow_up"]
+        add("follow_up", 0.6 + 0.35 * min(days / 14, 1.0),
+            f"Complete the agreed follow-up: {vector['outstanding_follow_up']}",
+            f"Agreed {days:.0f} day(s) ago and nothing has been logged since.")
+
+    cadence = vector["average_gap_days"] or settings.NEXT_STEPS_DEFAULT_CADENCE_DAYS
+    overdue = vector["days_since_last"] / max(cadence, 1)
+    if overdue >= 1:
+        add("schedule_visit", 0.4 + 0.2 * (overdue - 1),
+            "Schedule the next visit.",
+            f"Last contact was {vector['days_since_last']:.0f} day(s) ago; contact is usually every {cadence:.0f} day(s).")
+
+    trend, last = vector["sentiment_trend"], vector["last_sentiment"]
+    if last == "Negative" or (trend <= -0.5 and last != "Positive"):
+        add("address_concerns", 0.7 + (0.1 if last == "Negative" and trend < 0 else 0.0),
+            "Meet in person to address their concerns.",
+            f"Sentiment is trending down (latest: {last})." if trend < 0 else "The latest interaction was negative.")
+    elif trend >= 0.5 or vector["recent_sentiments"][:2] == ["Positive", "Positive"]:
+        add("build_advocacy", 0.45,
+            "Share new clinical data or invite them to an educational event.",
+            "Sentiment has been positive recently.")
+
+    materials, samples = vector["materials_given"], vector["samples_given"]
+    if samples:
+        top_sample = _top(samples)
+        add("sample_feedback", 0.35, f"Ask about their experience with {top_sample}.",
+            f"Samples given so far: {', '.join(sorted(samples))}.")
+    elif materials:
+        add("offer_samples", 0.3, "Offer samples to go with the materials already shared.",
+            f"Materials shared ({', '.join(sorted(materials))}) but no samples yet.")
+    repeated = {item: n for item, n in materials.items() if n >= 3}
+    if repeated:
+        item = _top(repeated)
+        add("new_material", 0.25, f"Bring something other than {item}.", f"{item} has been shared {repeated[item]} times.")
+
+    types = vector["type_counts"]
+    if count >= 3 and types:
+        main_type = _top(types)
+        if main_type not in ("Meeting", crud_hcp_activity.UNKNOWN) and types[main_type] / count >= 0.8:
+            add("change_channel", 0.3, "Propose an in-person meeting.",
+                f"{types[main_type]} of {count} interactions were {main_type.lower()}s.")
+
+    return sorted(candidates, key=lambda candidate: candidate.score, reverse=True)
+
+
+class NextStepEngine:
+    """Ranks and caches next steps per HCP; optionally has the LLM reword them."""
+
+    def __init__(self, cache_size: Optional[int] = None):
+        self.cache_size = cache_size or settings.NEXT_STEPS_CACHE_SIZE
+        # hcp_id -> {"version", "ranked": every candidate, "phrased": {suggestion count: result}}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_total = 0
+        self.misses_total = 0
+        self.stale_total = 0
+        self.phrased_total = 0
+        self.phrasing_failures_total = 0
+
+    def _lookup(self, hcp_id: int, version) -> Optional[dict]:
+        with self._lock:
+            entry = self._cache.get(hcp_id)
+            if entry is None:
+                self.misses_total += 1
+                return None
+            if entry["version"] != version:
+                self.stale_total += 1
+                del self._cache[hcp_id]
+                return None
+            self._cache.move_to_end(hcp_id)
+            self.hits_total += 1
+            return entry
+
+    def _store(self, hcp_id: int, entry: dict):
+        with self._lock:
+            self._cache[hcp_id] = entry
+            self._cache.move_to_end(hcp_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def suggest(self, db: Session, hcp, limit: Optional[int] = None) -> HCPNextSteps:
+        """Locally ranked next steps for ``hcp``: two primary-key reads, cached until its next write or the next day."""
+        limit = limit or settings.NEXT_STEPS_MAX_SUGGESTIONS
+        activity = crud_hcp_activity.get_activity(db, hcp.id)
+        features = crud_hcp_features.get_features(db, hcp.id)
+        now = datetime.now(timezone.utc)
+        version = (
+            activity.updated_at if activity is not None else None,
+            features.updated_at if features is not None else None,
+            now.date(),
+        )
+        entry = self._lookup(hcp.id, version)
+        if entry is None:
+            vector = build_features(activity, features, now)
+            ranked = HCPNextSteps(
+                hcp_id=hcp.id,
+                hcp_name=hcp.name,
+                suggestions=rank_candidates(vector),
+                features=vector,
+                generated_at=now,
+            )
+            entry = {"version": version, "ranked": ranked, "phrased": {}}
+            self._store(hcp.id, entry)
+        ranked = entry["ranked"]
+        return ranked.model_copy(update={"suggestions": ranked.suggestions[:limit]})
+
+    def _cached_entry(self, result: HCPNextSteps) -> Optional[dict]:
+        """The cache entry ``result`` was cut from, if it is still the current one."""
+        with self._lock:
+            entry = self._cache.get(result.hcp_id)
+        if entry is not None and entry["ranked"].generated_at == result.generated_at:
+            return entry
+        return None
+
+    async def phrase(self, result: HCPNextSteps, llm, deadline: Optional[float] = None) -> HCPNextSteps:
+        """``result`` with its suggestion texts reworded by ``llm``; unchanged if that fails.
+
+        Only the candidate texts and reasons are sent, never the interaction history.
+        """
+        if not result.suggestions:
+            return result
+        entry = self._cached_entry(result)
+        if entry is not None and len(result.suggestions) in entry["phrased"]:
+            return entry["phrased"][len(result.suggestions)]
+
+        steps = "\n".join(
+            f"{number}. {suggestion.text} (Why: {suggestion.reason})"
+            for number, suggestion in enumerate(result.suggestions, start=1)
+        )
+        messages = [("system", PHRASING_PROMPT), ("human", f"HCP: {result.hcp_name}\n{steps}")]
+        try:
+            response = await llm.ainvoke(messages, deadline=deadline)
+        except Exception as e:
+            # Includes CircuitOpenError and DeadlineExceeded: the local wording is still useful
+            self.phrasing_failures_total += 1
+            print(f"WARNING: next_steps.py - LLM phrasing failed ({type(e).__name__}); returning local wording.")
+            return result
+        lines = {}
+        for line in (response.content or "").splitlines():
+            match = NUMBERED_LINE.match(line)
+            if match:
+                lines[int(match.group(1))] = match.group(2).strip()
+        if sorted(lines) != list(range(1, len(result.suggestions) + 1)):
+            self.phrasing_failures_total += 1
+            print(f"WARNING: next_steps.py - Unexpected LLM phrasing for HCP {result.hcp_id}; returning local wording.")
+            return result
+
+        self.phrased_total += 1
+        phrased = result.model_copy(update={
+            "suggestions": [
+                suggestion.model_copy(update={"text": lines[number]})
+                for number, suggestion in enumerate(result.suggestions, start=1)
+            ],
+            "phrased_by": "llm",
+        })
+        if entry is not None:
+            entry["phrased"][len(result.suggestions)] = phrased
+        return phrased
+
+    def metrics(self) -> dict:
+        return {
+            "cached_hcps": len(self._cache),
+            "hits_total": self.hits_total,
+            "misses_total": self.misses_total,
+            "stale_total": self.stale_total,
+            "phrased_total": self.phrased_total,
+            "phrasing_failures_total": self.phrasing_failures_total,
+        }
+
+
+next_step_engine = NextStepEngine()
@@ -0,0 +1,214 @@
+# backend/app/services/write_behind.py
+#
+# Optional write-behind buffer for interaction creates (WRITE_BEHIND_ENABLED). Validated
+# InteractionCreate records queue in memory; one background thread inserts them in group
+# commits of up to WRITE_BEHIND_MAX_BATCH rows, waiting at most WRITE_BEHIND_FLUSH_INTERVAL_MS
+# after the first queued row, so a burst costs one fsync per batch instead of one per row.
+#
+# Durability:
+# - A caller's future resolves (with the row as the API returns it) only after its batch
+#   has committed. With WRITE_BEHIND_DURABILITY="commit" an acknowledged write is exactly
+#   as durable as with the direct path.
+# - Queued rows that have not been acknowledged live only in this process. A crash or
+#   kill loses them and their callers see a failed request; clients retry with the same
+#   Idempotency-Key (or rely on the fingerprint dedupe), so nothing is written twice. The
+#   dead request's pending claim answers 409 until it is IDEMPOTENCY_CLAIM_LEASE_SECONDS
+#   old; then a retry takes it over and the write goes ahead.
+#   A normal shutdown drains the queue first.
+# - WRITE_BEHIND_DURABILITY="async" commits batches with synchronous_commit=off. PostgreSQL
+#   then acknowledges before the WAL reaches disk: a database server crash can lose the
+#   last few hundred milliseconds (3 x wal_writer_delay) of acknowledged writes, without
+#   corrupting anything. An application crash alone still loses nothing acknowledged.
+# - A queued write is committed even if its caller has gone away meanwhile.
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core.admission import Overloaded
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud import idempotency as crud_idempotency, interaction as crud_interaction
+from app.schemas.interaction import Interaction, InteractionCreate
+
+_STOP = object()
+
+
+class PendingWrite:
+    def __init__(self, interaction: InteractionCreate, idempotency: Optional[Tuple[str, str]]):
+        self.interaction = interaction
+        self.idempotency = idempotency # (scope, key) to complete in the same transaction
+        self.future = Future()
+
+    def settle(self, body: Optional[dict] = None, error: Optional[BaseException] = None):
+        """Resolves the caller's future, unless the caller was cancelled (disconnect, shutdown):
+        asyncio.wrap_future passes that cancellation on, and the row is written regardless."""
+        if self.future.done():
+            return
+        # Once running the future can no longer be cancelled, so the set below cannot race
+        if not self.future.running() and not self.future.set_running_or_notify_cancel():
+            return
+        if error is not None:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(body)
+
+
+class WriteBehindBuffer:
+    """Bounded queue of interaction creates flushed by one thread in group commits."""
+
+    def __init__(self, session_factory=SessionLocal, max_batch: Optional[int] = None,
+                 flush_interval_ms: Optional[float] = None, durability: Optional[str] = None):
+        self.session_factory = session_factory
+        self.max_batch = max_batch or settings.WRITE_BEHIND_MAX_BATCH
+        self.flush_interval = (settings.WRITE_BEHIND_FLUSH_INTERVAL_MS if flush_interval_ms is None else flush_interval_ms) / 1000
+        self.synchronous_commit = (durability or settings.WRITE_BEHIND_DURABILITY) != "async"
+        self._queue = queue.Queue(maxsize=settings.WRITE_BEHIND_MAX_PENDING)
+        self._thread: Optional[threading.Thread] = None
+
+        self.rows_total = 0
+        self.batches_total = 0
+        self.fallback_batches_total = 0
+        self.rejected_total = 0
+        self.largest_batch = 0
+        self.last_batch_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run, name="interaction-write-behind", daemon=True)
+        self._thread.start()
+        print(f"DEBUG: write_behind.py - Group commits of up to {self.max_batch} rows every "
+              f"{self.flush_interval * 1000:g}ms (synchronous_commit={'on' if self.synchronous_commit else 'off'}).")
+
+    def stop(self, timeout: float = 30.0):
+        """Flushes everything already queued, then stops the thread."""
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, interaction: InteractionCreate, idempotency: Optional[Tuple[str, str]] = None) -> Future:
+        """Queues ``interaction``; the future resolves after the commit. Raises Overloaded when full."""
+        if not self.running:
+            raise RuntimeError("write-behind buffer is not running")
+        pending = PendingWrite(interaction, idempotency)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            self.rejected_total += 1
+            raise Overloaded("write buffer full", settings.WRITE_BEHIND_RETRY_AFTER_SECONDS)
+        return pending.future
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush_safely(batch)
+        # stop() was called: drain what is left
+        leftover = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                leftover.append(item)
+        for start in range(0, len(leftover), self.max_batch):
+            self._flush_safely(leftover[start:start + self.max_batch])
+
+    def _flush_safely(self, batch: List[PendingWrite]):
+        """_flush that never ends the thread: an unexpected error fails this batch's callers only."""
+        try:
+            self._flush(batch)
+        except Exception as e:
+            print(f"ERROR: write_behind.py - Flushing {len(batch)} row(s) failed unexpectedly: {e}")
+            for pending in batch:
+                pending.settle(error=e)
+
+    def _flush(self, batch: List[PendingWrite]):
+        started = time.perf_counter()
+        try:
+            bodies = self._write_batch(batch)
+        except Exception as e:
+            reason = str(getattr(e, "orig", None) or e).strip()
+            print(f"WARNING: write_behind.py - Group commit of {len(batch)} row(s) failed ({reason}); writing them one by one.")
+            self.fallback_batches_total += 1
+            self._write_each(batch)
+        else:
+            for pending, body in zip(batch, bodies):
+                pending.settle(body)
+        self.batches_total += 1
+        self.rows_total += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self.last_batch_ms = (time.perf_counter() - started) * 1000
+
+    def _write_batch(self, batch: List[PendingWrite]) -> List[dict]:
+        with self.session_factory() as db:
+            try:
+                if not self.synchronous_commit and db.get_bind().dialect.name == "postgresql":
+                    db.execute(text("SET LOCAL synchronous_commit TO OFF"))
+                bodies = crud_interaction.insert_interactions(db, [pending.interaction for pending in batch])
+                keys_by_scope = {}
+                for pending, body in zip(batch, bodies):
+                    if pending.idempotency is not None:
+                        scope, key = pending.idempotency
+                        keys_by_scope.setdefault(scope, []).append((key, 200, body))
+                for scope, outcomes in keys_by_scope.items():
+                    crud_idempotency.complete_keys(db, scope, outcomes)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        return bodies
+
+    def _write_each(self, batch: List[PendingWrite]):
+        """Direct-path fallback, so one bad row fails only its own caller."""
+        for pending in batch:
+            with self.session_factory() as db:
+                try:
+                    db_interaction = crud_interaction.create_interaction(db, pending.interaction)
+                    body = Interaction.model_validate(db_interaction).model_dump(mode="json")
+                    if pending.idempotency is not None:
+                        crud_idempotency.complete_key(db, *pending.idempotency, 200, body)
+                except Exception as e:
+                    db.rollback()
+                    pending.settle(error=e)
+                else:
+                    pending.settle(body)
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.running,
+            "pending": self._queue.qsize(),
+            "rows_total": self.rows_total,
+            "batches_total": self.batches_total,
+            "fallback_batches_total": self.fallback_batches_total,
+            "rejected_total": self.rejected_total,
+            "largest_batch": self.largest_batch,
+            "average_batch": round(self.rows_total / self.batches_total, 1) if self.batches_total else 0.0,
+            "last_batch_ms": round(self.last_batch_ms, 2),
+        }
+
+
+interaction_write_buffer = WriteBehindBuffer()
@@ -0,0 +1,79 @@
+# backend/benchmarks/export_benchmark.py
+#
+# Seeds the interactions table and measures the streaming export path.
+#
+#   python -m benchmarks.export_benchmark --rows 5000000 --format csv
+#
+# Run from the backend directory against a disposable DATABASE_URL: the seed
+# step inserts rows into whatever database the settings point to.
+
+import argparse
+import resource
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.partitions import ensure_interaction_partitions
+from app.models.hcp import HCP
+from app.models.interaction import Interaction, InteractionText
+from app.services import export as export_service
+
+
+def seed(rows: int, chunk: int = 10000):
+    Base.metadata.create_all(bind=engine)
+    ensure_interaction_partitions(engine)
+    with SessionLocal() as db:
+        existing = db.scalar(select(func.count()).select_from(Interaction))
+        if existing >= rows:
+            return existing
+        hcp = db.scalar(select(HCP).where(HCP.name == "Benchmark HCP"))
+        if hcp is None:
+            hcp = HCP(name="Benchmark HCP", specialty="Cardiology")
+            db.add(hcp)
+            db.commit()
+        start = datetime(2020, 1, 1)
+        for offset in range(existing, rows, chunk):
+            ids = db.scalars(insert(Interaction).returning(Interaction.id), [
+                {
+                    "hcp_id": hcp.id,
+                    "interaction_type": "Meeting",
+                    "interaction_date": start + timedelta(minutes=i),
+                    "interaction_time": "10:00",
+                    "occurred_at": (start + timedelta(minutes=i)).replace(tzinfo=timezone.utc),
+                    "hcp_sentiment": "Neutral",
+                }
+                for i in range(offset, min(offset + chunk, rows))
+            ]).all()
+            db.execute(insert(InteractionText), [
+                {
+                    "interaction_id": interaction_id,
+                    "topics_discussed": f"Benchmark topic {interaction_id}",
+                    "summary": "Synthetic interaction used for export benchmarking.",
+                    "raw_text_input": "Met with Benchmark HCP to discuss the synthetic topic.",
+                }
+                for interaction_id in ids
+            ])
+            db.commit()
+    return rows
+
+
+def run(fmt: str):
+    started = time.perf_counter()
+    total_bytes = 0
+    for chunk in export_service.EXPORTERS[fmt]():
+        total_bytes += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"format={fmt} bytes={total_bytes} seconds={elapsed:.2f} "
+          f"MB/s={total_bytes / elapsed / 1e6:.1f} peak_rss_mb={peak_rss_mb:.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--format", choices=sorted(export_service.EXPORTERS), default="csv")
+    args = parser.parse_args()
+    print(f"rows={seed(args.rows)}")
+    run(args.format)
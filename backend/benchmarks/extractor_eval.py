@@ -0,0 +1,138 @@
+# backend/benchmarks/extractor_eval.py
+#
+# Scores a trained local extractor on the held-out chat interactions: per-field accuracy
+# (token F1 for free-text fields), prediction latency, and the share of LLM extraction
+# calls it saves at each confidence threshold.
+#
+#   python -m benchmarks.extractor_eval                        # newest model vs the database
+#   python -m benchmarks.extractor_eval --version v20261019120000
+#   python -m benchmarks.extractor_eval --seed-synthetic 5000 --train
+#
+# --seed-synthetic inserts generated chat interactions: only use it against a disposable
+# DATABASE_URL. --train runs app.jobs.train_extractor first.
+
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select
+
+from app.core.config import settings
+from app.core.database import Base, SessionLocal, engine
+from app.core.partitions import ensure_interaction_partitions
+from app.crud import hcp as crud_hcp
+from app.crud.interaction import get_extraction_examples
+from app.jobs import train_extractor
+from app.models.hcp import HCP
+from app.models.interaction import Interaction, InteractionText
+from app.schemas.hcp import HPCCreate
+from app.services import local_extractor
+
+# Chats are two extraction + summary LLM calls; the extractor can only replace the first
+LLM_CALLS_PER_CHAT = 2
+
+FIRST = ("Emily", "John", "Priya", "Carlos", "Mei", "Ahmed", "Sara", "Tom", "Olga", "Kwame")
+LAST = ("White", "Smith", "Patel", "Garcia", "Chen", "Khan", "Berg", "Novak", "Mensah", "Rossi")
+OPENERS = {
+    "Meeting": ("Met with {name} today", "Had a lunch meeting with {name}", "Visited {name} at the clinic"),
+    "Call": ("Called {name}", "Had a quick phone call with {name}", "Spoke to {name} on the phone"),
+    "Email": ("Emailed {name}", "Got an email reply from {name}"),
+}
+TOPIC_CUES = ("and discussed {}", "and we talked about {}", "to go over {}")
+TOPICS = ("the new dosing guidelines", "Product X efficacy data", "renal safety signals", "the phase III trial results",
+          "formulary access", "patient adherence programs", "side effects in elderly patients", "pricing for Product Y")
+MATERIALS = ("the product brochure", "a reprint of the NEJM study", "the dosing card", "patient leaflets", "the new slide deck")
+SAMPLES = ("10 starter packs", "two boxes of Product X", "5 sample kits")
+OUTCOMES = ("to trial Product X with new patients", "to review the data", "to add it to the hospital formulary",
+            "to present it at the next department meeting")
+FOLLOW_UPS = ("send the safety summary", "schedule a lunch meeting next month", "share the trial protocol", "call back on Friday")
+SENTIMENT_PHRASES = {
+    "Positive": ("was very enthusiastic", "seemed impressed", "was happy with the results", "liked the new data"),
+    "Neutral": ("listened carefully", "asked a few questions", "was noncommittal", "did not say much either way"),
+    "Negative": ("was skeptical", "was not convinced", "raised strong concerns", "did not like the pricing"),
+}
+
+
+def synthetic_chat(rng: random.Random, name: str) -> dict:
+    """A chat message and the fields an LLM would extract from it, with some paraphrased labels."""
+    interaction_type = rng.choice(tuple(OPENERS))
+    sentiment = rng.choice(tuple(SENTIMENT_PHRASES))
+    topic, material, outcome, follow_up = rng.choice(TOPICS), rng.choice(MATERIALS), rng.choice(OUTCOMES), rng.choice(FOLLOW_UPS)
+    samples = rng.choice(SAMPLES) if rng.random() < 0.5 else ""
+    middle = [
+        f"I shared {material}" + (f" and gave {samples}." if samples else "."),
+        f"{rng.choice((name.split()[-1], 'The doctor', 'They'))} {rng.choice(SENTIMENT_PHRASES[sentiment])}.",
+        f"We {rng.choice(('agreed', 'decided'))} {outcome}.",
+    ]
+    rng.shuffle(middle)
+    parts = [rng.choice(OPENERS[interaction_type]).format(name=name) + " " + rng.choice(TOPIC_CUES).format(topic) + "."]
+    parts += middle
+    parts.append(f"{rng.choice(('Next steps:', 'Follow up:', 'I need to'))} {follow_up}.")
+    # LLM labels are not always verbatim: drop a leading article now and then
+    paraphrase = lambda value: value[4:] if value.startswith("the ") and rng.random() < 0.3 else value
+    return {
+        "text": " ".join(parts), "hcp_name": name, "interaction_type": interaction_type, "hcp_sentiment": sentiment,
+        "topics_discussed": paraphrase(topic), "materials_shared": paraphrase(material), "samples_distributed": samples,
+        "outcomes": outcome, "follow_up_actions": follow_up,
+    }
+
+
+def seed_synthetic(rows: int):
+    Base.metadata.create_all(bind=engine)
+    ensure_interaction_partitions(engine)
+    rng = random.Random(0)
+    names = [f"Dr. {first} {last}" for first in FIRST for last in LAST]
+    with SessionLocal() as db:
+        crud_hcp.upsert_hcps(db, [HPCCreate(name=name) for name in names])
+        db.commit()
+        hcp_ids = dict(db.execute(select(HCP.name, HCP.id)).all())
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        chats = [synthetic_chat(rng, rng.choice(names)) for _ in range(rows)]
+        ids = db.scalars(insert(Interaction).returning(Interaction.id, sort_by_parameter_order=True), [
+            {
+                "hcp_id": hcp_ids[chat["hcp_name"]], "interaction_type": chat["interaction_type"],
+                "interaction_date": (start + timedelta(hours=i)).replace(tzinfo=None), "interaction_time": "10:00",
+                "occurred_at": start + timedelta(hours=i), "hcp_sentiment": chat["hcp_sentiment"],
+                "materials_shared": chat["materials_shared"], "samples_distributed": chat["samples_distributed"] or None,
+            }
+            for i, chat in enumerate(chats)
+        ]).all()
+        db.execute(insert(InteractionText), [
+            {
+                "interaction_id": interaction_id, "raw_text_input": chat["text"], "extracted_by": "llm",
+                "topics_discussed": chat["topics_discussed"], "outcomes": chat["outcomes"],
+                "follow_up_actions": chat["follow_up_actions"], "summary": chat["text"][:200],
+            }
+            for interaction_id, chat in zip(ids, chats)
+        ])
+        db.commit()
+
+
+def print_report(report: dict):
+    print(f"held-out chats: {report['examples']}  latency p50={report['latency_ms']['p50']}ms p99={report['latency_ms']['p99']}ms")
+    fields = local_extractor.CLASS_FIELDS + local_extractor.SPAN_FIELDS
+    print(f"{'threshold':>9} {'coverage':>8} {'LLM calls/chat':>14}  " + " ".join(f"{field[:12]:>12}" for field in fields))
+    for threshold, row in report["thresholds"].items():
+        calls = LLM_CALLS_PER_CHAT - row["coverage"]
+        scores = " ".join(f"{row['fields'][field]:>12.3f}" if row["count"] else f"{'-':>12}" for field in fields)
+        print(f"{threshold:>9} {row['coverage']:>8.1%} {calls:>14.2f}  {scores}")
+    print(f"configured threshold: {settings.LOCAL_EXTRACTOR_MIN_CONFIDENCE} (LOCAL_EXTRACTOR_MIN_CONFIDENCE); "
+          f"LLM-only baseline: {LLM_CALLS_PER_CHAT} calls/chat")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--version", default="")
+    parser.add_argument("--seed-synthetic", type=int, default=0)
+    parser.add_argument("--train", action="store_true")
+    args = parser.parse_args()
+
+    if args.seed_synthetic:
+        seed_synthetic(args.seed_synthetic)
+    if args.train:
+        train_extractor.main([])
+    extractor = local_extractor.load_model(version=args.version)
+    with SessionLocal() as db:
+        holdout = [example for example in get_extraction_examples(db) if local_extractor.is_holdout(example["id"])]
+    print(f"model {extractor.version}: trained on {extractor.meta['examples']} chat(s)")
+    print_report(local_extractor.evaluate(extractor, holdout, thresholds=(0.0, 0.5, 0.7, 0.8, 0.9, 0.95, 0.99)))
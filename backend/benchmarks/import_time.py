@@ -0,0 +1,47 @@
+# backend/benchmarks/import_time.py
+#
+# Cold-start import cost of the API, measured with `python -X importtime`.
+#
+#   python -m benchmarks.import_time                  # import app.main
+#   python -m benchmarks.import_time --module app.services.ai_agent --top 15
+
+import argparse
+import subprocess
+import sys
+
+
+def measure(module: str):
+    """Returns (total_seconds, {package: cumulative_seconds}) for a fresh interpreter importing ``module``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr.splitlines()[-1])
+
+    total_us = 0
+    packages = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_part, cumulative_us, name = [part.strip() for part in line.split("|")]
+        self_us = self_part.split(":")[1]
+        if name == module:
+            total_us = int(cumulative_us)
+        top_level = name.split(".")[0]
+        packages[top_level] = packages.get(top_level, 0) + int(self_us)
+    return total_us / 1e6, {name: us / 1e6 for name, us in packages.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    total, packages = measure(args.module)
+    print(f"import {args.module}: {total:.3f}s")
+    for name, seconds in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {name:<24} {seconds:.3f}s")
+    agent_loaded = any(name in packages for name in ("langchain_core", "langchain_groq", "langgraph"))
+    print(f"agent stack imported: {'yes' if agent_loaded else 'no'}")
@@ -0,0 +1,90 @@
+# backend/benchmarks/llm_hedging_benchmark.py
+#
+# Compares tail latency of a fake LLM with injected slowness, called directly and
+# through ResilientLLM (hedging + retries + breaker). No network access needed.
+#
+#   python -m benchmarks.llm_hedging_benchmark --calls 500 --slow-rate 0.05 --slow-seconds 2
+#
+# Also checks that a half-open trial call cancelled by its caller does not leave the
+# breaker stuck rejecting every later call.
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.services.llm_resilience import CircuitBreaker, ResilientLLM
+
+
+class FakeLLM:
+    """Answers in ~base seconds, except a ``slow_rate`` fraction that takes ``slow`` seconds."""
+
+    def __init__(self, base: float, slow: float, slow_rate: float, error_rate: float):
+        self.base, self.slow, self.slow_rate, self.error_rate = base, slow, slow_rate, error_rate
+
+    async def ainvoke(self, messages):
+        delay = self.slow if random.random() < self.slow_rate else random.uniform(self.base * 0.5, self.base * 1.5)
+        await asyncio.sleep(delay)
+        if random.random() < self.error_rate:
+            raise RuntimeError("injected failure")
+        return "ok"
+
+
+async def measure(client, calls: int, concurrency: int):
+    latencies, failures = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.ainvoke([])
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    return pick(0.5), pick(0.95), pick(0.99), failures
+
+
+async def check_cancelled_trial():
+    """Opens a breaker, cancels its half-open trial from outside and expects the next call through."""
+    fake = FakeLLM(base=0.5, slow=0.5, slow_rate=0.0, error_rate=0.0)
+    breaker = CircuitBreaker(window=10, error_rate=0.5, min_calls=1, cooldown=0.0)
+    wrapped = ResilientLLM(fake, breaker, "cancelled-trial")
+    breaker._open()
+    try:
+        async with asyncio.timeout(0.05):
+            await wrapped.ainvoke([])
+    except TimeoutError:
+        pass
+    fake.base = 0.01
+    await wrapped.ainvoke([]) # raises CircuitOpenError if the breaker got stuck half-open
+    assert breaker.state == "closed", breaker.state
+    assert wrapped.latency.samples and wrapped.latency.samples[0] >= 0.05, list(wrapped.latency.samples)
+    print("cancelled trial: breaker recovered, cut-short latency recorded")
+
+
+async def main(args):
+    await check_cancelled_trial()
+    fake = FakeLLM(args.base_seconds, args.slow_seconds, args.slow_rate, args.error_rate)
+    breaker = CircuitBreaker(window=50, error_rate=0.5, min_calls=20, cooldown=5)
+    wrapped = ResilientLLM(fake, breaker, "fake")
+    for label, client in (("direct", fake), ("resilient", wrapped)):
+        p50, p95, p99, failures = await measure(client, args.calls, args.concurrency)
+        print(f"{label:<10} p50={p50:.3f}s p95={p95:.3f}s p99={p99:.3f}s failures={failures}")
+    print(f"resilient  {wrapped.metrics()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--base-seconds", type=float, default=0.2)
+    parser.add_argument("--slow-seconds", type=float, default=2.0)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
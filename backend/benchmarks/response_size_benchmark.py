@@ -0,0 +1,111 @@
+# backend/benchmarks/response_size_benchmark.py
+#
+# Bytes on the wire and server CPU per response for the list endpoints, with and without
+# fields= and for each Accept-Encoding the compression middleware negotiates.
+#
+#   python -m benchmarks.response_size_benchmark --rows 2000 --limit 100 --requests 50
+#
+# Run from the backend directory against a disposable DATABASE_URL: the seed step
+# inserts rows into whatever database the settings point to. CPU is process time of the
+# in-process TestClient, so it includes a small, constant client-side share.
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert, select
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.partitions import ensure_interaction_partitions
+from app.crud import hcp as crud_hcp
+from app.main import app
+from app.models.hcp import HCP
+from app.models.interaction import Interaction, InteractionText
+from app.schemas.hcp import HPCCreate
+
+WORDS = ("patient", "dosage", "trial", "efficacy", "formulary", "samples", "adherence", "renal", "follow-up",
+         "cardiology", "guideline", "side effects", "titration", "outcomes", "reimbursement", "study", "label")
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def seed(rows: int, hcps: int, chunk: int = 2000):
+    Base.metadata.create_all(bind=engine)
+    ensure_interaction_partitions(engine)
+    rng = random.Random(0)
+    with SessionLocal() as db:
+        crud_hcp.upsert_hcps(db, [
+            HPCCreate(name=f"Dr. Benchmark {i}", specialty=rng.choice(WORDS), contact_info=f"bench{i}@example.com")
+            for i in range(hcps)
+        ])
+        db.commit()
+        hcp_ids = db.scalars(select(HCP.id)).all()
+        existing = db.scalar(select(func.count()).select_from(Interaction))
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for offset in range(existing, rows, chunk):
+            ids = db.scalars(insert(Interaction).returning(Interaction.id), [
+                {
+                    "hcp_id": rng.choice(hcp_ids),
+                    "interaction_type": rng.choice(("Meeting", "Call", "Email")),
+                    "interaction_date": (start + timedelta(hours=i)).replace(tzinfo=None),
+                    "interaction_time": (start + timedelta(hours=i)).strftime("%H:%M"),
+                    "occurred_at": start + timedelta(hours=i),
+                    "hcp_sentiment": rng.choice(("Positive", "Neutral", "Negative")),
+                }
+                for i in range(offset, min(offset + chunk, rows))
+            ]).all()
+            db.execute(insert(InteractionText), [
+                {
+                    "interaction_id": interaction_id,
+                    "topics_discussed": sentence(rng, 8),
+                    "outcomes": sentence(rng, 12),
+                    "follow_up_actions": sentence(rng, 10),
+                    "summary": sentence(rng, 60),
+                    "raw_text_input": sentence(rng, 90),
+                }
+                for interaction_id in ids
+            ])
+            db.commit()
+
+
+def measure(client: TestClient, url: str, encoding: str, requests: int):
+    """Returns (wire bytes of one response, server CPU milliseconds per response)."""
+    wire_bytes = 0
+    started = time.process_time()
+    for _ in range(requests):
+        with client.stream("GET", url, headers={"Accept-Encoding": encoding}) as response:
+            response.raise_for_status()
+            wire_bytes = sum(len(chunk) for chunk in response.iter_raw())
+    return wire_bytes, (time.process_time() - started) / requests * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--hcps", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    seed(args.rows, args.hcps)
+    # The first URL of each group, uncompressed, is the "before" baseline for the group
+    groups = (
+        (f"/api/v1/interactions/?limit={args.limit}",
+         f"/api/v1/interactions/?limit={args.limit}&fields=interaction_type,occurred_at,hcp_sentiment"),
+        (f"/api/v1/hcps/?limit={args.limit}",
+         f"/api/v1/hcps/?limit={args.limit}&fields=name"),
+    )
+    with TestClient(app) as client:
+        for urls in groups:
+            baseline_bytes = baseline_cpu = None
+            for url in urls:
+                measure(client, url, "identity", 5) # warm-up
+                for encoding in ("identity", "gzip", "br"):
+                    wire_bytes, cpu_ms = measure(client, url, encoding, args.requests)
+                    baseline_bytes, baseline_cpu = baseline_bytes or wire_bytes, baseline_cpu or cpu_ms
+                    print(f"{url:<90} {encoding:<8} bytes={wire_bytes:>7} ({wire_bytes / baseline_bytes:6.1%}) "
+                          f"cpu_ms={cpu_ms:.2f} ({cpu_ms / baseline_cpu:4.2f}x)")
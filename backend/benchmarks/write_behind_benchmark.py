@@ -0,0 +1,101 @@
+# backend/benchmarks/write_behind_benchmark.py
+#
+# Commits/sec and write latency for bursts of interaction creates: the direct path (one
+# transaction per row) against the write-behind buffer (group commits).
+#
+#   python -m benchmarks.write_behind_benchmark --writers 50 --rows 5000
+#
+# Run from the backend directory against a disposable DATABASE_URL: it inserts rows into
+# whatever database the settings point to. Each writer thread stands in for one request
+# and waits for its write before sending the next, like a rep waiting on the form.
+
+import argparse
+import statistics
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base, SessionLocal, engine
+from app.core.partitions import ensure_interaction_partitions
+from app.crud import hcp as crud_hcp, interaction as crud_interaction
+from app.schemas.hcp import HPCCreate
+from app.schemas.interaction import InteractionCreate
+from app.services.write_behind import WriteBehindBuffer
+
+commits = 0
+
+
+def _count_commit(conn):
+    global commits
+    commits += 1
+
+
+def seed_hcps(count: int):
+    Base.metadata.create_all(bind=engine)
+    ensure_interaction_partitions(engine)
+    with SessionLocal() as db:
+        rows = crud_hcp.upsert_hcps(db, [HPCCreate(name=f"Dr. Write Behind {i}") for i in range(count)])
+        db.commit()
+    return [row.id for row in rows]
+
+
+def run(label: str, write, writers: int, rows: int, hcp_ids):
+    """Runs ``rows`` writes split over ``writers`` threads; ``write(interaction)`` blocks until stored."""
+    global commits
+    latencies = []
+    per_writer = rows // writers
+
+    def writer(index: int):
+        for i in range(per_writer):
+            interaction = InteractionCreate(
+                hcp_id=hcp_ids[(index + i) % len(hcp_ids)],
+                topics_discussed=f"{label} writer {index} row {i} {time.time_ns()}",
+            )
+            started = time.perf_counter()
+            write(interaction)
+            latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(writers)]
+    commits_before = commits
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    total_commits = commits - commits_before
+    latencies.sort()
+    print(f"{label:<24} rows/s={len(latencies) / elapsed:8.0f} commits/s={total_commits / elapsed:8.0f} "
+          f"commits/row={total_commits / len(latencies):5.3f} p50={statistics.median(latencies) * 1000:7.1f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--hcps", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--interval-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    hcp_ids = seed_hcps(args.hcps)
+    # Its own pool, large enough that the direct path gets one connection per writer
+    bench_engine = create_engine(settings.DATABASE_URL, pool_size=args.writers, max_overflow=0)
+    event.listen(bench_engine, "commit", _count_commit)
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+
+    def direct_write(interaction: InteractionCreate):
+        with BenchSession() as db:
+            crud_interaction.create_interaction(db, interaction)
+
+    run("direct", direct_write, args.writers, args.rows, hcp_ids)
+    for durability in ("commit", "async"):
+        buffer = WriteBehindBuffer(BenchSession, max_batch=args.batch, flush_interval_ms=args.interval_ms, durability=durability)
+        buffer.start()
+        run(f"write-behind ({durability})", lambda interaction: buffer.submit(interaction).result(), args.writers, args.rows, hcp_ids)
+        buffer.stop()
+        print(f"{'':<24} {buffer.metrics()}")
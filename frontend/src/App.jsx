@@ -1,10 +1,23 @@
-import React from 'react';
+import React, { useEffect } from 'react';
+import { useDispatch } from 'react-redux';
 import Header from './components/Header';
 import LogInteractionForm from './components/LogInteractionForm';
 import ChatInterface from './components/ChatInterface';
+import InteractionList from './components/InteractionList';
+import { fetchHCPs, subscribeToServerEvents } from './actions/interactionActions';
 import './index.css'; // Import the global styles
 
 function App() {
+    const dispatch = useDispatch();
+
+    // Creates and edits (from any client or the chat agent) arrive as events
+    useEffect(() => dispatch(subscribeToServerEvents()), [dispatch]);
+
+    // The one place HCPs are loaded; both panels select them from the store
+    useEffect(() => {
+        dispatch(fetchHCPs());
+    }, [dispatch]);
+
     return (
         <div className="app-container">
             <Header />
@@ -13,6 +26,7 @@ function App() {
                 <LogInteractionForm /> {/* Left panel */}
                 <ChatInterface />      {/* Right panel */}
             </div>
+            <InteractionList />
         </div>
     );
 }
@@ -2,13 +2,22 @@ import {
     getHCPs,
     createHCP,
     logInteraction,
-    logInteractionFromChat
+    logInteractionFromChat,
+    getInteractions,
+    invalidateCache,
+    subscribeToEvents,
+    INTERACTION_PAGE_SIZE
 } from '../services/api';
 
 export const FETCH_HCPS_REQUEST = 'FETCH_HCPS_REQUEST';
 export const FETCH_HCPS_SUCCESS = 'FETCH_HCPS_SUCCESS';
 export const FETCH_HCPS_FAILURE = 'FETCH_HCPS_FAILURE';
 
+export const FETCH_INTERACTIONS_REQUEST = 'FETCH_INTERACTIONS_REQUEST';
+export const FETCH_INTERACTIONS_SUCCESS = 'FETCH_INTERACTIONS_SUCCESS';
+export const FETCH_INTERACTIONS_FAILURE = 'FETCH_INTERACTIONS_FAILURE';
+export const INTERACTIONS_RECEIVED = 'INTERACTIONS_RECEIVED';
+
 export const CREATE_HCP_REQUEST = 'CREATE_HCP_REQUEST';
 export const CREATE_HCP_SUCCESS = 'CREATE_HCP_SUCCESS';
 export const CREATE_HCP_FAILURE = 'CREATE_HCP_FAILURE';
@@ -25,11 +34,17 @@ export const ADD_CHAT_MESSAGE = 'ADD_CHAT_MESSAGE';
 export const CLEAR_CHAT_MESSAGES = 'CLEAR_CHAT_MESSAGES';
 export const SET_LAST_LOGGED_INTERACTION = 'SET_LAST_LOGGED_INTERACTION';
 
+export const HCP_UPSERTED = 'HCP_UPSERTED';
+export const INTERACTION_UPSERTED = 'INTERACTION_UPSERTED';
+
+// A cached list is dispatched at once; a fresher one follows when the cache had gone stale
 export const fetchHCPs = () => {
     return async (dispatch) => {
         dispatch({ type: FETCH_HCPS_REQUEST });
         try {
-            const response = await getHCPs();
+            const response = await getHCPs({
+                onRevalidate: (fresh) => dispatch({ type: FETCH_HCPS_SUCCESS, payload: fresh.data })
+            });
             dispatch({
                 type: FETCH_HCPS_SUCCESS,
                 payload: response.data
@@ -43,6 +58,47 @@ export const fetchHCPs = () => {
     };
 };
 
+// Loads the next page of the interaction list; a no-op while one is loading or at the end
+export const fetchInteractionsPage = () => {
+    return async (dispatch, getState) => {
+        const { interactionsLoaded, loadingInteractions, hasMoreInteractions } = getState().interactions;
+        if (loadingInteractions || !hasMoreInteractions) {
+            return;
+        }
+        dispatch({ type: FETCH_INTERACTIONS_REQUEST });
+        try {
+            const response = await getInteractions({
+                skip: interactionsLoaded,
+                onRevalidate: (fresh) => dispatch({ type: INTERACTIONS_RECEIVED, payload: { items: fresh.data, newest: false } })
+            });
+            dispatch({
+                type: FETCH_INTERACTIONS_SUCCESS,
+                payload: { skip: interactionsLoaded, items: response.data, pageSize: INTERACTION_PAGE_SIZE }
+            });
+        } catch (error) {
+            dispatch({
+                type: FETCH_INTERACTIONS_FAILURE,
+                payload: error.message
+            });
+        }
+    };
+};
+
+// Re-reads the newest page after change events were missed; rows not seen yet go on top
+const refreshInteractions = () => {
+    return async (dispatch, getState) => {
+        if (getState().interactions.interactionsLoaded === 0) {
+            return;
+        }
+        try {
+            const response = await getInteractions();
+            dispatch({ type: INTERACTIONS_RECEIVED, payload: { items: response.data, newest: true } });
+        } catch (error) {
+            console.warn(`Failed to refresh interactions: ${error.message}`);
+        }
+    };
+};
+
 export const createHCPAction = (hcpData) => {
     return async (dispatch) => {
         dispatch({ type: CREATE_HCP_REQUEST });
@@ -67,7 +123,8 @@ export const logInteractionAction = (interactionData) => {
     return async (dispatch) => {
         dispatch({ type: LOG_INTERACTION_REQUEST });
         try {
-            const response = await logInteraction(interactionData);
+            // One key per submit; the API layer reuses it for its retry
+            const response = await logInteraction(interactionData, crypto.randomUUID());
             dispatch({
                 type: LOG_INTERACTION_SUCCESS,
                 payload: response.data
@@ -102,7 +159,7 @@ export const logChatInteractionAction = (chatData) => {
                 samples_distributed: chatData.samples_distributed,
                 outcomes: chatData.outcomes,
                 follow_up_actions: chatData.follow_up_actions
-            });
+            }, crypto.randomUUID());
 
             if (response.data?.interaction_object) {
                 dispatch({
@@ -149,4 +206,33 @@ export const clearChatMessages = () => ({
 export const setLastLoggedInteraction = (interaction) => ({
     type: SET_LAST_LOGGED_INTERACTION,
     payload: interaction,
-});
\ No newline at end of file
+});
+
+// Patches the store from a server change event instead of re-fetching the lists
+export const applyServerEvent = (event) => {
+    return (dispatch) => {
+        switch (event.type) {
+            case 'hcp.created':
+            case 'hcp.updated':
+                dispatch({ type: HCP_UPSERTED, payload: event.data });
+                break;
+            case 'interaction.created':
+            case 'interaction.updated':
+                dispatch({ type: INTERACTION_UPSERTED, payload: event.data });
+                break;
+            case 'resync':
+                // Events were missed (slow client, reconnect, bulk import): reload
+                invalidateCache();
+                dispatch(fetchHCPs());
+                dispatch(refreshInteractions());
+                break;
+            default:
+                break;
+        }
+    };
+};
+
+// Returns the unsubscribe function, so it can be a useEffect cleanup
+export const subscribeToServerEvents = () => {
+    return (dispatch) => subscribeToEvents((event) => dispatch(applyServerEvent(event)));
+};
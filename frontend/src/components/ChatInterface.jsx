@@ -11,26 +11,23 @@ import {
 import {
     logChatInteractionAction,
     addChatMessage,
-    clearChatMessages,
-    fetchHCPs
+    clearChatMessages
 } from '../actions/interactionActions';
+import {
+    selectHCPs
+} from '../reducers/interactionReducer';
 
 const ChatInterface = () => {
     const dispatch = useDispatch();
-    const {
-        chatMessages,
-        loadingChatInteraction,
-        errorChatInteraction,
-        hcps
-    } = useSelector((state) => state.interactions);
+    const chatMessages = useSelector((state) => state.interactions.chatMessages);
+    const loadingChatInteraction = useSelector((state) => state.interactions.loadingChatInteraction);
+    const errorChatInteraction = useSelector((state) => state.interactions.errorChatInteraction);
+    // HCPs are loaded once by App
+    const hcps = useSelector(selectHCPs);
     const [chatInput, setChatInput] = useState('');
     const [selectedHCPName, setSelectedHCPName] = useState('');
     const messagesEndRef = useRef(null);
 
-    useEffect(() => {
-        dispatch(fetchHCPs());
-    }, [dispatch]);
-
     const scrollToBottom = () => {
         messagesEndRef.current?.scrollIntoView({
             behavior: "smooth"
@@ -0,0 +1,153 @@
+// frontend/src/components/InteractionList.jsx
+import React, { memo, useEffect, useState } from 'react';
+import { useSelector, useDispatch } from 'react-redux';
+import { fetchInteractionsPage } from '../actions/interactionActions';
+import { selectHCPById, selectInteractionById, selectInteractionIds } from '../reducers/interactionReducer';
+
+// Only the rows in view (plus OVERSCAN on either side) are rendered, each at a fixed
+// height, so the list costs the same with ten rows or tens of thousands. The next page
+// is requested once the view gets within PREFETCH_ROWS of the last loaded row.
+const ROW_HEIGHT = 56;
+const VIEWPORT_HEIGHT = 448;
+const OVERSCAN = 8;
+const PREFETCH_ROWS = 40;
+
+const formatOccurredAt = (occurredAt) => {
+    const date = new Date(occurredAt);
+    return isNaN(date.getTime()) ? '' : date.toLocaleString([], { dateStyle: 'medium', timeStyle: 'short' });
+};
+
+// Each row selects its own interaction and HCP, so a change event re-renders one row
+const InteractionRow = memo(({ interactionId, top }) => {
+    const interaction = useSelector((state) => selectInteractionById(state, interactionId));
+    const hcp = useSelector((state) => selectHCPById(state, interaction.hcp_id));
+
+    return (
+        <div style={{ ...styles.row, top }}>
+            <div style={styles.rowHeader}>
+                <span style={styles.hcpName}>{hcp ? hcp.name : `HCP #${interaction.hcp_id}`}</span>
+                <span style={styles.meta}>
+                    {interaction.interaction_type} · {formatOccurredAt(interaction.occurred_at)}
+                    {interaction.hcp_sentiment ? ` · ${interaction.hcp_sentiment}` : ''}
+                </span>
+            </div>
+            <div style={styles.topics}>{interaction.topics_discussed || 'No topics recorded'}</div>
+        </div>
+    );
+});
+
+const InteractionList = () => {
+    const dispatch = useDispatch();
+    const interactionIds = useSelector(selectInteractionIds);
+    const loading = useSelector((state) => state.interactions.loadingInteractions);
+    const hasMore = useSelector((state) => state.interactions.hasMoreInteractions);
+    const error = useSelector((state) => state.interactions.errorInteractions);
+    const [scrollTop, setScrollTop] = useState(0);
+
+    const first = Math.max(0, Math.floor(scrollTop / ROW_HEIGHT) - OVERSCAN);
+    const last = Math.min(interactionIds.length, Math.ceil((scrollTop + VIEWPORT_HEIGHT) / ROW_HEIGHT) + OVERSCAN);
+
+    // After a failed page the user retries with the button; scrolling does not hammer the API
+    useEffect(() => {
+        if (hasMore && !loading && !error && last + PREFETCH_ROWS >= interactionIds.length) {
+            dispatch(fetchInteractionsPage());
+        }
+    }, [dispatch, hasMore, loading, error, last, interactionIds.length]);
+
+    return (
+        <div style={styles.panel}>
+            <h2 style={styles.header}>Recent Interactions</h2>
+            <div style={styles.viewport} onScroll={(e) => setScrollTop(e.currentTarget.scrollTop)}>
+                <div style={{ position: 'relative', height: interactionIds.length * ROW_HEIGHT }}>
+                    {interactionIds.slice(first, last).map((interactionId, offset) => (
+                        <InteractionRow key={interactionId} interactionId={interactionId} top={(first + offset) * ROW_HEIGHT} />
+                    ))}
+                </div>
+                {!loading && !hasMore && interactionIds.length === 0 && (
+                    <div style={styles.status}>No interactions logged yet.</div>
+                )}
+            </div>
+            <div style={styles.footer}>
+                {error ? (
+                    <>
+                        Failed to load interactions: {error}{' '}
+                        <button style={styles.retryButton} onClick={() => dispatch(fetchInteractionsPage())}>Retry</button>
+                    </>
+                ) : `${interactionIds.length} loaded${loading ? ', loading more...' : hasMore ? '' : ', all shown'}`}
+            </div>
+        </div>
+    );
+};
+
+const styles = {
+    panel: {
+        maxWidth: '1200px',
+        margin: '0 auto 20px',
+        padding: '20px 30px',
+        backgroundColor: 'white',
+        borderRadius: '8px',
+        boxShadow: '0 2px 10px rgba(0,0,0,0.1)',
+    },
+    header: {
+        fontSize: '18px',
+        color: '#333',
+        marginBottom: '15px',
+    },
+    viewport: {
+        height: `${VIEWPORT_HEIGHT}px`,
+        overflowY: 'auto',
+        border: '1px solid #e9ecef',
+        borderRadius: '5px',
+    },
+    row: {
+        position: 'absolute',
+        left: 0,
+        right: 0,
+        height: `${ROW_HEIGHT}px`,
+        boxSizing: 'border-box',
+        padding: '8px 12px',
+        borderBottom: '1px solid #f1f3f5',
+        overflow: 'hidden',
+    },
+    rowHeader: {
+        display: 'flex',
+        justifyContent: 'space-between',
+        fontSize: '14px',
+    },
+    hcpName: {
+        fontWeight: 'bold',
+        color: '#333',
+    },
+    meta: {
+        color: '#6c757d',
+        fontSize: '12px',
+    },
+    topics: {
+        fontSize: '13px',
+        color: '#495057',
+        whiteSpace: 'nowrap',
+        overflow: 'hidden',
+        textOverflow: 'ellipsis',
+        marginTop: '4px',
+    },
+    status: {
+        color: '#888',
+        textAlign: 'center',
+        padding: '20px',
+    },
+    footer: {
+        marginTop: '8px',
+        fontSize: '12px',
+        color: '#6c757d',
+    },
+    retryButton: {
+        padding: '2px 10px',
+        border: '1px solid #007bff',
+        borderRadius: '4px',
+        backgroundColor: 'white',
+        color: '#007bff',
+        cursor: 'pointer',
+    },
+};
+
+export default InteractionList;
@@ -1,11 +1,17 @@
 import React, { useState, useEffect } from 'react';
 import { useSelector, useDispatch } from 'react-redux';
-import { fetchHCPs, logInteractionAction, createHCPAction } from '../actions/interactionActions';
+import { logInteractionAction, createHCPAction } from '../actions/interactionActions';
+import { selectHCPs, selectHCPsById, selectHCPOfInteraction } from '../reducers/interactionReducer';
 import './LogInteractionForm.css'; // Import the new CSS file
 
 const LogInteractionForm = () => {
   const dispatch = useDispatch();
-  const { hcps, loadingHCPs, lastLoggedInteraction } = useSelector((state) => state.interactions);
+  const hcps = useSelector(selectHCPs);
+  const hcpsById = useSelector(selectHCPsById);
+  const loadingHCPs = useSelector((state) => state.interactions.loadingHCPs);
+  const lastLoggedInteraction = useSelector((state) => state.interactions.lastLoggedInteraction);
+  // Stays the same object across HCP list refreshes, so the auto-fill below does not re-run
+  const lastLoggedHCP = useSelector((state) => selectHCPOfInteraction(state, lastLoggedInteraction));
 
   const [formState, setFormState] = useState({
     hcpId: '',
@@ -40,45 +46,26 @@ const LogInteractionForm = () => {
       date: currentDate,
       time: currentTime
     }));
+  }, []);
 
-    // Fetch HCPs once on component mount
-    dispatch(fetchHCPs());
-  }, [dispatch]);
-
-  // Auto-fill from last logged interaction - REFINED LOGIC
+  // Auto-fill from last logged interaction; HCPs are loaded once by App
   useEffect(() => {
-    const autoFillForm = async () => {
+    const autoFillForm = () => {
       if (!lastLoggedInteraction) {
         return;
       }
 
-      // Ensure HCPs are loaded before trying to find an HCP
-      // This is crucial if lastLoggedInteraction updates *before* hcps are fully fetched
-      if (hcps.length === 0 && !loadingHCPs) {
-        // If HCPs aren't loaded and not currently loading, try fetching again
-        await dispatch(fetchHCPs());
-      }
-
-      const hcp = hcps.find(h => h.id === lastLoggedInteraction.hcp_id);
       let hcpNameToUse = '';
       let hcpIdToUse = '';
 
-      if (hcp) {
-        hcpNameToUse = hcp.name;
-        hcpIdToUse = String(hcp.id);
+      if (lastLoggedHCP) {
+        hcpNameToUse = lastLoggedHCP.name;
+        hcpIdToUse = String(lastLoggedHCP.id);
       } else if (lastLoggedInteraction.hcp_name) {
-        // Fallback: If HCP not found in current list but name is present in interaction object
-        // This might happen if the HCP was just created and hcps list hasn't refreshed yet
-        // Or if the initial fetch was slow.
+        // The HCP was just created and its change event has not arrived yet; the effect
+        // runs again once it is in the store
         hcpNameToUse = lastLoggedInteraction.hcp_name;
-        // Attempt to find HCP by name if ID lookup failed (more robust)
-        const foundHcpByName = hcps.find(h => h.name === lastLoggedInteraction.hcp_name);
-        if (foundHcpByName) {
-          hcpIdToUse = String(foundHcpByName.id);
-        } else {
-          // If still not found, leave HCP ID/Name unset, or show an alert
-          console.warn(`HCP "${lastLoggedInteraction.hcp_name}" (ID: ${lastLoggedInteraction.hcp_id}) not found in current HCP list for auto-fill.`);
-        }
+        console.warn(`HCP "${lastLoggedInteraction.hcp_name}" (ID: ${lastLoggedInteraction.hcp_id}) not found in current HCP list for auto-fill.`);
       }
 
       // Helper for date formatting
@@ -132,13 +119,12 @@ const LogInteractionForm = () => {
       }));
     };
 
-    // Call autofill only if lastLoggedInteraction is set or hcps change (which might resolve hcpIdToUse)
     // Avoid running if hcps are currently loading
     if (!loadingHCPs) {
       autoFillForm();
     }
-    // Dependency array: re-run if lastLoggedInteraction changes, or if hcps array changes
-  }, [lastLoggedInteraction, hcps, loadingHCPs, dispatch]);
+    // Re-run when another interaction is logged or when its HCP shows up in the store
+  }, [lastLoggedInteraction, lastLoggedHCP, loadingHCPs]);
 
 
   const handleInputChange = (e) => {
@@ -165,7 +151,6 @@ const LogInteractionForm = () => {
         hcpId: String(newHCP.id),
         hcpName: newHCP.name
       }));
-      dispatch(fetchHCPs()); // Re-fetch to update the main HCP list
     } catch (error) {
       setCreateHCPError(error.message || 'Failed to create HCP.');
     }
@@ -213,7 +198,7 @@ const LogInteractionForm = () => {
                                 setShowCreateHCPModal(true);
                                 setFormState(prev => ({ ...prev, hcpId: '', hcpName: '' }));
                             } else {
-                                const selectedHCP = hcps.find(h => h.id === parseInt(selectedId));
+                                const selectedHCP = hcpsById[selectedId];
                                 setFormState(prev => ({ 
                                 ...prev, 
                                 hcpId: selectedId,
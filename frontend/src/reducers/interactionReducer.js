@@ -1,7 +1,14 @@
+import {
+    createSelector
+} from '@reduxjs/toolkit';
 import {
     FETCH_HCPS_REQUEST,
     FETCH_HCPS_SUCCESS,
     FETCH_HCPS_FAILURE,
+    FETCH_INTERACTIONS_REQUEST,
+    FETCH_INTERACTIONS_SUCCESS,
+    FETCH_INTERACTIONS_FAILURE,
+    INTERACTIONS_RECEIVED,
     CREATE_HCP_REQUEST,
     CREATE_HCP_SUCCESS,
     CREATE_HCP_FAILURE,
@@ -13,11 +20,59 @@ import {
     LOG_CHAT_INTERACTION_FAILURE,
     ADD_CHAT_MESSAGE,
     CLEAR_CHAT_MESSAGES,
-    SET_LAST_LOGGED_INTERACTION
+    SET_LAST_LOGGED_INTERACTION,
+    HCP_UPSERTED,
+    INTERACTION_UPSERTED
 } from '../actions/interactionActions';
 
+// HCPs and interactions are stored normalized: an id -> row map plus the ids in display
+// order. Merging keeps the previous object of a row whose fields did not change (and the
+// previous map and id list when nothing changed), so a re-fetch or a repeated change event
+// re-renders nothing and memoized selectors return the same arrays.
+const mergeRow = (existing, item) => {
+    if (existing && Object.keys(item).every((key) => existing[key] === item[key])) {
+        return existing;
+    }
+    return { ...existing, ...item };
+};
+
+const upsertRows = (byId, items) => {
+    let updated = byId;
+    for (const item of items) {
+        const merged = mergeRow(byId[item.id], item);
+        if (merged !== byId[item.id]) {
+            if (updated === byId) {
+                updated = { ...byId };
+            }
+            updated[item.id] = merged;
+        }
+    }
+    return updated;
+};
+
+// Ids of items not in byId yet, before (newest) or after the existing ids.
+// A change event can arrive before or after the HTTP response for the same write.
+const addIds = (ids, byId, items, newest) => {
+    const added = items.map((item) => item.id).filter((id, index, all) => !(id in byId) && all.indexOf(id) === index);
+    if (added.length === 0) {
+        return ids;
+    }
+    return newest ? [...added, ...ids] : [...ids, ...added];
+};
+
+const receiveHCPs = (state, items, newest = false) => ({
+    hcpIds: addIds(state.hcpIds, state.hcpsById, items, newest),
+    hcpsById: upsertRows(state.hcpsById, items),
+});
+
+const receiveInteractions = (state, items, newest = false) => ({
+    interactionIds: addIds(state.interactionIds, state.interactionsById, items, newest),
+    interactionsById: upsertRows(state.interactionsById, items),
+});
+
 const initialState = {
-    hcps: [],
+    hcpsById: {},
+    hcpIds: [],
     loadingHCPs: false,
     errorHCPs: null,
     loadingInteraction: false,
@@ -27,19 +82,26 @@ const initialState = {
     errorChatInteraction: null,
     loggedInInteraction: null,
     lastLoggedInteraction: null,
+    interactionsById: {},
+    interactionIds: [], // newest first, as the list endpoint returns them
+    interactionsLoaded: 0, // rows read from the list endpoint so far: the next page's skip
+    hasMoreInteractions: true,
+    loadingInteractions: false,
+    errorInteractions: null,
 };
 
 const interactionReducer = (state = initialState, action) => {
     switch (action.type) {
         case FETCH_HCPS_REQUEST:
+            // With HCPs already loaded the form stays up while they are refreshed
             return { ...state,
-                loadingHCPs: true,
+                loadingHCPs: state.hcpIds.length === 0,
                 errorHCPs: null
             };
         case FETCH_HCPS_SUCCESS:
             return { ...state,
                 loadingHCPs: false,
-                hcps: action.payload
+                ...receiveHCPs(state, action.payload)
             };
         case FETCH_HCPS_FAILURE:
             return { ...state,
@@ -47,6 +109,30 @@ const interactionReducer = (state = initialState, action) => {
                 errorHCPs: action.payload
             };
 
+        case FETCH_INTERACTIONS_REQUEST:
+            return { ...state,
+                loadingInteractions: true,
+                errorInteractions: null
+            };
+        case FETCH_INTERACTIONS_SUCCESS: {
+            const { skip, items, pageSize } = action.payload;
+            return { ...state,
+                loadingInteractions: false,
+                ...receiveInteractions(state, items),
+                interactionsLoaded: Math.max(state.interactionsLoaded, skip + items.length),
+                hasMoreInteractions: items.length === pageSize
+            };
+        }
+        case FETCH_INTERACTIONS_FAILURE:
+            return { ...state,
+                loadingInteractions: false,
+                errorInteractions: action.payload
+            };
+        case INTERACTIONS_RECEIVED:
+            return { ...state,
+                ...receiveInteractions(state, action.payload.items, action.payload.newest)
+            };
+
         case CREATE_HCP_REQUEST:
             return { ...state,
                 loadingHCPs: true,
@@ -55,7 +141,7 @@ const interactionReducer = (state = initialState, action) => {
         case CREATE_HCP_SUCCESS:
             return { ...state,
                 loadingHCPs: false,
-                hcps: [...state.hcps, action.payload]
+                ...receiveHCPs(state, [action.payload])
             };
         case CREATE_HCP_FAILURE:
             return { ...state,
@@ -71,7 +157,8 @@ const interactionReducer = (state = initialState, action) => {
         case LOG_INTERACTION_SUCCESS:
             return { ...state,
                 loadingInteraction: false,
-                loggedInInteraction: action.payload
+                loggedInInteraction: action.payload,
+                ...receiveInteractions(state, [action.payload], true)
             };
         case LOG_INTERACTION_FAILURE:
             return { ...state,
@@ -109,9 +196,41 @@ const interactionReducer = (state = initialState, action) => {
                 lastLoggedInteraction: action.payload // Store the full interaction object
             };
 
+        case HCP_UPSERTED:
+            return { ...state,
+                ...receiveHCPs(state, [action.payload])
+            };
+        case INTERACTION_UPSERTED:
+            // New interactions from other clients go on top of the list
+            return { ...state,
+                ...receiveInteractions(state, [action.payload], true)
+            };
+
         default:
             return state;
     }
 };
 
-export default interactionReducer;
\ No newline at end of file
+export default interactionReducer;
+
+// Selectors. Components select the narrowest piece they need; the list selectors are
+// memoized, so they return the same array until an HCP is actually added or changed.
+export const selectHCPsById = (state) => state.interactions.hcpsById;
+export const selectHCPIds = (state) => state.interactions.hcpIds;
+export const selectHCPById = (state, hcpId) => state.interactions.hcpsById[hcpId];
+export const selectHCPs = createSelector(
+    [selectHCPIds, selectHCPsById],
+    (hcpIds, hcpsById) => hcpIds.map((id) => hcpsById[id])
+);
+
+// The HCP of an interaction, by id or, for a chat response without one, by name
+export const selectHCPOfInteraction = (state, interaction) => {
+    if (!interaction) {
+        return undefined;
+    }
+    return selectHCPById(state, interaction.hcp_id) ||
+        (interaction.hcp_name ? selectHCPs(state).find((hcp) => hcp.name === interaction.hcp_name) : undefined);
+};
+
+export const selectInteractionIds = (state) => state.interactions.interactionIds;
+export const selectInteractionById = (state, interactionId) => state.interactions.interactionsById[interactionId];
@@ -2,15 +2,110 @@ import axios from 'axios';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL;
 
+// The API is on another origin: credentials are needed for the browser to keep and send
+// its read-your-writes cookie, so reads right after a write go to the primary database
 const api = axios.create({
     baseURL: API_BASE_URL,
+    withCredentials: true,
     headers: {
         'Content-Type': 'application/json',
     },
 });
 
-export const getHCPs = () => api.get('/hcps');
-export const createHCP = (hcpData) => api.post('/hcps/', hcpData);
-export const logInteraction = (interactionData) => api.post('/interactions/', interactionData);
-export const logInteractionFromChat = (chatData) => api.post('/interactions/chat', chatData);
-export const getInteractions = () => api.get('/interactions');
\ No newline at end of file
+// Reads go through a small cache. Concurrent identical GETs share one request, and a
+// cached response is returned at once; once it is older than CACHE_MAX_AGE_MS it is still
+// returned, but fetched again in the background and handed to onRevalidate
+// (stale-while-revalidate). Writes and missed change events invalidate it.
+const CACHE_MAX_AGE_MS = 30000;
+const responseCache = new Map(); // request key -> { response, fetchedAt }
+const inFlight = new Map(); // request key -> promise of the response
+
+const requestKey = (url, params) => `${url}?${new URLSearchParams(params).toString()}`;
+
+const fetchOnce = (key, url, params) => {
+    if (!inFlight.has(key)) {
+        const request = api.get(url, { params })
+            .then((response) => {
+                responseCache.set(key, { response, fetchedAt: Date.now() });
+                return response;
+            })
+            .finally(() => inFlight.delete(key));
+        inFlight.set(key, request);
+    }
+    return inFlight.get(key);
+};
+
+const cachedGet = (url, { params = {}, maxAge = CACHE_MAX_AGE_MS, onRevalidate } = {}) => {
+    const key = requestKey(url, params);
+    const cached = responseCache.get(key);
+    if (!cached) {
+        return fetchOnce(key, url, params);
+    }
+    if (Date.now() - cached.fetchedAt > maxAge) {
+        // On failure the stale response simply stays in use
+        fetchOnce(key, url, params).then(onRevalidate, () => {});
+    }
+    return Promise.resolve(cached.response);
+};
+
+// Drops cached responses whose URL starts with urlPrefix (all of them by default)
+export const invalidateCache = (urlPrefix = '') => {
+    for (const key of responseCache.keys()) {
+        if (key.startsWith(urlPrefix)) {
+            responseCache.delete(key);
+        }
+    }
+};
+
+const invalidating = (urlPrefix, request) => request.then((response) => {
+    invalidateCache(urlPrefix);
+    return response;
+});
+
+// The dropdowns only show names, so the rest of each HCP row is not fetched
+export const getHCPs = ({ onRevalidate } = {}) => cachedGet('/hcps/', { params: { fields: 'name' }, onRevalidate });
+export const createHCP = (hcpData) => invalidating('/hcps/', api.post('/hcps/', hcpData));
+
+// Writes carry an Idempotency-Key so a retry after a dropped connection or a 503
+// is answered from the first attempt instead of logging the interaction twice.
+const postIdempotent = async (url, data, idempotencyKey = crypto.randomUUID()) => {
+    const config = { headers: { 'Idempotency-Key': idempotencyKey } };
+    try {
+        return await api.post(url, data, config);
+    } catch (error) {
+        if (error.response && error.response.status !== 503) {
+            throw error;
+        }
+        const retryAfter = Number(error.response?.headers?.['retry-after']) || 1;
+        await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+        return api.post(url, data, config);
+    }
+};
+
+export const logInteraction = (interactionData, idempotencyKey) => invalidating('/interactions/', postIdempotent('/interactions/', interactionData, idempotencyKey));
+// A chat message may create an HCP as well, so every cached list goes
+export const logInteractionFromChat = (chatData, idempotencyKey) => invalidating('', postIdempotent('/interactions/chat', chatData, idempotencyKey));
+
+// The interaction list is loaded a page at a time (newest first) with only the columns it shows
+export const INTERACTION_PAGE_SIZE = 200;
+const INTERACTION_LIST_FIELDS = 'id,hcp_id,interaction_type,occurred_at,hcp_sentiment,topics_discussed';
+export const getInteractions = ({ skip = 0, limit = INTERACTION_PAGE_SIZE, onRevalidate } = {}) => cachedGet('/interactions/', {
+    params: { skip, limit, fields: INTERACTION_LIST_FIELDS },
+    onRevalidate,
+});
+
+// Live create/update events (server-sent events; EventSource reconnects by itself).
+// Events are not replayed, so after a reconnect onEvent gets a synthetic resync and
+// lists have to be reloaded once. Returns a function that closes the stream.
+export const subscribeToEvents = (onEvent, topics = 'hcps,interactions') => {
+    const source = new EventSource(`${API_BASE_URL}/events/stream?topics=${topics}`);
+    let opened = false;
+    source.onopen = () => {
+        if (opened) {
+            onEvent({ type: 'resync' });
+        }
+        opened = true;
+    };
+    source.onmessage = (message) => onEvent(JSON.parse(message.data));
+    return () => source.close();
+};